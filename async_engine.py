@@ -0,0 +1,375 @@
+"""
+Asyncio engine for the FindAll and OpenRouter integrations
+
+One event loop can drive hundreds of in-flight FindAll runs and LLM streams
+without a thread per request. The Streamlit renderers stay synchronous and
+use BackgroundLoop to drive the engine from the script thread.
+
+Load test against the local mock server (no network access needed):
+    python async_engine.py --load-test 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import threading
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from parallel_client import (
+    BACKOFF_BASE,
+    BACKOFF_CAP,
+    CONNECT_TIMEOUT,
+    MAX_RETRIES,
+    PARALLEL_BASE_URL,
+    READ_TIMEOUT,
+    RETRY_STATUS_CODES,
+    parse_retry_after,
+)
+from metrics import observe, span
+from poll_scheduler import DEFAULT_EXPECTED_DURATION, POLL_COUNT_BUCKETS, POLL_JITTER, is_run_finished, next_poll_delay
+
+# Configuration
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+MAX_CONNECTIONS = 100
+DEFAULT_SEARCH_CONCURRENCY = 8
+
+
+class AsyncFindAllEngine:
+    """
+    Async client for the Parallel.ai FindAll API
+
+    Uses one pooled httpx.AsyncClient with the same timeout, retry and
+    rate-limit policy as the synchronous ParallelClient. Use it as an async
+    context manager so the connection pool is closed when done.
+    """
+
+    def __init__(self, api_key, base_url=PARALLEL_BASE_URL, max_connections=MAX_CONNECTIONS,
+                 max_retries=MAX_RETRIES, expected_duration=DEFAULT_EXPECTED_DURATION,
+                 min_poll_interval=None, max_poll_interval=None):
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"x-api-key": api_key},
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._max_retries = max_retries
+        self._expected_duration = expected_duration
+        self._poll_bounds = {
+            name: value for name, value in
+            (("min_interval", min_poll_interval), ("max_interval", max_poll_interval))
+            if value is not None
+        }
+        self._rate_limited_until = 0.0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the underlying connection pool"""
+        await self._client.aclose()
+
+    async def ingest(self, query):
+        """
+        Turn a natural language query into a FindAll spec
+
+        Args:
+            query (str): Search query
+
+        Returns:
+            dict: FindAll spec with the generated columns
+        """
+        with span("findall.ingest"):
+            response = await self._request("POST", "/v1beta/findall/ingest", idempotent=True, json={"query": query})
+            return response.json()
+
+    async def start_run(self, findall_spec, result_limit=10, processor="base"):
+        """
+        Start a FindAll run for an ingested spec
+
+        Args:
+            findall_spec (dict): Spec returned by ingest()
+            result_limit (int): Maximum number of results to return
+            processor (str): FindAll processor to use
+
+        Returns:
+            str: FindAll run ID
+        """
+        with span("findall.start_run", processor=processor):
+            response = await self._request("POST", "/v1beta/findall/runs", json={
+                "findall_spec": findall_spec,
+                "processor": processor,
+                "result_limit": result_limit
+            })
+            return response.json()["findall_id"]
+
+    async def fetch_run(self, findall_id):
+        """
+        Fetch the current state of a FindAll run
+
+        Args:
+            findall_id (str): FindAll run ID
+
+        Returns:
+            dict: Run data including is_active, are_enrichments_active and results
+        """
+        with span("findall.poll"):
+            response = await self._request("GET", f"/v1beta/findall/runs/{findall_id}", idempotent=True)
+            return response.json()
+
+    async def wait_for_run(self, findall_id, started_at=None):
+        """
+        Poll a run until it finishes, using the same adaptive schedule as PollScheduler
+
+        Args:
+            findall_id (str): FindAll run ID
+            started_at (float): Epoch seconds when the run started; defaults to now
+
+        Returns:
+            dict: Final run data including results
+        """
+        started_at = started_at or time.time()
+        overdue_polls = 0
+        polls = 0
+        search_finished_at = None
+        while True:
+            elapsed = time.time() - started_at
+            delay = next_poll_delay(elapsed, self._expected_duration, overdue_polls, **self._poll_bounds)
+            await asyncio.sleep(delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
+
+            run = await self.fetch_run(findall_id)
+            polls += 1
+            if is_run_finished(run):
+                now = time.time()
+                observe("findall.run", now - started_at)
+                observe("findall.enrichment_tail", now - (search_finished_at or now))
+                observe("findall.polls_per_run", polls, POLL_COUNT_BUCKETS)
+                return run
+            if not run["is_active"] and search_finished_at is None:
+                search_finished_at = time.time()
+            if time.time() - started_at >= self._expected_duration:
+                overdue_polls += 1
+
+    async def search(self, query, result_limit=10, processor="base"):
+        """
+        Run the full ingest -> run -> poll pipeline for one query
+
+        Args:
+            query (str): Search query
+            result_limit (int): Maximum number of results to return
+            processor (str): FindAll processor to use
+
+        Returns:
+            tuple: (results, columns, findall_id)
+        """
+        findall_spec = await self.ingest(query)
+        findall_id = await self.start_run(findall_spec, result_limit, processor)
+        run = await self.wait_for_run(findall_id)
+        return run.get("results", []), findall_spec.get("columns", []), findall_id
+
+    async def search_many(self, queries, result_limit=10, concurrency=DEFAULT_SEARCH_CONCURRENCY):
+        """
+        Run several searches concurrently with a cap on in-flight runs
+
+        Args:
+            queries (list): Search queries
+            result_limit (int): Maximum number of results to return per query
+            concurrency (int): Maximum number of runs in flight at once
+
+        Returns:
+            list: (results, columns, findall_id) tuples, or the exception a query failed with
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded_search(query):
+            async with semaphore:
+                return await self.search(query, result_limit)
+
+        return await asyncio.gather(*(bounded_search(query) for query in queries), return_exceptions=True)
+
+    async def _request(self, method, path, idempotent=False, **kwargs):
+        attempt = 0
+        while True:
+            delay = self._rate_limited_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                response = await self._client.request(method, path, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # The request never reached the server, so any method is safe to resend
+                if attempt >= self._max_retries:
+                    raise
+            except httpx.TransportError:
+                if not idempotent or attempt >= self._max_retries:
+                    raise
+            else:
+                retryable = response.status_code == 429 or (
+                    idempotent and response.status_code in RETRY_STATUS_CODES
+                )
+                if not retryable or attempt >= self._max_retries:
+                    response.raise_for_status()
+                    return response
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    pause = retry_after if retry_after is not None else self._backoff(attempt)
+                    self._rate_limited_until = max(self._rate_limited_until, time.monotonic() + pause)
+                    attempt += 1
+                    continue
+                if retry_after is not None:
+                    await asyncio.sleep(min(retry_after, BACKOFF_CAP))
+                    attempt += 1
+                    continue
+
+            await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+async def stream_chat_completion(messages, model, api_key, base_url=OPENROUTER_BASE_URL, **kwargs):
+    """
+    Stream a chat completion from OpenRouter as text deltas
+
+    Args:
+        messages (list): Chat messages
+        model (str): OpenRouter model name
+        api_key (str): OpenRouter API key
+        base_url (str): OpenAI-compatible API base URL
+
+    Yields:
+        str: Content deltas as they arrive
+    """
+    async with AsyncOpenAI(base_url=base_url, api_key=api_key) as client:
+        stream = await client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content is not None:
+                yield chunk.choices[0].delta.content
+
+
+async def complete_chat(messages, model, api_key, base_url=OPENROUTER_BASE_URL, **kwargs):
+    """
+    Get a full (non-streamed) chat completion from OpenRouter
+
+    Args:
+        messages (list): Chat messages
+        model (str): OpenRouter model name
+        api_key (str): OpenRouter API key
+        base_url (str): OpenAI-compatible API base URL
+
+    Returns:
+        str: Completion text
+    """
+    parts = []
+    async for delta in stream_chat_completion(messages, model, api_key, base_url, **kwargs):
+        parts.append(delta)
+    return "".join(parts)
+
+
+class BackgroundLoop:
+    """
+    An event loop running on a daemon thread, for driving the engine from sync code
+
+    Streamlit scripts run synchronously, so renderers submit coroutines here
+    instead of starting a new event loop on every rerun.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self._loop.run_forever, name="async-engine", daemon=True)
+        thread.start()
+
+    def run(self, coro):
+        """
+        Run a coroutine on the loop and wait for its result
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def iterate(self, agen):
+        """
+        Consume an async generator from sync code
+
+        Args:
+            agen: Async generator running on the loop
+
+        Yields:
+            Items produced by the async generator
+        """
+        try:
+            while True:
+                try:
+                    yield self.run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
+
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop():
+    """
+    Get the process-wide background event loop
+
+    Returns:
+        BackgroundLoop: Shared loop
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+        return _background_loop
+
+
+async def run_load_test(base_url, searches, concurrency, api_key="mock-key"):
+    """
+    Drive many concurrent FindAll searches through the engine and report timings
+
+    Args:
+        base_url (str): Parallel API base URL (normally the local mock server)
+        searches (int): Number of searches to run
+        concurrency (int): Maximum number of runs in flight at once
+        api_key (str): API key sent with each request
+
+    Returns:
+        dict: Search count, failures and wall-clock seconds
+    """
+    queries = [f"Find all load test startups #{i}" for i in range(searches)]
+    started = time.perf_counter()
+    async with AsyncFindAllEngine(api_key, base_url=base_url, expected_duration=1,
+                                  min_poll_interval=0.2, max_poll_interval=1) as engine:
+        outcomes = await engine.search_many(queries, concurrency=concurrency)
+    return {
+        "searches": searches,
+        "failures": sum(isinstance(outcome, Exception) for outcome in outcomes),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+    from mock_server import start_mock_server
+
+    parser = argparse.ArgumentParser(description="Load-test the async FindAll engine against the local mock server")
+    parser.add_argument("--load-test", type=int, default=100, metavar="N", help="number of searches to run")
+    parser.add_argument("--concurrency", type=int, default=100, help="maximum runs in flight at once")
+    parser.add_argument("--run-duration", type=float, default=2.0, help="simulated seconds per FindAll run")
+    args = parser.parse_args()
+
+    server = start_mock_server(run_duration=args.run_duration)
+    print(asyncio.run(run_load_test(server.base_url, args.load_test, args.concurrency)))
+    server.shutdown()
@@ -0,0 +1,304 @@
+"""
+Headless batch processing of a content directory
+
+Extracts theses from every new document in content/ (or another directory),
+runs the generated search queries through FindAll with bounded parallelism
+and saves the results to the history store, without a browser session.
+Progress is written to a JSON checkpoint after every extraction and every
+step of every search, so an interrupted batch picks up where it left off
+(following runs that were already started instead of starting them again),
+and documents that were fully processed are skipped until they change.
+
+Nightly job:
+    python batch_cli.py content --result-limit 10 --concurrency 8
+
+Against the local mock server:
+    python mock_server.py --port 8787
+    PARALLEL_BASE_URL=http://127.0.0.1:8787 OPENROUTER_BASE_URL=http://127.0.0.1:8787/api/v1 \\
+        PARALLEL_API_KEY=mock-key OPENROUTER_API_KEY=mock-key python batch_cli.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from async_engine import DEFAULT_SEARCH_CONCURRENCY, AsyncFindAllEngine
+from history_store import get_history_store, save_search
+from local_db import DATA_DIR
+from parallel_client import PARALLEL_BASE_URL
+from parallel_findall import find_prior_search, get_parallel_api_key
+from spec_cache import get_cached_spec, store_spec
+from thesis_extraction import stream_structured_theses
+from thesis_records import queries_from_theses
+from transcript_corpus import CONTENT_DIR, discover_documents, load_document_content
+
+# Configuration
+DEFAULT_CHECKPOINT = os.path.join(DATA_DIR, "batch_checkpoint.json")
+DEFAULT_RESULT_LIMIT = 10
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _log(message):
+    print(f"[{_now()}] {message}", file=sys.stderr, flush=True)
+
+
+def get_openrouter_api_key():
+    """
+    Get the OpenRouter API key from the environment or secrets
+
+    Returns:
+        str: API key or None if it is not configured
+    """
+    if os.environ.get("OPENROUTER_API_KEY"):
+        return os.environ["OPENROUTER_API_KEY"]
+    try:
+        return st.secrets["openrouter_api_key"]
+    except (KeyError, AttributeError, FileNotFoundError):
+        return None
+
+
+def load_checkpoint(path):
+    """
+    Load the batch checkpoint
+
+    Args:
+        path (str): Checkpoint file
+
+    Returns:
+        dict: Checkpoint with a "documents" entry per document path, empty if the file doesn't exist
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        checkpoint = {}
+    checkpoint.setdefault("documents", {})
+    return checkpoint
+
+
+def save_checkpoint(checkpoint, path):
+    """
+    Write the batch checkpoint atomically, so a crash never leaves a torn file
+
+    Args:
+        checkpoint (dict): Checkpoint to write
+        path (str): Checkpoint file
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_document_current(entry, document):
+    """Whether a checkpoint entry was made from this version of the document"""
+    return bool(entry) and entry["mtime_ns"] == document["mtime_ns"] and entry["size"] == document["size"]
+
+
+def extract_document_queries(document, openrouter_api_key, use_cache=True):
+    """
+    Run thesis extraction over a document and parse out its search queries
+
+    Args:
+        document (dict): Document from discover_documents()
+        openrouter_api_key (str): OpenRouter API key
+        use_cache (bool): Whether to replay or store cached extraction responses
+
+    Returns:
+        list: Search queries generated for the document
+    """
+    content = load_document_content(document)
+    theses = stream_structured_theses(content, use_cache=use_cache, openrouter_api_key=openrouter_api_key)
+    return queries_from_theses(list(theses))
+
+
+def _pending_searches(checkpoint):
+    """Map each query that still needs a search to the checkpoint entries waiting on it"""
+    pending = {}
+    for entry in checkpoint["documents"].values():
+        for query in entry.get("queries", []):
+            if entry["searches"].get(query, {}).get("status") not in ("completed", "reused"):
+                pending.setdefault(query, []).append(entry)
+    return pending
+
+
+async def _run_search(engine, query, entries, result_limit, checkpoint, checkpoint_path, semaphore):
+    """Run one query through ingest -> run -> poll -> save, checkpointing each step"""
+
+    def record(**fields):
+        for entry in entries:
+            entry["searches"].setdefault(query, {}).update(fields)
+        save_checkpoint(checkpoint, checkpoint_path)
+
+    # Every entry waiting on the query shares the same search record
+    search = next((entry["searches"][query] for entry in entries if query in entry["searches"]), {})
+    async with semaphore:
+        try:
+            findall_id = search.get("findall_id")
+            if findall_id is None or search.get("status") == "failed":
+                findall_spec = await asyncio.to_thread(get_cached_spec, query)
+                if findall_spec is None:
+                    findall_spec = await engine.ingest(query)
+                    await asyncio.to_thread(store_spec, query, findall_spec)
+                findall_id = await engine.start_run(findall_spec, result_limit)
+                record(status="running", findall_id=findall_id, columns=findall_spec.get("columns", []),
+                       started_at=time.time(), error=None)
+                search = entries[0]["searches"][query]
+            else:
+                _log(f"Following run {findall_id} started by an earlier batch: {query}")
+
+            run = await engine.wait_for_run(findall_id, started_at=search.get("started_at"))
+            results = run.get("results", [])
+            if results:
+                await asyncio.to_thread(save_search, query, findall_id, results, search.get("columns", []), _now())
+            record(status="completed", result_count=len(results))
+            _log(f"Saved {len(results)} results for run {findall_id}: {query}")
+        except Exception as e:
+            record(status="failed", error=f"{type(e).__name__}: {e}")
+            _log(f"Search failed ({type(e).__name__}: {e}): {query}")
+
+
+async def run_pending_searches(checkpoint, checkpoint_path, parallel_api_key, result_limit, concurrency):
+    """
+    Run every query in the checkpoint that has no completed search yet
+
+    Args:
+        checkpoint (dict): Batch checkpoint, updated in place
+        checkpoint_path (str): Checkpoint file
+        parallel_api_key (str): Parallel.ai API key
+        result_limit (int): Maximum number of results per query
+        concurrency (int): Maximum number of FindAll runs in flight at once
+    """
+    pending = _pending_searches(checkpoint)
+    if not pending:
+        return
+    _log(f"Running {len(pending)} FindAll searches, at most {concurrency} at a time")
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncFindAllEngine(parallel_api_key, base_url=PARALLEL_BASE_URL) as engine:
+        await asyncio.gather(*(
+            _run_search(engine, query, entries, result_limit, checkpoint, checkpoint_path, semaphore)
+            for query, entries in pending.items()
+        ))
+
+
+def process_directory(content_dir, checkpoint_path, openrouter_api_key, parallel_api_key,
+                      result_limit=DEFAULT_RESULT_LIMIT, concurrency=DEFAULT_SEARCH_CONCURRENCY,
+                      use_cache=True, reuse_prior=True):
+    """
+    Extract theses from every new document in a directory and search for their queries
+
+    Args:
+        content_dir (str): Directory of .md documents
+        checkpoint_path (str): Checkpoint file recording progress
+        openrouter_api_key (str): OpenRouter API key
+        parallel_api_key (str): Parallel.ai API key
+        result_limit (int): Maximum number of results per query
+        concurrency (int): Maximum number of FindAll runs in flight at once
+        use_cache (bool): Whether to replay or store cached extraction responses
+        reuse_prior (bool): Skip queries with a fresh prior run of the same or a near-duplicate query
+
+    Returns:
+        dict: Counts of documents processed, skipped and failed, and of unique FindAll runs completed,
+            reused and failed
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    summary = {"documents": 0, "skipped": 0, "extraction_failures": 0}
+    history_df = get_history_store().list_runs() if reuse_prior else None
+
+    # Oldest first, so a backlog of meeting notes is processed in the order the meetings happened
+    for document in reversed(discover_documents(content_dir)):
+        entry = checkpoint["documents"].get(document["path"])
+        if is_document_current(entry, document):
+            # Already extracted; any unfinished searches are picked up below
+            if entry.get("completed_at"):
+                summary["skipped"] += 1
+            continue
+
+        _log(f"Extracting theses from {document['filename']}")
+        try:
+            queries = extract_document_queries(document, openrouter_api_key, use_cache)
+        except Exception as e:
+            summary["extraction_failures"] += 1
+            _log(f"Extraction failed for {document['filename']} ({type(e).__name__}: {e})")
+            continue
+
+        entry = {
+            "title": document["title"],
+            "mtime_ns": document["mtime_ns"],
+            "size": document["size"],
+            "extracted_at": _now(),
+            "queries": queries,
+            "searches": {},
+        }
+        for query in queries:
+            prior = find_prior_search(query, history_df) if reuse_prior else None
+            if prior and prior["fresh"]:
+                entry["searches"][query] = {"status": "reused", "findall_id": prior["run_id"]}
+        checkpoint["documents"][document["path"]] = entry
+        save_checkpoint(checkpoint, checkpoint_path)
+        _log(f"Found {len(queries)} queries in {document['filename']}")
+
+    asyncio.run(run_pending_searches(checkpoint, checkpoint_path, parallel_api_key, result_limit, concurrency))
+
+    for entry in checkpoint["documents"].values():
+        searches = [entry["searches"].get(query, {}) for query in entry.get("queries", [])]
+        if not entry.get("completed_at") and all(s.get("status") in ("completed", "reused") for s in searches):
+            entry["completed_at"] = _now()
+            summary["documents"] += 1
+    save_checkpoint(checkpoint, checkpoint_path)
+
+    # Documents share searches for the same query, and near-duplicate queries can reuse the same prior run,
+    # so count each FindAll run once (a search that failed before starting one is counted by its query)
+    statuses = list({
+        search.get("findall_id") or query: search.get("status")
+        for entry in checkpoint["documents"].values()
+        for query, search in entry["searches"].items()
+    }.values())
+    summary.update(
+        searches=statuses.count("completed"), reused=statuses.count("reused"), search_failures=statuses.count("failed")
+    )
+    return summary
+
+
+def main(argv=None):
+    """Command-line entry point; returns a non-zero exit code if anything failed"""
+    parser = argparse.ArgumentParser(
+        description="Extract theses from new documents and run their search queries through FindAll"
+    )
+    parser.add_argument("content_dir", nargs="?", default=CONTENT_DIR, help="directory of .md documents")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="checkpoint file recording progress")
+    parser.add_argument("--result-limit", type=int, default=DEFAULT_RESULT_LIMIT, help="maximum results per query")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_SEARCH_CONCURRENCY,
+                        help="maximum FindAll runs in flight at once")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached thesis extraction responses")
+    parser.add_argument("--no-reuse", action="store_true",
+                        help="search every query, even ones with a fresh prior run")
+    args = parser.parse_args(argv)
+
+    openrouter_api_key = get_openrouter_api_key()
+    parallel_api_key = os.environ.get("PARALLEL_API_KEY") or get_parallel_api_key()
+    if not openrouter_api_key or not parallel_api_key:
+        parser.error("set OPENROUTER_API_KEY and PARALLEL_API_KEY, or configure them in .streamlit/secrets.toml")
+
+    summary = process_directory(
+        args.content_dir, args.checkpoint, openrouter_api_key, parallel_api_key,
+        result_limit=args.result_limit, concurrency=args.concurrency,
+        use_cache=not args.refresh, reuse_prior=not args.no_reuse,
+    )
+    print(json.dumps(summary))
+    return 1 if summary["extraction_failures"] or summary["search_failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
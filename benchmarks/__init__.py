@@ -0,0 +1,6 @@
+"""
+Offline benchmarks
+
+Run from the repository root, e.g. python -m benchmarks.bench_results_dataframe,
+or everything at once with python -m benchmarks.run_all
+"""
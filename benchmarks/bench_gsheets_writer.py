@@ -0,0 +1,68 @@
+"""
+Benchmark the write-behind Google Sheets writer against an in-memory connection
+
+Saves a burst of searches through GSheetsWriter and reports how long the
+callers were blocked, how long the queue took to drain and how many Sheets
+calls were made, optionally with a share of calls failing on quota.
+
+    python -m benchmarks.bench_gsheets_writer --searches 10 50 --quota-error-rate 0.1
+"""
+import argparse
+import time
+
+from benchmarks.harness import BENCH_LATENCY, mock_gsheets_writer, offline_backend
+from mock_server import MOCK_COLUMNS, synthetic_entities
+
+RESULTS_PER_SEARCH = 20
+
+
+def run(search_counts, latency=BENCH_LATENCY, quota_error_rate=0.0):
+    """
+    Time a burst of saves for each search count; call inside offline_backend()
+
+    Args:
+        search_counts (list): Searches per burst
+        latency (float): Seconds added to every Sheets call
+        quota_error_rate (float): Fraction of Sheets calls that fail with a quota error
+
+    Returns:
+        list: One dict per burst with enqueue and drain times and Sheets call counts
+    """
+    rows = []
+    for count in search_counts:
+        writer, conn = mock_gsheets_writer(latency, quota_error_rate)
+        results = synthetic_entities(RESULTS_PER_SEARCH, MOCK_COLUMNS)
+        started = time.perf_counter()
+        for i in range(count):
+            writer.write(f"Find all benchmark companies, search {i}", f"findall_bench_{i}", results, MOCK_COLUMNS,
+                         "2025-01-01 00:00:00")
+        enqueue_s = time.perf_counter() - started
+        writer.flush()
+        drain_s = time.perf_counter() - started
+
+        rows.append({
+            "benchmark": "gsheets_writer",
+            "case": f"searches={count}",
+            "count": count,
+            "enqueue_s": enqueue_s,
+            "drain_s": drain_s,
+            "sheets_calls": sum(conn.call_counts.values()),
+            "unsaved": writer.pending(),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--latency", type=float, default=BENCH_LATENCY)
+    parser.add_argument("--quota-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with offline_backend():
+        rows = run(args.searches, args.latency, args.quota_error_rate)
+
+    print(f"{'case':>14} {'enqueue':>9} {'drain':>9} {'calls':>6} {'unsaved':>8}")
+    for row in rows:
+        print(f"{row['case']:>14} {row['enqueue_s']:>8.4f}s {row['drain_s']:>8.3f}s "
+              f"{row['sheets_calls']:>6} {row['unsaved']:>8}")
@@ -0,0 +1,80 @@
+"""
+Benchmark rendering the Search History tab with N saved searches
+
+Saved searches are added through save_search, like finished app searches,
+so the entity and search indexes are populated too. The tab is rendered in
+a fresh session (which runs the one-off index backfill check) and then
+rerun in the same session, and the newest search is opened once to time
+loading its results.
+
+    python -m benchmarks.bench_history_tab --searches 10 100 1000
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from benchmarks.harness import offline_backend, rerun_app, run_app, timing_summary
+from mock_server import MOCK_COLUMNS, synthetic_entities
+
+RESULTS_PER_SEARCH = 20
+RERUNS = 5
+
+
+def history_script():
+    from parallel_findall import render_parallel_findall_tab
+
+    render_parallel_findall_tab("search_history")
+
+
+def populate(start, stop):
+    """Save synthetic searches numbered start..stop-1, one minute apart"""
+    from history_store import save_search
+
+    base = datetime(2025, 1, 1)
+    for i in range(start, stop):
+        timestamp = (base + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")
+        results = synthetic_entities(RESULTS_PER_SEARCH, MOCK_COLUMNS, seed=i)
+        save_search(f"Find all benchmark companies, search {i}", f"findall_bench_{i}", results, MOCK_COLUMNS,
+                    timestamp)
+
+
+def run(search_counts, reruns=RERUNS):
+    """
+    Time the history tab as saved searches accumulate; call inside offline_backend()
+
+    Args:
+        search_counts (list): Saved search counts to benchmark, in increasing order
+        reruns (int): Reruns of the same session per count
+
+    Returns:
+        list: Rows for the first render, reruns and opening a search at each count
+    """
+    rows = []
+    saved = 0
+    for count in sorted(search_counts):
+        populate(saved, count)
+        saved = count
+
+        at, first_s = run_app(history_script)
+        rerun_samples = [rerun_app(at) for _ in range(reruns)]
+        # Expanders are keyed by run, and opening one is a session state change
+        at.session_state[f"history_run_findall_bench_{count - 1}"] = True
+        open_s = rerun_app(at)
+
+        rows.append({"benchmark": "history_tab", "case": f"searches={count} first", **timing_summary([first_s])})
+        rows.append({"benchmark": "history_tab", "case": f"searches={count} rerun", **timing_summary(rerun_samples)})
+        rows.append({"benchmark": "history_tab", "case": f"searches={count} open", **timing_summary([open_s])})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--reruns", type=int, default=RERUNS)
+    args = parser.parse_args()
+
+    with offline_backend():
+        rows = run(args.searches, args.reruns)
+
+    print(f"{'case':>22} {'count':>6} {'p50':>9} {'p95':>9}")
+    for row in rows:
+        print(f"{row['case']:>22} {row['count']:>6} {row['p50_s']:>8.3f}s {row['p95_s']:>8.3f}s")
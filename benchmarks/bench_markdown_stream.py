@@ -0,0 +1,146 @@
+"""
+Benchmark rendering a streamed thesis response
+
+Replays a recorded token stream through the legacy loop (re-render the
+whole response on every token) and through MarkdownStreamRenderer, and
+reports render calls, characters sent to the frontend and the time spent
+serializing the markdown elements Streamlit would send over the websocket.
+
+    python -m benchmarks.bench_markdown_stream --theses 2 10 40
+    python -m benchmarks.bench_markdown_stream --recording stream.json
+
+A recording is a JSON list of text deltas, or a fixture from
+benchmarks/fixtures.py. Without one, the mock server's thesis response is
+repeated and split into 4-character tokens, like the mock OpenRouter stream.
+"""
+import argparse
+import json
+import re
+import time
+
+from streamlit.proto.Markdown_pb2 import Markdown
+
+from markdown_stream import MarkdownStreamRenderer
+from mock_server import MOCK_THESIS_RESPONSE
+
+TOKEN_CHARS = 4
+TOKEN_INTERVAL_SECONDS = 0.01
+
+
+class SerializingContainer:
+    """Stands in for st.container(): every markdown() call is serialized like a Streamlit delta"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chars = 0
+        self.bytes = 0
+
+    def empty(self):
+        return self
+
+    def markdown(self, body, unsafe_allow_html=False):
+        self.calls += 1
+        self.chars += len(body)
+        self.bytes += len(Markdown(body=body, allow_html=unsafe_allow_html).SerializeToString())
+
+
+class ReplayClock:
+    """Advances by a fixed interval per token, so time-based flushes are deterministic"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def synthetic_stream(theses):
+    """Split a thesis response with the given number of theses into tokens"""
+    sections = MOCK_THESIS_RESPONSE.split("#### ")[1:]
+    text = "".join(
+        "#### " + re.sub(r"^Thesis \d+", f"Thesis {i + 1}", sections[i % len(sections)])
+        for i in range(theses)
+    )
+    return [text[i:i + TOKEN_CHARS] for i in range(0, len(text), TOKEN_CHARS)]
+
+
+def load_recording(path):
+    """Load recorded deltas from a JSON list or a fixture's markdown thesis stream"""
+    with open(path, encoding="utf-8") as f:
+        recording = json.load(f)
+    return recording["thesis_deltas"] if isinstance(recording, dict) else recording
+
+
+def replay_legacy(deltas):
+    """The original loop: append with += and re-render the whole response per token"""
+    container = SerializingContainer()
+    started = time.perf_counter()
+    full_response = ""
+    for delta in deltas:
+        full_response += delta
+        container.markdown(full_response, unsafe_allow_html=True)
+    return container, time.perf_counter() - started, full_response
+
+
+def replay_buffered(deltas, token_interval=TOKEN_INTERVAL_SECONDS):
+    """Replay through MarkdownStreamRenderer with tokens arriving token_interval apart"""
+    container = SerializingContainer()
+    clock = ReplayClock()
+    started = time.perf_counter()
+    renderer = MarkdownStreamRenderer(container, clock=clock)
+    for delta in deltas:
+        clock.now += token_interval
+        renderer.write(delta)
+    full_response = renderer.close()
+    return container, time.perf_counter() - started, full_response
+
+
+def run(streams, token_interval=TOKEN_INTERVAL_SECONDS):
+    """
+    Replay each stream through both renderers
+
+    Args:
+        streams (dict): Label -> list of text deltas
+        token_interval (float): Simulated seconds between tokens
+
+    Returns:
+        list: One dict per stream with calls, characters and seconds for both renderers
+    """
+    rows = []
+    for label, deltas in streams.items():
+        legacy, legacy_s, legacy_text = replay_legacy(deltas)
+        buffered, buffered_s, buffered_text = replay_buffered(deltas, token_interval)
+        assert buffered_text == legacy_text
+
+        rows.append({
+            "stream": label,
+            "tokens": len(deltas),
+            "legacy_calls": legacy.calls,
+            "legacy_bytes": legacy.bytes,
+            "legacy_s": legacy_s,
+            "buffered_calls": buffered.calls,
+            "buffered_bytes": buffered.bytes,
+            "buffered_s": buffered_s,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--theses", type=int, nargs="+", default=[2, 10, 40])
+    parser.add_argument("--recording", help="JSON file with a list of recorded text deltas")
+    parser.add_argument("--token-interval", type=float, default=TOKEN_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    if args.recording:
+        streams = {args.recording: load_recording(args.recording)}
+    else:
+        streams = {f"{count} theses": synthetic_stream(count) for count in args.theses}
+
+    print(f"{'stream':>12} {'tokens':>7} {'legacy calls':>13} {'legacy MB':>10} {'legacy':>9} "
+          f"{'calls':>6} {'MB':>7} {'buffered':>9} {'speedup':>8}")
+    for row in run(streams, args.token_interval):
+        print(f"{row['stream']:>12} {row['tokens']:>7} {row['legacy_calls']:>13} "
+              f"{row['legacy_bytes'] / 1e6:>10.2f} {row['legacy_s']:>8.3f}s "
+              f"{row['buffered_calls']:>6} {row['buffered_bytes'] / 1e6:>7.3f} {row['buffered_s']:>8.3f}s "
+              f"{row['legacy_s'] / row['buffered_s']:>7.1f}x")
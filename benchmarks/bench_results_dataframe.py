@@ -0,0 +1,101 @@
+"""
+Benchmark create_results_dataframe on synthetic FindAll payloads
+
+    python -m benchmarks.bench_results_dataframe --sizes 10000 50000 100000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from mock_server import MOCK_COLUMNS, synthetic_entities
+from results_frame import create_results_dataframe
+
+# Extra columns so the payload looks like a wide FindAll spec
+BENCH_COLUMNS = MOCK_COLUMNS + [
+    {"name": f"signal_{i}_evidence", "type": "enrichment", "description": f"Signal {i}"} for i in range(6)
+] + [
+    {"name": f"criterion_{i}_check", "type": "constraint", "description": f"Criterion {i}"} for i in range(4)
+]
+
+
+def legacy_create_results_dataframe(results, columns):
+    """The original row-at-a-time implementation, kept as the benchmark baseline"""
+    if not results:
+        return pd.DataFrame()
+
+    df_data = []
+    for entity in results:
+        row = {}
+        row['Name'] = entity.get('name', '')
+        row['Score'] = entity.get('score', 0)
+        row['URL'] = entity.get('url', '')
+        row['Description'] = entity.get('description', '')
+        if 'enrichment_results' in entity:
+            for enrichment in entity['enrichment_results']:
+                key = enrichment.get('key', '')
+                value = enrichment.get('value', '')
+                if key and value:
+                    display_name = key.replace('_', ' ').replace('evidence', '').title().strip()
+                    row[display_name] = value
+        if 'filter_results' in entity:
+            for filter_result in entity['filter_results']:
+                key = filter_result.get('key', '')
+                value = filter_result.get('value', '')
+                reasoning = filter_result.get('reasoning', '')
+                if key:
+                    display_name = key.replace('_', ' ').replace('check', '').title().strip()
+                    if value and reasoning:
+                        row[display_name] = f"{value.upper()}: {reasoning}"
+                    elif value:
+                        row[display_name] = value.upper()
+        df_data.append(row)
+    return pd.DataFrame(df_data)
+
+
+def best_of(func, repeat):
+    """Run func repeat times and return the fastest wall-clock time in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(sizes, repeat=3):
+    """
+    Time the legacy and columnar implementations for each payload size
+
+    Args:
+        sizes (list): Entity counts to benchmark
+        repeat (int): Runs per measurement; the fastest is reported
+
+    Returns:
+        list: One dict per size with timings in seconds
+    """
+    rows = []
+    for size in sizes:
+        results = synthetic_entities(size, BENCH_COLUMNS, seed=size)
+        expected = legacy_create_results_dataframe(results, BENCH_COLUMNS)
+        pd.testing.assert_frame_equal(create_results_dataframe(results, BENCH_COLUMNS), expected)
+
+        rows.append({
+            "entities": size,
+            "legacy_s": best_of(lambda: legacy_create_results_dataframe(results, BENCH_COLUMNS), repeat),
+            "columnar_s": best_of(lambda: create_results_dataframe(results, BENCH_COLUMNS), repeat),
+            "columnar_arrow_s": best_of(lambda: create_results_dataframe(results, BENCH_COLUMNS, arrow=True), repeat),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'entities':>10} {'legacy':>10} {'columnar':>10} {'arrow':>10} {'speedup':>8}")
+    for row in run(args.sizes, args.repeat):
+        print(f"{row['entities']:>10} {row['legacy_s']:>9.3f}s {row['columnar_s']:>9.3f}s "
+              f"{row['columnar_arrow_s']:>9.3f}s {row['legacy_s'] / row['columnar_s']:>7.1f}x")
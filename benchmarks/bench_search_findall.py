@@ -0,0 +1,70 @@
+"""
+Benchmark search_findall end to end against the mock FindAll API
+
+Each search runs ingest -> run -> poll -> save inside a Streamlit script,
+so the time includes progress rendering, the live results table, the
+history save and the Sheets-free local index. Queries are unique so prior
+runs and cached specs are never reused.
+
+    python -m benchmarks.bench_search_findall --searches 5 --result-limit 10 30
+    python -m benchmarks.bench_search_findall --fixture /tmp/recorded.json
+"""
+import argparse
+
+from benchmarks.harness import BENCH_LATENCY, BENCH_RUN_DURATION, offline_backend, run_app, timing_summary
+
+
+def search_script(query, result_limit):
+    from parallel_findall import search_findall
+
+    results, columns, run_id = search_findall(query, result_limit, reuse_prior=False)
+    if results is None:
+        raise RuntimeError(f"search_findall failed for {query!r}")
+
+
+def run(server, result_limits, searches=5):
+    """
+    Time searches with each result limit
+
+    Args:
+        server (MockServer): Mock server yielded by offline_backend()
+        result_limits (list): Result limits to benchmark
+        searches (int): Searches per result limit
+
+    Returns:
+        list: One dict per result limit with timing percentiles and polls per search
+    """
+    rows = []
+    for result_limit in result_limits:
+        samples = []
+        polls_before = server.request_counts.get("poll", 0)
+        for i in range(searches):
+            query = f"Find all benchmark companies, limit {result_limit}, search {i}"
+            _, seconds = run_app(search_script, query, result_limit)
+            samples.append(seconds)
+        polls = server.request_counts.get("poll", 0) - polls_before
+        rows.append({
+            "benchmark": "search_findall",
+            "case": f"limit={result_limit}",
+            **timing_summary(samples),
+            "polls_per_search": polls / searches,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--result-limit", type=int, nargs="+", default=[10, 30])
+    parser.add_argument("--searches", type=int, default=5)
+    parser.add_argument("--fixture", help="recorded API fixture to replay")
+    parser.add_argument("--run-duration", type=float, default=BENCH_RUN_DURATION)
+    parser.add_argument("--latency", type=float, default=BENCH_LATENCY)
+    args = parser.parse_args()
+
+    with offline_backend(args.fixture, run_duration=args.run_duration, latency=args.latency) as server:
+        rows = run(server, args.result_limit, args.searches)
+
+    print(f"{'case':>10} {'count':>6} {'p50':>9} {'p95':>9} {'max':>9} {'polls':>6}")
+    for row in rows:
+        print(f"{row['case']:>10} {row['count']:>6} {row['p50_s']:>8.3f}s {row['p95_s']:>8.3f}s "
+              f"{row['max_s']:>8.3f}s {row['polls_per_search']:>6.1f}")
@@ -0,0 +1,147 @@
+"""
+Record API fixtures for the offline benchmarks
+
+A fixture holds one FindAll spec and final run, and the token streams of
+one thesis extraction in markdown and structured mode, exactly as the live
+APIs returned them. The mock server replays a fixture with the same
+latency settings as its synthetic payloads, so benchmark runs stay offline
+and repeatable while using realistic payload sizes and token boundaries.
+
+No recorded fixtures are checked in, as they hold live search results.
+Record one locally from the live APIs (needs PARALLEL_API_KEY and
+OPENROUTER_API_KEY, or the keys in .streamlit/secrets.toml), then pass it
+to a benchmark or the mock server with --fixture:
+    python -m benchmarks.fixtures record "Find all ..." --document content/meeting.md \\
+        --output /tmp/recorded.json
+    python -m benchmarks.run_all --fixture /tmp/recorded.json
+
+Write a synthetic fixture of a given size:
+    python -m benchmarks.fixtures synthetic --results 200 --output /tmp/synthetic.json
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from mock_server import MOCK_COLUMNS, MOCK_THESIS_JSON, MOCK_THESIS_RESPONSE, synthetic_entities
+
+TOKEN_CHARS = 4
+
+
+def save_fixture(fixture, path):
+    """
+    Write a fixture as JSON
+
+    Args:
+        fixture (dict): Fixture with findall_spec, results, thesis_deltas and thesis_json_deltas
+        path (str): Output file
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, indent=1)
+
+
+def synthetic_fixture(query, result_count):
+    """
+    Build a fixture from the mock server's synthetic payloads
+
+    Args:
+        query (str): Query recorded in the spec
+        result_count (int): Number of entities in the run
+
+    Returns:
+        dict: Fixture
+    """
+    def tokens(text):
+        return [text[i:i + TOKEN_CHARS] for i in range(0, len(text), TOKEN_CHARS)]
+
+    return {
+        "findall_spec": {"query": query, "columns": MOCK_COLUMNS},
+        "results": synthetic_entities(result_count, MOCK_COLUMNS),
+        "thesis_deltas": tokens(MOCK_THESIS_RESPONSE),
+        "thesis_json_deltas": tokens(MOCK_THESIS_JSON),
+    }
+
+
+async def record_fixture(query, document, parallel_api_key, openrouter_api_key, result_limit=10):
+    """
+    Record a fixture from the live FindAll and OpenRouter APIs
+
+    The FindAll run is started before the extraction streams, so both are
+    recorded in the time the run takes.
+
+    Args:
+        query (str): FindAll query
+        document (str): Markdown document to extract theses from
+        parallel_api_key (str): Parallel.ai API key
+        openrouter_api_key (str): OpenRouter API key
+        result_limit (int): Maximum number of results
+
+    Returns:
+        dict: Fixture
+    """
+    from async_engine import AsyncFindAllEngine, stream_chat_completion
+    from parallel_client import PARALLEL_BASE_URL
+    from thesis_extraction import STRUCTURED_THESIS_PROMPT, THESIS_MODEL, THESIS_PROMPT
+    from thesis_records import THESIS_RESPONSE_FORMAT
+
+    with open(document, encoding="utf-8") as f:
+        content = f.read()
+
+    async def record_stream(prompt, **kwargs):
+        messages = [{"role": "system", "content": prompt}, {"role": "user", "content": content}]
+        return [delta async for delta in stream_chat_completion(messages, THESIS_MODEL, openrouter_api_key, **kwargs)]
+
+    async with AsyncFindAllEngine(parallel_api_key, base_url=PARALLEL_BASE_URL) as engine:
+        findall_spec = await engine.ingest(query)
+        findall_id = await engine.start_run(findall_spec, result_limit)
+        thesis_deltas, thesis_json_deltas = await asyncio.gather(
+            record_stream(THESIS_PROMPT),
+            record_stream(STRUCTURED_THESIS_PROMPT, response_format=THESIS_RESPONSE_FORMAT),
+        )
+        run = await engine.wait_for_run(findall_id)
+
+    return {
+        "findall_spec": findall_spec,
+        "results": run.get("results", []),
+        "thesis_deltas": thesis_deltas,
+        "thesis_json_deltas": thesis_json_deltas,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="record a fixture from the live APIs")
+    record.add_argument("query")
+    record.add_argument("--document", required=True, help="markdown document to extract theses from")
+    record.add_argument("--result-limit", type=int, default=10)
+    record.add_argument("--output", required=True)
+    synthetic = commands.add_parser("synthetic", help="write a fixture of synthetic payloads")
+    synthetic.add_argument("--query", default="Find all synthetic benchmark companies")
+    synthetic.add_argument("--results", type=int, default=50)
+    synthetic.add_argument("--output", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        from batch_cli import get_openrouter_api_key
+        from parallel_findall import get_parallel_api_key
+
+        openrouter_api_key = get_openrouter_api_key()
+        parallel_api_key = os.environ.get("PARALLEL_API_KEY") or get_parallel_api_key()
+        if not openrouter_api_key or not parallel_api_key:
+            parser.error("set OPENROUTER_API_KEY and PARALLEL_API_KEY, or configure them in .streamlit/secrets.toml")
+        fixture = asyncio.run(record_fixture(
+            args.query, args.document, parallel_api_key, openrouter_api_key, args.result_limit
+        ))
+    else:
+        fixture = synthetic_fixture(args.query, args.results)
+
+    save_fixture(fixture, args.output)
+    print(f"Wrote {len(fixture['results'])} results and {len(fixture['thesis_deltas'])} tokens to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Offline backend shared by the benchmarks
+
+offline_backend() starts the mock server (optionally replaying a recorded
+fixture), points the app at it and at a throwaway data directory, and swaps
+the poll scheduler for one tuned to the mock's run duration. The app reads
+its base URLs and data directory when its modules are first imported, so
+benchmarks import app modules inside their functions, after the backend is
+up.
+
+Streamlit scripts are run through AppTest, so every st.* call is processed
+the way it is in the app, with mock API keys as secrets.
+"""
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from mock_server import MockGSheetsConnection, load_fixture, start_mock_server
+
+# Configuration
+BENCH_RUN_DURATION = 2.0
+BENCH_ENRICHMENT_TAIL = 0.5
+BENCH_LATENCY = 0.02
+BENCH_TOKEN_DELAY = 0.002
+BENCH_MIN_POLL_INTERVAL = 0.1
+BENCH_MAX_POLL_INTERVAL = 1.0
+APP_TIMEOUT = 120
+MOCK_SECRETS = {"parallel_api_key": "mock-key", "openrouter_api_key": "mock-key"}
+
+
+@contextmanager
+def offline_backend(fixture=None, run_duration=BENCH_RUN_DURATION, enrichment_tail=BENCH_ENRICHMENT_TAIL,
+                    latency=BENCH_LATENCY, token_delay=BENCH_TOKEN_DELAY):
+    """
+    Run the app against the mock server and a temporary data directory
+
+    Args:
+        fixture (str): Recorded fixture file to replay, or None for synthetic payloads
+        run_duration (float): Seconds a mock FindAll run takes
+        enrichment_tail (float): Seconds enrichments lag behind discovery
+        latency (float): Seconds added to every mock API call
+        token_delay (float): Seconds between streamed tokens
+
+    Yields:
+        MockServer: The running mock server, for its request counts
+    """
+    if "parallel_client" in sys.modules:
+        raise RuntimeError("offline_backend() must be entered before the app modules are imported")
+
+    server = start_mock_server(
+        run_duration=run_duration, enrichment_tail=enrichment_tail, latency=latency, token_delay=token_delay,
+        fixture=load_fixture(fixture) if fixture else None,
+    )
+    with tempfile.TemporaryDirectory(prefix="thesis-search-bench-") as data_dir:
+        previous = {name: os.environ.get(name) for name in
+                    ("PARALLEL_BASE_URL", "OPENROUTER_BASE_URL", "THESIS_SEARCH_DATA_DIR", "SEARCH_EMBEDDINGS")}
+        os.environ.update(
+            PARALLEL_BASE_URL=server.base_url,
+            OPENROUTER_BASE_URL=server.openrouter_base_url,
+            THESIS_SEARCH_DATA_DIR=data_dir,
+            # Keep embedding model downloads out of the timings
+            SEARCH_EMBEDDINGS="0",
+        )
+        try:
+            import parallel_findall
+            from poll_scheduler import PollScheduler
+
+            scheduler = PollScheduler(
+                min_interval=BENCH_MIN_POLL_INTERVAL, max_interval=BENCH_MAX_POLL_INTERVAL,
+                default_expected_duration=run_duration + enrichment_tail,
+            )
+            parallel_findall.get_poll_scheduler = lambda: scheduler
+            yield server
+        finally:
+            server.shutdown()
+            server.server_close()
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+
+def mock_gsheets_writer(latency=BENCH_LATENCY, quota_error_rate=0.0):
+    """
+    Build a Sheets writer backed by an in-memory connection
+
+    Args:
+        latency (float): Seconds added to every Sheets call
+        quota_error_rate (float): Fraction of Sheets calls that fail with a quota error
+
+    Returns:
+        tuple: (GSheetsWriter, MockGSheetsConnection)
+    """
+    from gsheets_history import GSheetsWriter
+
+    conn = MockGSheetsConnection(latency=latency, quota_error_rate=quota_error_rate)
+    return GSheetsWriter(get_connection=lambda: conn), conn
+
+
+def run_app(script, *args, timeout=APP_TIMEOUT, **kwargs):
+    """
+    Run a Streamlit script function once with mock secrets
+
+    Args:
+        script (callable): Self-contained script function, see AppTest.from_function
+        *args: Arguments passed to the script
+        timeout (float): Seconds to wait for the script to finish
+        **kwargs: Keyword arguments passed to the script
+
+    Returns:
+        tuple: (AppTest, seconds the run took)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_function(script, default_timeout=timeout, args=args, kwargs=kwargs)
+    at.secrets.update(MOCK_SECRETS)
+    return at, rerun_app(at)
+
+
+def rerun_app(at):
+    """
+    Run a script again in the same session, after any widget changes
+
+    Args:
+        at (AppTest): Script from run_app()
+
+    Returns:
+        float: Seconds the run took
+    """
+    started = time.perf_counter()
+    at.run()
+    seconds = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"Script raised: {at.exception[0].message}")
+    return seconds
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile
+
+    Args:
+        values (list): Samples
+        fraction (float): Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The percentile, or None without samples
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(fraction * (len(values) - 1))))]
+
+
+def timing_summary(samples):
+    """
+    Returns:
+        dict: Count, p50, p95 and max of the samples in seconds
+    """
+    return {
+        "count": len(samples),
+        "p50_s": percentile(samples, 0.5),
+        "p95_s": percentile(samples, 0.95),
+        "max_s": max(samples) if samples else None,
+    }
+
+
+def environment_info():
+    """
+    Describe where a benchmark ran, so reports from different commits can be lined up
+
+    Returns:
+        dict: Git commit, dirty flag, Python version and platform
+    """
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
@@ -0,0 +1,151 @@
+"""
+Run every offline benchmark and write a report that can be compared across commits
+
+All API traffic goes to the mock server, optionally replaying a recorded
+fixture, so reports only differ when the code (or the machine) does. The
+report records the commit it was made at; compare against a report from
+another commit to see which timings moved:
+
+    git checkout main && python -m benchmarks.run_all --output /tmp/main.json
+    git checkout my-branch && python -m benchmarks.run_all --output /tmp/branch.json --compare /tmp/main.json
+
+Timings that got slower than the baseline by more than --threshold are
+flagged, and the exit code is 1 if any were.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from benchmarks import (bench_gsheets_writer, bench_history_tab, bench_markdown_stream, bench_results_dataframe,
+                        bench_search_findall)
+from benchmarks.bench_markdown_stream import load_recording, synthetic_stream
+from benchmarks.harness import environment_info, offline_backend
+
+# Configuration
+DEFAULT_THRESHOLD = 0.2
+QUICK_SETTINGS = {
+    "search_limits": [10], "searches": 3, "history_counts": [10, 200], "dataframe_sizes": [10_000],
+    "stream_theses": [10], "sheets_counts": [20],
+}
+FULL_SETTINGS = {
+    "search_limits": [10, 30], "searches": 5, "history_counts": [10, 100, 1000],
+    "dataframe_sizes": [10_000, 100_000], "stream_theses": [2, 10, 40], "sheets_counts": [10, 50],
+}
+HEADLINE_METRICS = {"gsheets_writer": "drain_s", "results_dataframe": "columnar_s", "markdown_stream": "buffered_s"}
+# Single-sample maxima are too noisy to compare
+COMPARED_METRICS_EXCLUDED = {"max_s"}
+
+
+def run_benchmarks(settings, fixture=None):
+    """
+    Run every benchmark
+
+    Args:
+        settings (dict): Sizes and counts, see QUICK_SETTINGS
+        fixture (str): Recorded fixture to replay, or None for synthetic payloads
+
+    Returns:
+        list: Result rows, each with benchmark and case keys plus its measurements
+    """
+    rows = []
+    with offline_backend(fixture) as server:
+        rows += bench_search_findall.run(server, settings["search_limits"], settings["searches"])
+        rows += bench_history_tab.run(settings["history_counts"])
+        rows += bench_gsheets_writer.run(settings["sheets_counts"])
+
+    for row in bench_results_dataframe.run(settings["dataframe_sizes"]):
+        rows.append({"benchmark": "results_dataframe", "case": f"entities={row.pop('entities')}", **row})
+
+    streams = {f"{count} theses": synthetic_stream(count) for count in settings["stream_theses"]}
+    if fixture:
+        streams["fixture"] = load_recording(fixture)
+    for row in bench_markdown_stream.run(streams):
+        rows.append({"benchmark": "markdown_stream", "case": row.pop("stream"), **row})
+    return rows
+
+
+def timing_key(row):
+    """The headline timing of a row: p50 for repeated timings, otherwise the current implementation's"""
+    return HEADLINE_METRICS.get(row["benchmark"], "p50_s")
+
+
+def compare_reports(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Line up every timing of a report with the same timing in a baseline report
+
+    Args:
+        report (dict): Current report
+        baseline (dict): Report from another commit
+        threshold (float): Slowdown ratio above 1 that counts as a regression, e.g. 0.2 for 20%
+
+    Returns:
+        list: Dicts with benchmark, case, metric, baseline, current, ratio and regressed
+    """
+    baseline_rows = {(row["benchmark"], row["case"]): row for row in baseline["results"]}
+    comparisons = []
+    for row in report["results"]:
+        previous = baseline_rows.get((row["benchmark"], row["case"]))
+        if previous is None:
+            continue
+        for metric, value in row.items():
+            if not metric.endswith("_s") or metric in COMPARED_METRICS_EXCLUDED:
+                continue
+            if not previous.get(metric) or value is None:
+                continue
+            ratio = value / previous[metric]
+            comparisons.append({
+                "benchmark": row["benchmark"],
+                "case": row["case"],
+                "metric": metric,
+                "baseline": previous[metric],
+                "current": value,
+                "ratio": ratio,
+                "regressed": ratio > 1 + threshold,
+            })
+    return comparisons
+
+
+def main(argv=None):
+    """Command-line entry point; returns 1 if a comparison found regressions"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="use the larger benchmark sizes")
+    parser.add_argument("--fixture", help="recorded API fixture to replay")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown that counts as a regression, e.g. 0.2 for 20%%")
+    args = parser.parse_args(argv)
+
+    settings = FULL_SETTINGS if args.full else QUICK_SETTINGS
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "settings": settings,
+        "fixture": args.fixture,
+        "results": run_benchmarks(settings, args.fixture),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    print(f"{'benchmark':>18} {'case':>22} {'metric':>14} {'seconds':>10}")
+    for row in report["results"]:
+        metric = timing_key(row)
+        print(f"{row['benchmark']:>18} {row['case']:>22} {metric:>14} {row[metric]:>10.4f}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline['environment'].get('commit')} ({baseline['generated_at']}):")
+    comparisons = compare_reports(report, baseline, args.threshold)
+    for comparison in comparisons:
+        flag = "  <- slower" if comparison["regressed"] else ""
+        print(f"{comparison['benchmark']:>18} {comparison['case']:>22} {comparison['metric']:>16} "
+              f"{comparison['baseline']:>9.4f}s -> {comparison['current']:>9.4f}s {comparison['ratio']:>6.2f}x{flag}")
+    return 1 if any(comparison["regressed"] for comparison in comparisons) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
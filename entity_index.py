@@ -0,0 +1,218 @@
+"""
+Cross-run entity index
+
+Every saved run is merged into one global index of companies keyed on their
+normalized domain (or normalized name when there is no URL). The index
+records which runs and queries surfaced each company and the score it got
+each time, so "which companies appeared for thesis X" is a single query
+instead of reloading every run.
+"""
+import re
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from local_db import connect
+
+# Legal suffixes dropped when matching companies by name
+NAME_SUFFIXES = {"inc", "incorporated", "llc", "ltd", "limited", "co", "corp", "corporation", "gmbh", "plc", "sa"}
+
+_schema_ready = False
+
+
+def _init_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with connect() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entity_index (
+                entity_key TEXT PRIMARY KEY,
+                name TEXT,
+                url TEXT,
+                description TEXT,
+                best_score REAL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entity_hits (
+                entity_key TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                query TEXT NOT NULL,
+                score REAL,
+                seen_at TEXT NOT NULL,
+                PRIMARY KEY (entity_key, run_id)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entity_hits_run ON entity_hits (run_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entity_hits_query ON entity_hits (query)")
+    _schema_ready = True
+
+
+def normalize_domain(url):
+    """
+    Reduce a URL to its bare domain
+
+    Args:
+        url (str): URL or domain, with or without a scheme
+
+    Returns:
+        str: Lowercase domain without "www.", or "" if there is none
+    """
+    if not url or not isinstance(url, str):
+        return ""
+    url = url.strip().lower()
+    if "://" not in url:
+        url = f"//{url}"
+    host = urlsplit(url).hostname or ""
+    if host.startswith("www."):
+        host = host[4:]
+    return host if "." in host else ""
+
+
+def normalize_name(name):
+    """
+    Normalize a company name for matching
+
+    Args:
+        name (str): Company name
+
+    Returns:
+        str: Lowercase name without punctuation or legal suffixes
+    """
+    if not name or not isinstance(name, str):
+        return ""
+    words = re.sub(r"[^\w\s]", " ", name.lower()).split()
+    while words and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def entity_key(entity):
+    """
+    Build the index key for a FindAll entity
+
+    Args:
+        entity (dict): FindAll result entity
+
+    Returns:
+        str: "domain:<domain>", "name:<name>", or "" if the entity can't be identified
+    """
+    domain = normalize_domain(entity.get("url", ""))
+    if domain:
+        return f"domain:{domain}"
+    name = normalize_name(entity.get("name", ""))
+    return f"name:{name}" if name else ""
+
+
+def merge_run(run_id, query, results, timestamp):
+    """
+    Merge a run's entities into the index
+
+    Merging is incremental and idempotent: entities already recorded for
+    this run are left as they are, so re-fetching a run doesn't duplicate it.
+
+    Args:
+        run_id (str): FindAll run ID
+        query (str): Search query
+        results (list): FindAll results
+        timestamp (str): Search timestamp
+
+    Returns:
+        int: Number of new (entity, run) hits recorded
+    """
+    _init_schema()
+    added = 0
+    with connect() as conn:
+        for entity in results:
+            key = entity_key(entity)
+            if not key:
+                continue
+
+            score = entity.get("score")
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO entity_hits (entity_key, run_id, query, score, seen_at) VALUES (?, ?, ?, ?, ?)",
+                (key, run_id, query, score, timestamp)
+            ).rowcount
+            if not inserted:
+                continue
+
+            added += 1
+            conn.execute("""
+                INSERT INTO entity_index (entity_key, name, url, description, best_score, hit_count, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+                ON CONFLICT (entity_key) DO UPDATE SET
+                    name = COALESCE(NULLIF(excluded.name, ''), name),
+                    url = COALESCE(NULLIF(excluded.url, ''), url),
+                    description = COALESCE(NULLIF(excluded.description, ''), description),
+                    best_score = MAX(COALESCE(best_score, excluded.best_score), COALESCE(excluded.best_score, best_score)),
+                    hit_count = hit_count + 1,
+                    first_seen = MIN(first_seen, excluded.first_seen),
+                    last_seen = MAX(last_seen, excluded.last_seen)
+            """, (
+                key, entity.get("name", ""), entity.get("url", ""), entity.get("description", ""),
+                score, timestamp, timestamp
+            ))
+    return added
+
+
+def companies_for_query(query_text=None, limit=500):
+    """
+    List indexed companies, optionally only those surfaced by matching queries
+
+    Args:
+        query_text (str): Case-insensitive substring to match against run queries
+        limit (int): Maximum number of companies to return
+
+    Returns:
+        pd.DataFrame: Companies with the number of runs and queries that surfaced them
+    """
+    _init_schema()
+    pattern = f"%{query_text.strip()}%" if query_text and query_text.strip() else "%"
+    with connect() as conn:
+        rows = conn.execute("""
+            SELECT e.name, e.url, e.description, e.best_score,
+                   COUNT(h.run_id) AS runs, GROUP_CONCAT(DISTINCT h.query) AS queries,
+                   e.first_seen, e.last_seen, e.entity_key
+            FROM entity_hits h JOIN entity_index e ON e.entity_key = h.entity_key
+            WHERE h.query LIKE ?
+            GROUP BY e.entity_key
+            ORDER BY runs DESC, e.best_score DESC
+            LIMIT ?
+        """, (pattern, limit)).fetchall()
+    return pd.DataFrame(
+        [tuple(row) for row in rows],
+        columns=['Name', 'URL', 'Description', 'Best Score', 'Runs', 'Queries', 'First Seen', 'Last Seen', 'Entity Key']
+    )
+
+
+def entity_history(key):
+    """
+    Get every run that surfaced an entity, with the score it got each time
+
+    Args:
+        key (str): Index key from entity_key()
+
+    Returns:
+        pd.DataFrame: Run ID, query, score and timestamp, oldest first
+    """
+    _init_schema()
+    with connect() as conn:
+        rows = conn.execute(
+            "SELECT run_id, query, score, seen_at FROM entity_hits WHERE entity_key = ? ORDER BY seen_at",
+            (key,)
+        ).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=['Run_ID', 'Query', 'Score', 'Timestamp'])
+
+
+def indexed_run_ids():
+    """
+    Returns:
+        set: IDs of the runs merged into the index
+    """
+    _init_schema()
+    with connect() as conn:
+        return {row["run_id"] for row in conn.execute("SELECT DISTINCT run_id FROM entity_hits")}
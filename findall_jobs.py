@@ -0,0 +1,419 @@
+"""
+Background orchestrator for FindAll runs
+
+Runs the ingest -> run -> poll -> save pipeline on a worker pool and records
+every step in a persistent local job table, so a Streamlit rerun or a closed
+browser tab no longer interrupts a search or loses its results. The UI only
+submits jobs and reads their state.
+"""
+import functools
+import json
+from collections import deque
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from local_db import connect
+from metrics import increment
+from query_dedup import normalize_query
+from results_stream import ResultsAccumulator
+
+# Configuration
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_MAX_CONCURRENT_RUNS = 8
+
+# Job lifecycle: queued -> ingesting -> running -> saving -> completed (or failed)
+ACTIVE_STATUSES = ("queued", "ingesting", "running", "saving")
+FINISHED_STATUSES = ("completed", "failed")
+
+
+def search_key(query, result_limit):
+    """
+    Key under which identical searches are coalesced into one job
+
+    Args:
+        query (str): Search query
+        result_limit (int): Maximum number of results
+
+    Returns:
+        tuple: (normalized query, result limit)
+    """
+    return normalize_query(query), int(result_limit)
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parse_timestamp(timestamp):
+    """Convert a stored timestamp string into epoch seconds"""
+    return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+def _init_schema():
+    with connect() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS findall_jobs (
+                job_id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                result_limit INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                findall_spec TEXT,
+                findall_id TEXT,
+                results TEXT,
+                result_count INTEGER,
+                error TEXT,
+                saved INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                processor TEXT,
+                partial_results TEXT,
+                partial_count INTEGER
+            )
+        """)
+        # Tables created by older versions lack the run timing, processor and partial result columns
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(findall_jobs)")}
+        for column, column_type in (("started_at", "TEXT"), ("finished_at", "TEXT"), ("processor", "TEXT"),
+                                    ("partial_results", "TEXT"), ("partial_count", "INTEGER")):
+            if column not in existing:
+                conn.execute(f"ALTER TABLE findall_jobs ADD COLUMN {column} {column_type}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_findall_jobs_status ON findall_jobs (status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_findall_jobs_created ON findall_jobs (created_at)")
+
+
+def _row_to_job(row):
+    """Convert a job table row into a plain dict with JSON fields decoded"""
+    job = dict(row)
+    job["findall_spec"] = json.loads(job["findall_spec"]) if job["findall_spec"] else None
+    job["results"] = json.loads(job["results"]) if job["results"] else None
+    job["partial_results"] = json.loads(job["partial_results"]) if job["partial_results"] else None
+    job["columns"] = job["findall_spec"].get("columns", []) if job["findall_spec"] else []
+    job["saved"] = bool(job["saved"])
+    return job
+
+
+class FindAllOrchestrator:
+    """
+    Worker pool plus persistent job table that owns the FindAll pipeline
+
+    The pipeline steps are passed in so this module has no dependency on the
+    Streamlit UI code:
+
+        ingest(query, api_key) -> findall_spec
+        start_run(findall_spec, result_limit, api_key, processor=...) -> findall_id
+        fetch_run(findall_id, api_key) -> run dict with is_active/are_enrichments_active/results
+        save(query, run_id, results, columns, timestamp) -> bool
+        get_api_key() -> str or None
+
+    Workers only ingest and start runs; polling is handed to the shared
+    PollScheduler, so a running search does not pin a worker thread. With
+    stream_partial_results, every poll that finds new entities or completed
+    enrichments writes them to the job as partial_results, so they can be
+    shown while the run is still going and survive a crash mid-run.
+
+    Submitting a search that is identical (same normalized query, result
+    limit and processor) to a job still in progress returns that job instead
+    of starting a second run. Every session reads progress from the shared
+    job table, so all requesters follow the one run and its single save.
+    """
+
+    def __init__(self, ingest, start_run, fetch_run, save, get_api_key, poller,
+                 max_workers=DEFAULT_MAX_WORKERS, max_concurrent_runs=DEFAULT_MAX_CONCURRENT_RUNS,
+                 stream_partial_results=True):
+        self._ingest = ingest
+        self._start_run = start_run
+        self._fetch_run = fetch_run
+        self._save = save
+        self._get_api_key = get_api_key
+        self._poller = poller
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="findall-job")
+        # Caps how many FindAll runs are in flight against the API at once. Extra jobs
+        # wait in "queued" without holding a worker, and a finished run hands its slot
+        # straight to the next waiting job
+        self._free_run_slots = max_concurrent_runs
+        self._waiting_jobs = deque()
+        self._run_slots_lock = threading.Lock()
+        self._stream_partial_results = stream_partial_results
+        self._accumulators = {}
+        self._accumulators_lock = threading.Lock()
+        # Serializes the active-job lookup and insert in submit(), so identical submissions can't both start
+        self._submit_lock = threading.Lock()
+
+        _init_schema()
+        self._seed_poll_durations()
+        self.resume_jobs()
+
+    def submit(self, query, result_limit=10, findall_spec=None, processor="base", coalesce=True):
+        """
+        Queue a new FindAll search, or join an identical one still in progress
+
+        Args:
+            query (str): Search query
+            result_limit (int): Maximum number of results to return
+            findall_spec (dict): Run from this spec instead of ingesting the query;
+                searches with an explicit spec are never coalesced
+            processor (str): FindAll processor to use
+            coalesce (bool): Return an identical active job instead of starting a new run
+
+        Returns:
+            str: Job ID that can be used to read the job state
+        """
+        with self._submit_lock:
+            if coalesce and findall_spec is None:
+                active_job = self.find_active_job(query, result_limit, processor)
+                if active_job is not None:
+                    increment("findall.coalesced")
+                    return active_job["job_id"]
+
+            job_id = uuid.uuid4().hex
+            now = _now()
+            with connect() as conn:
+                conn.execute(
+                    "INSERT INTO findall_jobs "
+                    "(job_id, query, result_limit, status, findall_spec, processor, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                    (job_id, query, int(result_limit), json.dumps(findall_spec) if findall_spec else None,
+                     processor, now, now)
+                )
+        self._executor.submit(self._run_job, job_id)
+        return job_id
+
+    def find_active_job(self, query, result_limit=10, processor="base"):
+        """
+        Find a job for the same search that hasn't finished yet
+
+        Args:
+            query (str): Search query, compared after normalization
+            result_limit (int): Maximum number of results
+            processor (str): FindAll processor
+
+        Returns:
+            dict: The oldest matching active job, or None
+        """
+        key = search_key(query, result_limit)
+        with connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id, query, result_limit, processor FROM findall_jobs "
+                f"WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))}) ORDER BY created_at",
+                ACTIVE_STATUSES
+            ).fetchall()
+        for row in rows:
+            if (row["processor"] or "base") == processor and search_key(row["query"], row["result_limit"]) == key:
+                return self.get_job(row["job_id"])
+        return None
+
+    def submit_batch(self, queries, result_limit=10):
+        """
+        Queue several FindAll searches at once
+
+        All jobs are accepted immediately; the orchestrator's concurrency
+        limit decides how many of them run against the API at the same time.
+
+        Args:
+            queries (list): Search queries
+            result_limit (int): Maximum number of results to return per query
+
+        Returns:
+            list: Job IDs in the same order as the queries
+        """
+        return [self.submit(query, result_limit) for query in queries]
+
+    def get_job(self, job_id):
+        """
+        Read the current state of a job
+
+        Args:
+            job_id (str): Job ID returned by submit()
+
+        Returns:
+            dict: Job state or None if the job does not exist
+        """
+        with connect() as conn:
+            row = conn.execute("SELECT * FROM findall_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list_jobs(self, limit=20, job_ids=None):
+        """
+        List the most recent jobs, newest first
+
+        Args:
+            limit (int): Maximum number of jobs to return
+            job_ids (list): Only return these jobs, in the given order
+
+        Returns:
+            list: Job state dicts
+        """
+        if job_ids is not None and not job_ids:
+            return []
+
+        with connect() as conn:
+            if job_ids is not None:
+                rows = conn.execute(
+                    f"SELECT * FROM findall_jobs WHERE job_id IN ({','.join('?' * len(job_ids))})",
+                    list(job_ids)
+                ).fetchall()
+                jobs_by_id = {row["job_id"]: _row_to_job(row) for row in rows}
+                return [jobs_by_id[job_id] for job_id in job_ids if job_id in jobs_by_id][:limit]
+
+            rows = conn.execute(
+                "SELECT * FROM findall_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def resume_jobs(self):
+        """
+        Reschedule jobs that were still active when the process last stopped
+
+        Each job resumes from the last step it recorded, so a run that was
+        already started is polled again rather than launched a second time.
+
+        Returns:
+            int: Number of jobs rescheduled
+        """
+        with connect() as conn:
+            rows = conn.execute(
+                f"SELECT job_id FROM findall_jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES
+            ).fetchall()
+        for row in rows:
+            self._executor.submit(self._run_job, row["job_id"])
+        return len(rows)
+
+    def _update_job(self, job_id, **fields):
+        fields["updated_at"] = _now()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with connect() as conn:
+            conn.execute(
+                f"UPDATE findall_jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id)
+            )
+
+    def _run_job(self, job_id, has_run_slot=False):
+        try:
+            self._execute(job_id, has_run_slot)
+        except Exception as e:
+            self._update_job(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+
+    def _claim_run_slot(self, job_id):
+        """Take a free run slot, or queue the job to be started once one is released"""
+        with self._run_slots_lock:
+            if self._free_run_slots > 0:
+                self._free_run_slots -= 1
+                return True
+            self._waiting_jobs.append(job_id)
+            return False
+
+    def _release_run_slot(self):
+        """Give a run slot to the next waiting job, or free it if none is waiting"""
+        with self._run_slots_lock:
+            if not self._waiting_jobs:
+                self._free_run_slots += 1
+                return
+            job_id = self._waiting_jobs.popleft()
+        self._executor.submit(self._run_job, job_id, True)
+
+    def _execute(self, job_id, has_run_slot=False):
+        job = self.get_job(job_id)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            if has_run_slot:
+                self._release_run_slot()
+            return
+
+        if job["results"] is not None:
+            if has_run_slot:
+                self._release_run_slot()
+            self._save_job(job)
+            return
+
+        api_key = self._get_api_key()
+        if not api_key:
+            if has_run_slot:
+                self._release_run_slot()
+            self._update_job(job_id, status="failed", error="Parallel API key not found in secrets")
+            return
+
+        # The slot is held until the poll scheduler reports the run as done
+        if not has_run_slot and not self._claim_run_slot(job_id):
+            return
+        try:
+            findall_id, started_at = self._start_findall(job, api_key)
+            self._poller.watch(
+                findall_id,
+                fetch=functools.partial(self._fetch_run, findall_id, api_key),
+                on_done=functools.partial(self._on_run_done, job_id),
+                on_error=functools.partial(self._on_run_error, job_id),
+                started_at=started_at,
+                on_progress=functools.partial(self._on_run_progress, job_id) if self._stream_partial_results else None,
+            )
+        except Exception:
+            self._release_run_slot()
+            raise
+
+    def _start_findall(self, job, api_key):
+        """Ingest and start a job's run, resuming from whichever step it last recorded"""
+        job_id = job["job_id"]
+        findall_spec = job["findall_spec"]
+        if findall_spec is None:
+            self._update_job(job_id, status="ingesting")
+            findall_spec = self._ingest(job["query"], api_key)
+            self._update_job(job_id, findall_spec=json.dumps(findall_spec))
+
+        findall_id = job["findall_id"]
+        if findall_id is None:
+            findall_id = self._start_run(
+                findall_spec, job["result_limit"], api_key, processor=job["processor"] or "base"
+            )
+            started_at = _now()
+            self._update_job(job_id, status="running", findall_id=findall_id, started_at=started_at)
+        else:
+            started_at = job["started_at"] or job["created_at"]
+
+        return findall_id, _parse_timestamp(started_at)
+
+    def _on_run_progress(self, job_id, run):
+        with self._accumulators_lock:
+            accumulator = self._accumulators.setdefault(job_id, ResultsAccumulator())
+            delta = accumulator.update(run.get("results", []))
+        if delta["new"] or delta["updated"]:
+            self._update_job(
+                job_id, partial_results=json.dumps(accumulator.results), partial_count=len(accumulator.results)
+            )
+
+    def _on_run_done(self, job_id, run):
+        self._release_run_slot()
+        with self._accumulators_lock:
+            self._accumulators.pop(job_id, None)
+        results = run.get("results", [])
+        # The final results supersede the partial ones
+        self._update_job(
+            job_id, status="saving", results=json.dumps(results),
+            result_count=len(results), finished_at=_now(), partial_results=None
+        )
+        self._executor.submit(self._run_job, job_id)
+
+    def _on_run_error(self, job_id, error):
+        self._release_run_slot()
+        with self._accumulators_lock:
+            self._accumulators.pop(job_id, None)
+        # Partial results are kept, so whatever the run found before failing is still shown
+        self._update_job(job_id, status="failed", error=f"{type(error).__name__}: {error}")
+
+    def _save_job(self, job):
+        saved = False
+        if job["results"]:
+            saved = bool(self._save(job["query"], job["findall_id"], job["results"], job["columns"], _now()))
+        self._update_job(job["job_id"], status="completed", saved=int(saved))
+
+    def _seed_poll_durations(self):
+        """Teach the poll scheduler how long recent runs took"""
+        with connect() as conn:
+            rows = conn.execute(
+                "SELECT started_at, finished_at FROM findall_jobs "
+                "WHERE started_at IS NOT NULL AND finished_at IS NOT NULL "
+                "ORDER BY finished_at DESC LIMIT 50"
+            ).fetchall()
+        for row in reversed(rows):
+            self._poller.record_duration(_parse_timestamp(row["finished_at"]) - _parse_timestamp(row["started_at"]))
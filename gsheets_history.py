@@ -0,0 +1,345 @@
+"""
+Google Sheets storage for search history
+"""
+import streamlit as st
+import pandas as pd
+import queue
+import random
+import threading
+import time
+from datetime import datetime
+from gspread.exceptions import WorksheetNotFound
+from streamlit_gsheets import GSheetsConnection
+from metrics import increment, observe, span
+from results_frame import create_results_dataframe
+
+
+# Configuration
+INDEX_WORKSHEET = "Searches"
+COALESCE_SECONDS = 2.0
+MAX_BATCH_SIZE = 50
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60
+INDEX_RETRY_SECONDS = 30
+INDEX_BATCH_BUCKETS = (1, 2, 5, 10, 25, 50)
+
+# Note: Parallel.ai API does not provide an endpoint to list previous runs
+# Search history lives in the local history store (see history_store.py);
+# Google Sheets is kept as an optional backend and export sink
+
+
+@st.cache_resource
+def get_gsheets_connection():
+    """
+    Get the process-wide Google Sheets connection
+
+    Returns:
+        GSheetsConnection: Shared connection
+    """
+    return st.connection("gsheets", type=GSheetsConnection)
+
+
+def is_quota_error(error):
+    """
+    Check whether a Sheets API error is a rate limit or quota error worth retrying
+
+    Args:
+        error (Exception): Error raised by the connection
+
+    Returns:
+        bool: True if the error carries an HTTP 429 response, as gspread's APIError does
+    """
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def build_results_worksheet(query, run_id, results, columns, timestamp):
+    """
+    Build the worksheet for a search: a metadata row followed by the results table
+
+    Args:
+        query (str): Search query
+        run_id (str): FindAll run ID
+        results (list): FindAll results
+        columns (list): Column definitions
+        timestamp (str): Search timestamp
+
+    Returns:
+        pd.DataFrame: Worksheet contents
+    """
+    df = create_results_dataframe(results, columns)
+
+    # Create a metadata row as the first row
+    metadata_row = pd.DataFrame([{
+        'Name': f'SEARCH QUERY: {query}',
+        'Score': '',
+        'URL': f'Run ID: {run_id}',
+        'Description': f'Search executed on {timestamp}',
+        **{col: '' for col in df.columns if col not in ['Name', 'Score', 'URL', 'Description']}
+    }])
+
+    # Combine metadata row with results
+    return pd.concat([metadata_row, df], ignore_index=True)
+
+
+class GSheetsWriter:
+    """
+    Write-behind queue for everything the app writes to Google Sheets
+
+    Callers only enqueue, so a search never waits on the Sheets API. One
+    worker thread owns all writes through a single shared connection: it
+    collects searches that finish within a short window, creates their
+    result worksheets, then appends all of their index rows with one read
+    and one update of the "Searches" worksheet. Having a single writer means
+    concurrent saves can no longer overwrite each other's index rows. Quota
+    errors are retried with exponential backoff. Index rows that still fail
+    are retried every INDEX_RETRY_SECONDS, with the next batch, or on flush().
+    """
+
+    # Queued by flush() to write immediately and retry failed index rows
+    _FLUSH = object()
+
+    def __init__(self, get_connection=get_gsheets_connection, coalesce_seconds=COALESCE_SECONDS,
+                 max_batch_size=MAX_BATCH_SIZE, max_retries=MAX_RETRIES, index_retry_seconds=INDEX_RETRY_SECONDS,
+                 sleep=time.sleep):
+        self._get_connection = get_connection
+        self._coalesce_seconds = coalesce_seconds
+        self._index_retry_seconds = index_retry_seconds
+        self._max_batch_size = max_batch_size
+        self._max_retries = max_retries
+        self._sleep = sleep
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        # Index rows not yet appended to the "Searches" worksheet, in save order
+        self._unindexed_rows = []
+        self._index_backlog = []
+        # Worksheet names embed the second they were made in, so only that second's names need tracking
+        self._worksheet_second = None
+        self._worksheet_suffix = 1
+        # Searches given up on because their worksheet couldn't be created
+        self._dropped = 0
+        self.last_error = None
+
+        thread = threading.Thread(target=self._worker, name="gsheets-writer", daemon=True)
+        thread.start()
+
+    def write(self, query, run_id, results, columns, timestamp):
+        """
+        Queue a search to be saved to its own worksheet and added to the index
+
+        Args:
+            query (str): Search query
+            run_id (str): FindAll run ID
+            results (list): FindAll results
+            columns (list): Column definitions
+            timestamp (str): Search timestamp
+
+        Returns:
+            str: Name of the worksheet the results will be written to
+        """
+        row = {
+            'Timestamp': timestamp,
+            'Query': query,
+            'Run_ID': run_id,
+            'Result_Count': len(results),
+            'Worksheet': self._new_worksheet_name()
+        }
+        with self._lock:
+            self._unindexed_rows.append(row)
+        self._queue.put((row, (query, run_id, results, columns, timestamp)))
+        return row['Worksheet']
+
+    def pending(self):
+        """
+        Returns:
+            int: Number of searches whose index row hasn't been written yet
+        """
+        with self._lock:
+            return len(self._unindexed_rows)
+
+    def pending_index_rows(self):
+        """
+        Index rows of searches that are queued but not yet in the "Searches" worksheet
+
+        Returns:
+            pd.DataFrame: Pending rows with the index columns
+        """
+        with self._lock:
+            return pd.DataFrame(list(self._unindexed_rows))
+
+    def flush(self):
+        """
+        Write everything queued straight away and retry index rows that failed before
+
+        Blocks until the writes have been attempted.
+
+        Returns:
+            bool: True if every search was saved, False if any failed (see last_error) or still await a retry
+        """
+        with self._lock:
+            dropped = self._dropped
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+        with self._lock:
+            return not self._unindexed_rows and self._dropped == dropped
+
+    def _new_worksheet_name(self):
+        # Use readable date/time as worksheet name, made unique when several searches finish in the same second
+        base = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        with self._lock:
+            if base != self._worksheet_second:
+                self._worksheet_second, self._worksheet_suffix = base, 1
+                return base
+            self._worksheet_suffix += 1
+            return f"{base}_{self._worksheet_suffix}"
+
+    def _next_batch(self):
+        # Wake up to retry failed index rows even if no new searches arrive
+        try:
+            batch = [self._queue.get(timeout=self._index_retry_seconds if self._index_backlog else None)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self._coalesce_seconds
+        while len(batch) < self._max_batch_size and batch[-1] is not self._FLUSH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Keep the writer alive; the error is kept for display
+                self.last_error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        conn = self._get_connection()
+        for item in batch:
+            if item is self._FLUSH:
+                continue
+            row, search = item
+            try:
+                data = build_results_worksheet(*search)
+                with span("gsheets.create_worksheet"):
+                    self._with_retries(lambda: conn.create(worksheet=row['Worksheet'], data=data))
+                self._index_backlog.append(row)
+            except Exception as e:
+                self.last_error = e
+                with self._lock:
+                    self._unindexed_rows.remove(row)
+                    self._dropped += 1
+
+        if self._index_backlog:
+            rows = list(self._index_backlog)
+            with span("gsheets.append_index") as attributes:
+                attributes["rows"] = len(rows)
+                self._with_retries(lambda: self._append_index_rows(conn, rows))
+            observe("gsheets.index_batch_size", len(rows), INDEX_BATCH_BUCKETS)
+            self._index_backlog = self._index_backlog[len(rows):]
+            with self._lock:
+                for row in rows:
+                    self._unindexed_rows.remove(row)
+
+    def _append_index_rows(self, conn, rows):
+        # Read uncached: this thread is the only writer, so the sheet can't change under us.
+        # Any error other than a missing worksheet propagates, so the rows stay in the backlog
+        # instead of the index being overwritten with just this batch
+        try:
+            df = conn.read(worksheet=INDEX_WORKSHEET, ttl=0)
+        except WorksheetNotFound:
+            conn.create(worksheet=INDEX_WORKSHEET,
+                        data=pd.DataFrame(rows, columns=['Timestamp', 'Query', 'Run_ID', 'Result_Count', 'Worksheet']))
+            return
+
+        conn.update(worksheet=INDEX_WORKSHEET, data=pd.concat([df, pd.DataFrame(rows)], ignore_index=True))
+
+    def _with_retries(self, call):
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except Exception as e:
+                if not is_quota_error(e) or attempt >= self._max_retries:
+                    raise
+            increment("gsheets.quota_retries")
+            self._sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt))))
+            attempt += 1
+
+
+@st.cache_resource
+def get_gsheets_writer():
+    """
+    Get the process-wide Google Sheets writer
+
+    Returns:
+        GSheetsWriter: Shared write-behind queue
+    """
+    return GSheetsWriter()
+
+
+def save_search_to_gsheets(query, run_id, results, columns, timestamp):
+    """
+    Queue search results to be saved to Google Sheets in their own worksheet
+
+    Args:
+        query (str): Search query
+        run_id (str): FindAll run ID
+        results (list): FindAll results
+        columns (list): Column definitions
+        timestamp (str): Search timestamp
+
+    Returns:
+        bool: True once the search is queued; the write itself happens in the background
+    """
+    get_gsheets_writer().write(query, run_id, results, columns, timestamp)
+    return True
+
+
+def load_search_history():
+    """
+    Load search history from Google Sheets Searches worksheet
+
+    Returns:
+        pd.DataFrame: Search history or empty DataFrame if error
+    """
+    try:
+        with span("gsheets.read", worksheet=INDEX_WORKSHEET):
+            df = get_gsheets_connection().read(worksheet=INDEX_WORKSHEET, ttl="1m")
+        # Include searches still queued for writing, so a save shows up straight away
+        pending_df = get_gsheets_writer().pending_index_rows()
+        if not pending_df.empty:
+            df = pd.concat([df, pending_df], ignore_index=True).drop_duplicates(subset=['Run_ID'], keep='first')
+        return df.sort_values('Timestamp', ascending=False) if not df.empty else pd.DataFrame()
+    except Exception as e:
+        st.warning(f"Could not load search history: {e}")
+        return pd.DataFrame()
+
+
+def load_search_results_from_worksheet(worksheet_name):
+    """
+    Load specific search results from a worksheet
+
+    Args:
+        worksheet_name (str): Name of the worksheet to load
+
+    Returns:
+        pd.DataFrame: Search results or empty DataFrame if error
+    """
+    try:
+        with span("gsheets.read", worksheet="results"):
+            df = get_gsheets_connection().read(worksheet=worksheet_name, ttl="1m")
+        return df
+    except Exception as e:
+        st.error(f"Could not load results from worksheet {worksheet_name}: {e}")
+        return pd.DataFrame()
@@ -0,0 +1,386 @@
+"""
+Pluggable search history backends
+
+The default backend is an embedded SQLite store with one table for runs and
+one for their entities. Saving a search is a couple of appends, and lookups
+by run_id, timestamp and query are indexed, so saves don't slow down as
+history grows. Google Sheets can still be used as the backend, or as an
+export sink that copies each saved run in the background.
+"""
+import json
+
+import pandas as pd
+import streamlit as st
+
+from entity_index import indexed_run_ids, merge_run
+from gsheets_history import (
+    get_gsheets_writer,
+    load_search_history,
+    load_search_results_from_worksheet,
+    save_search_to_gsheets,
+)
+from local_db import connect
+from metrics import span
+from results_frame import create_results_dataframe
+from search_index import index_run, indexed_run_ids as search_indexed_run_ids
+
+# Columns of the history index, shared by every backend
+HISTORY_INDEX_COLUMNS = ['Timestamp', 'Query', 'Run_ID', 'Result_Count', 'Worksheet']
+
+
+def _init_schema():
+    with connect() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                result_count INTEGER NOT NULL,
+                columns TEXT NOT NULL,
+                worksheet TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs (timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_query ON runs (query)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS entities (
+                run_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT,
+                url TEXT,
+                score REAL,
+                description TEXT,
+                data TEXT NOT NULL,
+                PRIMARY KEY (run_id, position)
+            )
+        """)
+
+
+class LocalHistoryStore:
+    """Embedded SQLite history backend (the default)"""
+
+    def __init__(self):
+        _init_schema()
+
+    def save_run(self, query, run_id, results, columns, timestamp, worksheet=None):
+        """
+        Append a finished search to history; saving the same run twice is a no-op
+
+        Args:
+            query (str): Search query
+            run_id (str): FindAll run ID
+            results (list): FindAll results
+            columns (list): Column definitions
+            timestamp (str): Search timestamp
+            worksheet (str): Worksheet the run was exported to, if any
+
+        Returns:
+            bool: True if the run is stored
+        """
+        with connect() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO runs (run_id, query, timestamp, result_count, columns, worksheet) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, query, timestamp, len(results), json.dumps(columns), worksheet)
+            ).rowcount
+            if inserted:
+                conn.executemany(
+                    "INSERT INTO entities (run_id, position, name, url, score, description, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, position, entity.get('name', ''), entity.get('url', ''),
+                         entity.get('score'), entity.get('description', ''), json.dumps(entity))
+                        for position, entity in enumerate(results)
+                    ]
+                )
+        return True
+
+    def import_index(self, history_df):
+        """
+        Import runs from a Google Sheets search index
+
+        Imported runs keep their worksheet name, and their results are read
+        from that worksheet since the raw FindAll results aren't available.
+
+        Args:
+            history_df (pd.DataFrame): Index with HISTORY_INDEX_COLUMNS
+
+        Returns:
+            int: Number of runs imported
+        """
+        if history_df.empty:
+            return 0
+        with connect() as conn:
+            return conn.executemany(
+                "INSERT OR IGNORE INTO runs (run_id, query, timestamp, result_count, columns, worksheet) "
+                "VALUES (?, ?, ?, ?, '[]', ?)",
+                [
+                    (str(row['Run_ID']), str(row['Query']), str(row['Timestamp']),
+                     int(row['Result_Count']) if pd.notna(row['Result_Count']) else 0,
+                     row['Worksheet'] if pd.notna(row['Worksheet']) else None)
+                    for _, row in history_df.iterrows()
+                ]
+            ).rowcount
+
+    def count_runs(self):
+        """
+        Returns:
+            int: Number of saved runs
+        """
+        with connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def list_runs(self, limit=None, offset=0):
+        """
+        List saved runs, newest first
+
+        Args:
+            limit (int): Maximum number of runs to return (all if None)
+            offset (int): Number of runs to skip
+
+        Returns:
+            pd.DataFrame: History index with HISTORY_INDEX_COLUMNS
+        """
+        with connect() as conn:
+            rows = conn.execute(
+                "SELECT timestamp, query, run_id, result_count, worksheet FROM runs "
+                "ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+        return pd.DataFrame([tuple(row) for row in rows], columns=HISTORY_INDEX_COLUMNS)
+
+    def find_runs_by_query(self, query):
+        """
+        List saved runs for an exact query, newest first
+
+        Args:
+            query (str): Search query
+
+        Returns:
+            pd.DataFrame: History index with HISTORY_INDEX_COLUMNS
+        """
+        with connect() as conn:
+            rows = conn.execute(
+                "SELECT timestamp, query, run_id, result_count, worksheet FROM runs "
+                "WHERE query = ? ORDER BY timestamp DESC",
+                (query,)
+            ).fetchall()
+        return pd.DataFrame([tuple(row) for row in rows], columns=HISTORY_INDEX_COLUMNS)
+
+    def get_run(self, run_id):
+        """
+        Load a saved run with its raw FindAll results
+
+        Args:
+            run_id (str): FindAll run ID
+
+        Returns:
+            dict: query, timestamp, worksheet, columns and results, or None if the run is unknown
+        """
+        with connect() as conn:
+            run = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if run is None:
+                return None
+            entities = conn.execute(
+                "SELECT data FROM entities WHERE run_id = ? ORDER BY position", (run_id,)
+            ).fetchall()
+        return {
+            "run_id": run_id,
+            "query": run["query"],
+            "timestamp": run["timestamp"],
+            "worksheet": run["worksheet"],
+            "columns": json.loads(run["columns"]),
+            "results": [json.loads(entity["data"]) for entity in entities],
+        }
+
+    def list_run_details(self, run_id=None):
+        """
+        List saved runs with their column definitions, oldest first
+
+        Args:
+            run_id (str): Only this run; all runs if None
+
+        Returns:
+            list: Dicts with run_id, query, timestamp, result_count and columns
+        """
+        sql = "SELECT run_id, query, timestamp, result_count, columns FROM runs"
+        params = ()
+        if run_id is not None:
+            sql += " WHERE run_id = ?"
+            params = (run_id,)
+        with connect() as conn:
+            rows = conn.execute(sql + " ORDER BY timestamp", params).fetchall()
+        return [{**dict(row), "columns": json.loads(row["columns"])} for row in rows]
+
+    def iter_run_results(self, run_id, batch_size=1000):
+        """
+        Stream a saved run's raw FindAll results in batches
+
+        Only one batch is decoded at a time, so exporting a large run doesn't
+        load all of its entities at once.
+
+        Args:
+            run_id (str): FindAll run ID
+            batch_size (int): Maximum number of entities per batch
+
+        Yields:
+            list: Raw result entities, in their original order
+        """
+        with connect() as conn:
+            cursor = conn.execute("SELECT data FROM entities WHERE run_id = ? ORDER BY position", (run_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [json.loads(row["data"]) for row in rows]
+
+    def load_run_results(self, run_id, worksheet=None):
+        """
+        Load a saved run's results for display
+
+        Args:
+            run_id (str): FindAll run ID
+            worksheet (str): Worksheet to fall back to for runs imported from Google Sheets
+
+        Returns:
+            pd.DataFrame: Results or empty DataFrame if the run is unknown
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return pd.DataFrame()
+        if not run["results"] and run["worksheet"]:
+            return GSheetsHistoryStore().load_run_results(run_id, worksheet or run["worksheet"])
+        return create_results_dataframe(run["results"], run["columns"])
+
+
+class GSheetsHistoryStore:
+    """Google Sheets history backend: one worksheet per run plus the "Searches" index"""
+
+    def save_run(self, query, run_id, results, columns, timestamp, worksheet=None):
+        return save_search_to_gsheets(query, run_id, results, columns, timestamp)
+
+    def count_runs(self):
+        return len(load_search_history())
+
+    def list_runs(self, limit=None, offset=0):
+        history_df = load_search_history()
+        if history_df.empty:
+            return pd.DataFrame(columns=HISTORY_INDEX_COLUMNS)
+        end = None if limit is None else offset + limit
+        return history_df.iloc[offset:end]
+
+    def find_runs_by_query(self, query):
+        history_df = load_search_history()
+        if history_df.empty:
+            return pd.DataFrame(columns=HISTORY_INDEX_COLUMNS)
+        return history_df[history_df['Query'] == query]
+
+    def get_run(self, run_id):
+        # Worksheets only hold the flattened display table, not the raw results
+        return None
+
+    def load_run_results(self, run_id, worksheet=None):
+        results_df = load_search_results_from_worksheet(worksheet or run_id[:31])
+        # Skip the metadata row (first row)
+        return results_df.iloc[1:] if len(results_df) > 1 else results_df
+
+
+def _get_secret(name, default=None):
+    try:
+        return st.secrets.get(name, default)
+    except (AttributeError, FileNotFoundError):
+        return default
+
+
+def _gsheets_configured():
+    try:
+        return "gsheets" in st.secrets.get("connections", {})
+    except (AttributeError, FileNotFoundError):
+        return False
+
+
+@st.cache_resource
+def get_history_store():
+    """
+    Get the configured history backend
+
+    Set history_backend = "gsheets" in secrets to keep using Google Sheets as
+    the primary store; the default is the local SQLite store.
+
+    Returns:
+        LocalHistoryStore or GSheetsHistoryStore: History backend
+    """
+    if _get_secret("history_backend", "local") == "gsheets":
+        return GSheetsHistoryStore()
+    return LocalHistoryStore()
+
+
+@st.cache_resource
+def get_export_sink():
+    """
+    Get the Google Sheets writer to export saved runs to, if exporting is enabled
+
+    Exporting defaults to on when a gsheets connection is configured and can
+    be turned off with gsheets_export = false in secrets. It is skipped when
+    Sheets is already the primary backend.
+
+    Returns:
+        GSheetsWriter: Shared write-behind Sheets writer or None
+    """
+    if isinstance(get_history_store(), GSheetsHistoryStore):
+        return None
+    if not _get_secret("gsheets_export", _gsheets_configured()):
+        return None
+    return get_gsheets_writer()
+
+
+def save_search(query, run_id, results, columns, timestamp):
+    """
+    Save a finished search to the history backend, merge it into the
+    cross-run entity index and search index, and queue any export
+
+    Args:
+        query (str): Search query
+        run_id (str): FindAll run ID
+        results (list): FindAll results
+        columns (list): Column definitions
+        timestamp (str): Search timestamp
+
+    Returns:
+        bool: True if the search was saved to the history backend
+    """
+    with span("history.save_run"):
+        saved = get_history_store().save_run(query, run_id, results, columns, timestamp)
+    with span("history.index_run"):
+        merge_run(run_id, query, results, timestamp)
+        index_run(run_id, query, results)
+    sink = get_export_sink()
+    if saved and sink is not None:
+        sink.write(query, run_id, results, columns, timestamp)
+    return saved
+
+
+def backfill_indexes():
+    """
+    Add locally stored runs that are missing from the entity or search index
+
+    Returns:
+        int: Number of runs merged
+    """
+    store = get_history_store()
+    if not isinstance(store, LocalHistoryStore):
+        return 0
+
+    entity_indexed = indexed_run_ids()
+    search_indexed = search_indexed_run_ids()
+    with connect() as conn:
+        run_ids = [
+            row["run_id"] for row in conn.execute("SELECT run_id FROM runs WHERE result_count > 0")
+            if row["run_id"] not in entity_indexed or row["run_id"] not in search_indexed
+        ]
+    for run_id in run_ids:
+        run = store.get_run(run_id)
+        if run["results"]:
+            merge_run(run_id, run["query"], run["results"], run["timestamp"])
+            index_run(run_id, run["query"], run["results"])
+    return len(run_ids)
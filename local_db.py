@@ -0,0 +1,47 @@
+"""
+Local SQLite storage shared by the background job table, history store and caches
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# Configuration
+DATA_DIR = os.environ.get("THESIS_SEARCH_DATA_DIR", "data")
+DB_FILENAME = "thesis_search.sqlite3"
+
+
+def get_db_path():
+    """
+    Get the path of the local SQLite database, creating the data directory if needed
+
+    Returns:
+        str: Path to the database file
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, DB_FILENAME)
+
+
+@contextmanager
+def connect():
+    """
+    Open a short-lived connection to the local database
+
+    Connections are cheap with SQLite, so every caller (including background
+    worker threads) opens its own and closes it when done. Changes are
+    committed on a clean exit and rolled back on error.
+
+    Yields:
+        sqlite3.Connection: Connection with rows returned as sqlite3.Row
+    """
+    conn = sqlite3.connect(get_db_path(), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,103 @@
+"""
+Buffered markdown rendering for streamed LLM output
+
+Re-rendering the whole accumulated response on every token is O(n^2) in
+rendering work and sends the full text over the websocket each time.
+MarkdownStreamRenderer buffers tokens and flushes them on a time or size
+cadence. Sections that are finished (everything before the latest heading)
+are rendered once into their own element, and only the trailing section
+that is still streaming is re-rendered on each flush.
+"""
+import re
+import time
+
+# Configuration
+FLUSH_INTERVAL_SECONDS = 0.1
+FLUSH_CHARS = 400
+
+# A markdown heading at the start of a line starts a new section, e.g. "#### Thesis 2: ..."
+SECTION_PATTERN = re.compile(r"^#{1,6} ", re.MULTILINE)
+
+
+class MarkdownStreamRenderer:
+    """
+    Streams markdown into a Streamlit container with bounded work per token
+
+    The container only needs an empty() method returning a placeholder with
+    a markdown() method, so st.container() works directly.
+    """
+
+    def __init__(self, container, flush_interval=FLUSH_INTERVAL_SECONDS, flush_chars=FLUSH_CHARS,
+                 clock=time.monotonic):
+        self._container = container
+        self._flush_interval = flush_interval
+        self._flush_chars = flush_chars
+        self._clock = clock
+
+        self._parts = []
+        self._pending = []
+        self._pending_chars = 0
+        self._trailing = ""
+        self._placeholder = None
+        self._last_flush = clock()
+
+        self.render_count = 0
+        self.rendered_chars = 0
+
+    @property
+    def text(self):
+        """Everything written so far, including buffered tokens"""
+        return "".join(self._parts)
+
+    def write(self, delta):
+        """
+        Add a streamed delta, flushing if the buffer is due
+
+        Args:
+            delta (str): Text delta from the stream
+        """
+        if not delta:
+            return
+        self._parts.append(delta)
+        self._pending.append(delta)
+        self._pending_chars += len(delta)
+        if self._pending_chars >= self._flush_chars or self._clock() - self._last_flush >= self._flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Render buffered tokens now"""
+        self._last_flush = self._clock()
+        if not self._pending:
+            return
+
+        self._trailing += "".join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+
+        # Everything before the last heading is final: render it once and start a new trailing element
+        boundary = 0
+        for match in SECTION_PATTERN.finditer(self._trailing):
+            boundary = match.start()
+        if boundary > 0:
+            self._render(self._trailing[:boundary])
+            self._placeholder = None
+            self._trailing = self._trailing[boundary:]
+
+        self._render(self._trailing)
+
+    def close(self):
+        """
+        Flush whatever is left
+
+        Returns:
+            str: The full streamed text
+        """
+        self.flush()
+        return self.text
+
+    def _render(self, markdown):
+        if self._placeholder is None:
+            self._placeholder = self._container.empty()
+        self._placeholder.markdown(markdown, unsafe_allow_html=True)
+        self.render_count += 1
+        self.rendered_chars += len(markdown)
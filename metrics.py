@@ -0,0 +1,405 @@
+"""
+Lightweight latency tracing and metrics
+
+Every external call (FindAll ingest/run/poll, OpenRouter streams, Sheets
+writes) is wrapped in a span. A finished span is recorded in a per-stage
+histogram and queued for a local JSONL trace file, which a background
+thread appends to in batches so spans never wait on disk. Histograms keep fixed
+Prometheus buckets for export plus a bounded window of recent samples for
+the p50/p95 shown in the Metrics tab.
+
+Set METRICS_PORT to also serve the Prometheus text format over HTTP. It
+binds to loopback; set METRICS_HOST=0.0.0.0 to let a remote Prometheus
+scrape it:
+    METRICS_PORT=9464 streamlit run streamlit_app.py
+    curl http://127.0.0.1:9464/metrics
+"""
+import bisect
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from local_db import DATA_DIR
+
+# Configuration
+TRACE_FILE = os.path.join(DATA_DIR, "traces.jsonl")
+TRACE_MAX_BYTES = 20 * 1024 * 1024
+TRACE_BATCH_SIZE = 500
+SAMPLE_WINDOW = 1000
+METRIC_PREFIX = "thesis_search"
+DEFAULT_METRICS_HOST = "127.0.0.1"
+# Seconds; FindAll runs take minutes, API calls and Sheets writes take milliseconds to seconds
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RATE_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 400)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Histogram:
+    """Cumulative bucket counts plus a window of recent samples"""
+
+    def __init__(self, buckets=DURATION_BUCKETS, window=SAMPLE_WINDOW):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.bucket_counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def summary(self):
+        samples = sorted(self.samples)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": _percentile(samples, 0.5),
+            "p95": _percentile(samples, 0.95),
+            "max": samples[-1] if samples else None,
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe histograms and counters keyed by name and labels
+
+    Trace records are only queued by the caller. A single writer thread,
+    started on the first record, owns the trace file and appends whatever
+    has queued up in one write, so lines from concurrent spans never
+    interleave and neither the registry lock nor the event loop is ever
+    held up by file I/O.
+    """
+
+    def __init__(self, trace_file=TRACE_FILE, trace_max_bytes=TRACE_MAX_BYTES, trace_batch_size=TRACE_BATCH_SIZE):
+        self._trace_file = trace_file
+        self._trace_max_bytes = trace_max_bytes
+        self._trace_batch_size = trace_batch_size
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._trace_queue = queue.Queue()
+        self._trace_writer = None
+        self._trace_writer_lock = threading.Lock()
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        """
+        Record a value in a histogram
+
+        Args:
+            name (str): Metric name, e.g. "findall.ingest"
+            value (float): Observed value (seconds for durations)
+            buckets (tuple): Bucket upper bounds, used when the histogram is first created
+            **labels: Label values, e.g. status="ok"
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        """
+        Increase a counter
+
+        Args:
+            name (str): Metric name, e.g. "thesis_cache.hits"
+            amount (float): Amount to add
+            **labels: Label values
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def trace(self, record):
+        """
+        Queue a record for the JSONL trace file
+
+        Args:
+            record (dict): JSON-serializable trace record
+        """
+        if not self._trace_file:
+            return
+        if self._trace_writer is None:
+            with self._trace_writer_lock:
+                if self._trace_writer is None:
+                    self._trace_writer = threading.Thread(target=self._write_traces, name="trace-writer", daemon=True)
+                    self._trace_writer.start()
+        self._trace_queue.put(json.dumps(record, default=str) + "\n")
+
+    def flush(self):
+        """Wait until every queued trace record has been written"""
+        if self._trace_writer is not None:
+            self._trace_queue.join()
+
+    def _write_traces(self):
+        while True:
+            lines = [self._trace_queue.get()]
+            while len(lines) < self._trace_batch_size:
+                try:
+                    lines.append(self._trace_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._append_traces(lines)
+            finally:
+                for _ in lines:
+                    self._trace_queue.task_done()
+
+    def _append_traces(self, lines):
+        """Append lines to the trace file, rotating it once it gets too big"""
+        try:
+            directory = os.path.dirname(self._trace_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self._trace_file) and os.path.getsize(self._trace_file) > self._trace_max_bytes:
+                os.replace(self._trace_file, f"{self._trace_file}.1")
+            with open(self._trace_file, "a", encoding="utf-8") as f:
+                f.write("".join(lines))
+        except OSError:
+            # Tracing must never break the call being traced
+            pass
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Time a block, recording it in the name's histogram and the trace file
+
+        The histogram gets a status label of "ok" or "error"; the trace
+        record also carries any attributes set on the yielded dict.
+
+        Args:
+            name (str): Stage name, e.g. "findall.poll"
+            **labels: Label values for the histogram
+
+        Yields:
+            dict: Extra attributes to add to the trace record
+        """
+        attributes = {}
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            yield attributes
+        except GeneratorExit:
+            # A stream abandoned by its consumer
+            status = "cancelled"
+            raise
+        except BaseException as e:
+            status = "error"
+            attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe(name, seconds, status=status, **labels)
+            self.trace({
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "span": name,
+                "seconds": round(seconds, 6),
+                "status": status,
+                **labels,
+                **attributes,
+            })
+
+    def summary(self):
+        """
+        Summarize every histogram for display
+
+        Returns:
+            list: Dicts with name, labels, count, mean, p50, p95 and max, sorted by name
+        """
+        with self._lock:
+            rows = [
+                {"name": name, "labels": dict(labels), **histogram.summary()}
+                for (name, labels), histogram in self._histograms.items()
+            ]
+        return sorted(rows, key=lambda row: (row["name"], sorted(row["labels"].items())))
+
+    def counters(self):
+        """
+        Returns:
+            list: Dicts with name, labels and value, sorted by name
+        """
+        with self._lock:
+            rows = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()]
+        return sorted(rows, key=lambda row: (row["name"], sorted(row["labels"].items())))
+
+    def render_prometheus(self):
+        """
+        Render every histogram and counter in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            histograms = {
+                key: (histogram.buckets, list(histogram.bucket_counts), histogram.count, histogram.total)
+                for key, histogram in self._histograms.items()
+            }
+            counters = dict(self._counters)
+
+        lines = []
+        for name in sorted({name for name, _ in histograms}):
+            metric = _metric_name(name)
+            lines.append(f"# TYPE {metric} histogram")
+            for (key_name, labels), (buckets, bucket_counts, count, total) in sorted(histograms.items()):
+                if key_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{metric}_bucket{_labels(labels, le=_format_value(bound))} {cumulative}")
+                lines.append(f"{metric}_bucket{_labels(labels, le='+Inf')} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {_format_value(total)}")
+                lines.append(f"{metric}_count{_labels(labels)} {count}")
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (key_name, labels), value in sorted(counters.items()):
+                if key_name == name:
+                    lines.append(f"{metric}{_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name):
+    return f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """
+    Get the process-wide metrics registry
+
+    Returns:
+        MetricsRegistry: Shared registry
+    """
+    return _registry
+
+
+def span(name, **labels):
+    """Time a block in the shared registry; see MetricsRegistry.span"""
+    return _registry.span(name, **labels)
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    """Record a value in the shared registry; see MetricsRegistry.observe"""
+    _registry.observe(name, value, buckets, **labels)
+
+
+def increment(name, amount=1, **labels):
+    """Increase a counter in the shared registry; see MetricsRegistry.increment"""
+    _registry.increment(name, amount, **labels)
+
+
+def timed_stream(deltas, name, **labels):
+    """
+    Pass a stream of text deltas through, recording LLM stream timings
+
+    Records time to first token as "<name>.ttft", the whole stream as a
+    "<name>" span, and throughput as "<name>.tokens_per_second", counting
+    each streamed delta as one token.
+
+    Args:
+        deltas (iterator): Text deltas
+        name (str): Stage name, e.g. "openrouter.stream"
+        **labels: Label values
+
+    Yields:
+        str: The same text deltas
+    """
+    tokens = 0
+    first_token_at = None
+    with span(name, **labels) as attributes:
+        started = time.perf_counter()
+        for delta in deltas:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                observe(f"{name}.ttft", first_token_at - started, **labels)
+            tokens += 1
+            yield delta
+        attributes["tokens"] = tokens
+        if first_token_at is not None and tokens > 1:
+            generation_seconds = time.perf_counter() - first_token_at
+            if generation_seconds > 0:
+                rate = (tokens - 1) / generation_seconds
+                attributes["tokens_per_second"] = round(rate, 1)
+                observe(f"{name}.tokens_per_second", rate, RATE_BUCKETS, **labels)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = _registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host=None):
+    """
+    Serve /metrics in the Prometheus text format on a background thread, once per process
+
+    Args:
+        port (int): Port to bind; defaults to the METRICS_PORT environment variable
+        host (str): Interface to bind; defaults to the METRICS_HOST environment variable, or loopback
+
+    Returns:
+        ThreadingHTTPServer: Running server, or None if no port is configured
+    """
+    global _metrics_server
+    port = port or os.environ.get("METRICS_PORT")
+    if not port:
+        return None
+    host = host or os.environ.get("METRICS_HOST", DEFAULT_METRICS_HOST)
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            _metrics_server.daemon_threads = True
+            thread = threading.Thread(target=_metrics_server.serve_forever, name="metrics-server", daemon=True)
+            thread.start()
+        return _metrics_server
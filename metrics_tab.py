@@ -0,0 +1,86 @@
+"""
+Metrics tab: per-stage latency percentiles and metrics export
+"""
+import os
+
+import pandas as pd
+import streamlit as st
+
+from metrics import SAMPLE_WINDOW, TRACE_FILE, get_registry
+
+
+def _format_labels(labels):
+    return ", ".join(f"{key}={value}" for key, value in labels.items())
+
+
+def build_stage_table(summary):
+    """
+    Build the per-stage latency table
+
+    Args:
+        summary (list): Rows from MetricsRegistry.summary()
+
+    Returns:
+        pd.DataFrame: One row per stage and label set; durations in milliseconds
+    """
+    rows = []
+    for row in summary:
+        # Rates and counts are observed as plain values, durations in seconds
+        is_duration = not row["name"].endswith((".tokens_per_second", ".polls_per_run", ".index_batch_size"))
+        scale = 1000 if is_duration else 1
+        rows.append({
+            "Stage": row["name"],
+            "Labels": _format_labels(row["labels"]),
+            "Unit": "ms" if is_duration else "value",
+            "Count": row["count"],
+            "p50": round(row["p50"] * scale, 1) if row["p50"] is not None else None,
+            "p95": round(row["p95"] * scale, 1) if row["p95"] is not None else None,
+            "Mean": round(row["mean"] * scale, 1) if row["mean"] is not None else None,
+            "Max": round(row["max"] * scale, 1) if row["max"] is not None else None,
+        })
+    return pd.DataFrame(rows, columns=["Stage", "Labels", "Unit", "Count", "p50", "p95", "Mean", "Max"])
+
+
+def render_metrics_tab():
+    """
+    Render the Metrics tab UI
+    """
+    st.header("Metrics")
+    st.caption(f"Latency per stage since the app started. Percentiles cover the last {SAMPLE_WINDOW} samples of each stage.")
+
+    registry = get_registry()
+    if st.button("🔄 Refresh", key="refresh_metrics"):
+        st.rerun()
+
+    stage_df = build_stage_table(registry.summary())
+    if stage_df.empty:
+        st.info("No calls recorded yet. Run an extraction or a search to collect metrics.")
+    else:
+        st.dataframe(stage_df, use_container_width=True, hide_index=True)
+
+    counters = registry.counters()
+    if counters:
+        st.subheader("Counters")
+        st.dataframe(
+            pd.DataFrame([
+                {"Counter": row["name"], "Labels": _format_labels(row["labels"]), "Value": row["value"]}
+                for row in counters
+            ]),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "📥 Prometheus metrics",
+            data=registry.render_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain"
+        )
+    with col2:
+        registry.flush()
+        if os.path.exists(TRACE_FILE):
+            with open(TRACE_FILE, "rb") as f:
+                st.download_button("📥 Trace file (JSONL)", data=f.read(), file_name="traces.jsonl",
+                                   mime="application/x-ndjson")
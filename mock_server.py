@@ -0,0 +1,395 @@
+"""
+Local stand-in for the Parallel.ai FindAll and OpenRouter APIs, and the Sheets connection
+
+Serves the FindAll ingest/runs endpoints and an OpenAI-compatible streaming
+chat completions endpoint with synthetic payloads and configurable latency,
+so the app and the async engine can be exercised without network access.
+Given a fixture recorded from the live APIs (benchmarks/fixtures.py shows
+how to record one), the recorded spec, results and token stream are
+replayed instead.
+MockGSheetsConnection is an in-memory stand-in for the Google Sheets
+connection with the same read/create/update calls.
+
+Run standalone and point the app at it:
+    python mock_server.py --port 8787
+    python mock_server.py --port 8787 --fixture /tmp/recorded.json
+    PARALLEL_BASE_URL=http://127.0.0.1:8787 OPENROUTER_BASE_URL=http://127.0.0.1:8787/api/v1 streamlit run streamlit_app.py
+"""
+import argparse
+import copy
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+from gspread.exceptions import WorksheetNotFound
+
+# Configuration
+DEFAULT_RUN_DURATION = 5.0
+DEFAULT_ENRICHMENT_TAIL = 1.0
+DEFAULT_LATENCY = 0.02
+DEFAULT_TOKEN_DELAY = 0.005
+
+MOCK_COLUMNS = [
+    {"name": "funding_stage_check", "type": "constraint", "description": "Company is seed or pre-seed"},
+    {"name": "founded_after_2020_check", "type": "constraint", "description": "Company was founded after 2020"},
+    {"name": "total_funding_evidence", "type": "enrichment", "description": "Total funding raised"},
+    {"name": "headquarters_location", "type": "enrichment", "description": "Headquarters location"},
+]
+
+MOCK_THESIS_RESPONSE = """#### Thesis 1: Climate risk is being repriced faster than insurance markets can adapt
+1. Carriers are withdrawing from exposed regions, leaving state-backed insurers of last resort.
+2. Better hazard data and parametric products can restore coverage where traditional underwriting fails.
+
+**Search Queries:**
+1. Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, that are building parametric or data-driven insurance for climate-exposed property and infrastructure
+2. Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, that provide climate hazard data to insurers and municipalities
+
+#### Thesis 2: Materials discovery is shifting from simulation to high-throughput experimentation
+1. In-silico screening alone has not produced materials that survive scale-up.
+2. Companies that own proprietary experimental datasets can sell discoveries rather than services.
+
+**Search Queries:**
+1. Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, that combine high-throughput synthesis with machine learning to discover energy transition materials
+"""
+
+# The same theses as returned in structured mode (response_format set)
+MOCK_THESIS_JSON = json.dumps({"theses": [
+    {
+        "thesis": "Climate risk is being repriced faster than insurance markets can adapt",
+        "insights": [
+            "Carriers are withdrawing from exposed regions, leaving state-backed insurers of last resort.",
+            "Better hazard data and parametric products can restore coverage where traditional underwriting fails.",
+        ],
+        "queries": [
+            "Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, that are building parametric or data-driven insurance for climate-exposed property and infrastructure",
+            "Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, that provide climate hazard data to insurers and municipalities",
+        ],
+    },
+    {
+        "thesis": "Materials discovery is shifting from simulation to high-throughput experimentation",
+        "insights": [
+            "In-silico screening alone has not produced materials that survive scale-up.",
+            "Companies that own proprietary experimental datasets can sell discoveries rather than services.",
+        ],
+        "queries": [
+            "Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, that combine high-throughput synthesis with machine learning to discover energy transition materials",
+        ],
+    },
+]}, indent=2)
+
+
+def synthetic_entity(index, columns=MOCK_COLUMNS, rng=random):
+    """
+    Build one FindAll result entity shaped like the real API payload
+
+    Args:
+        index (int): Entity number, used to make names and URLs unique
+        columns (list): Column definitions to generate enrichment/filter results for
+        rng (random.Random): Random source
+
+    Returns:
+        dict: Entity with name, url, score, description, enrichment_results and filter_results
+    """
+    name = f"Mock Company {index}"
+    return {
+        "name": name,
+        "url": f"https://mock-company-{index}.example.com",
+        "score": round(rng.random(), 3),
+        "description": f"{name} builds climate adaptation software for asset owners.",
+        "enrichment_results": [
+            {"key": column["name"], "value": f"{column['name']} value {index}"}
+            for column in columns if column.get("type") == "enrichment"
+        ],
+        "filter_results": [
+            {"key": column["name"], "value": rng.choice(["yes", "no"]), "reasoning": f"Evidence for {name}."}
+            for column in columns if column.get("type") == "constraint"
+        ],
+    }
+
+
+def synthetic_entities(count, columns=MOCK_COLUMNS, seed=0):
+    """
+    Build a deterministic list of synthetic FindAll result entities
+
+    Args:
+        count (int): Number of entities
+        columns (list): Column definitions
+        seed (int): Random seed
+
+    Returns:
+        list: Entities
+    """
+    rng = random.Random(seed)
+    return [synthetic_entity(i, columns, rng) for i in range(count)]
+
+
+class MockServer(ThreadingHTTPServer):
+    """HTTP server holding the simulated runs and latency settings"""
+
+    daemon_threads = True
+
+    def __init__(self, address, run_duration=DEFAULT_RUN_DURATION, enrichment_tail=DEFAULT_ENRICHMENT_TAIL,
+                 latency=DEFAULT_LATENCY, token_delay=DEFAULT_TOKEN_DELAY, thesis_response=MOCK_THESIS_RESPONSE,
+                 fixture=None):
+        super().__init__(address, MockRequestHandler)
+        self.run_duration = run_duration
+        self.enrichment_tail = enrichment_tail
+        self.latency = latency
+        self.token_delay = token_delay
+        self.thesis_response = thesis_response
+        self.fixture = fixture or {}
+        self.runs = {}
+        self.request_counts = {}
+        self._run_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        """Base URL to use in place of the Parallel.ai API"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openrouter_base_url(self):
+        """Base URL to use in place of the OpenRouter API"""
+        return f"{self.base_url}/api/v1"
+
+    def findall_spec(self, query):
+        """The recorded spec, or a synthetic one with the mock columns"""
+        return self.fixture.get("findall_spec") or {"query": query, "columns": MOCK_COLUMNS}
+
+    def thesis_deltas(self, structured):
+        """The recorded token stream, or the canned response split into 4-character tokens"""
+        recorded = self.fixture.get("thesis_json_deltas" if structured else "thesis_deltas")
+        if recorded:
+            return recorded
+        text = MOCK_THESIS_JSON if structured else self.thesis_response
+        return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+    def count_request(self, endpoint):
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+    def create_run(self, findall_spec, result_limit):
+        with self._lock:
+            findall_id = f"findall_mock_{next(self._run_ids)}"
+            self.runs[findall_id] = {
+                "started_at": time.monotonic(),
+                "columns": findall_spec.get("columns", MOCK_COLUMNS),
+                "result_limit": result_limit,
+            }
+        return findall_id
+
+    def run_state(self, findall_id):
+        run = self.runs.get(findall_id)
+        if run is None:
+            return None
+
+        elapsed = time.monotonic() - run["started_at"]
+        is_active = elapsed < self.run_duration
+        are_enrichments_active = elapsed < self.run_duration + self.enrichment_tail
+        recorded = self.fixture.get("results")
+        result_limit = min(run["result_limit"], len(recorded)) if recorded else run["result_limit"]
+        # Entities are discovered gradually over the run, like the real API
+        found = result_limit if not is_active else int(result_limit * elapsed / self.run_duration)
+        if recorded:
+            results = copy.deepcopy(recorded[:found])
+        else:
+            results = synthetic_entities(found, run["columns"], seed=sum(map(ord, findall_id)))
+        # Each entity's enrichments complete enrichment_tail seconds after it is found
+        for index, entity in enumerate(results):
+            if elapsed < index * self.run_duration / result_limit + self.enrichment_tail:
+                entity["enrichment_results"] = []
+        return {
+            "findall_id": findall_id,
+            "is_active": is_active,
+            "are_enrichments_active": are_enrichments_active,
+            "results": results,
+        }
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Routes requests to the simulated FindAll and chat completion endpoints"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path == "/v1beta/findall/ingest":
+            self.server.count_request("ingest")
+            self._send_json(200, self.server.findall_spec(body.get("query", "")))
+        elif self.path == "/v1beta/findall/runs":
+            self.server.count_request("runs")
+            findall_id = self.server.create_run(body.get("findall_spec", {}), body.get("result_limit", 10))
+            self._send_json(200, {"findall_id": findall_id})
+        elif self.path == "/api/v1/chat/completions":
+            self.server.count_request("chat")
+            self._stream_chat_completion(body)
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        prefix = "/v1beta/findall/runs/"
+        if self.path.startswith(prefix):
+            self.server.count_request("poll")
+            state = self.server.run_state(self.path[len(prefix):])
+            if state is None:
+                self._send_json(404, {"error": "Run not found"})
+            else:
+                self._send_json(200, state)
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_chat_completion(self, body):
+        """Replay the thesis response (JSON in structured mode) as OpenAI-style server-sent events"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        for token in self.server.thesis_deltas(structured=bool(body.get("response_format"))):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.server.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class MockQuotaError(Exception):
+    """Quota error shaped like gspread's APIError, with the HTTP response attached"""
+
+    def __init__(self):
+        super().__init__("APIError: [429]: Quota exceeded for quota metric 'Write requests'")
+        self.response = SimpleNamespace(status_code=429)
+
+
+class MockGSheetsConnection:
+    """
+    In-memory stand-in for the Google Sheets connection
+
+    Worksheets are kept as DataFrames. Every call sleeps for latency seconds,
+    and a fraction of calls can fail with a quota error to exercise retries.
+    """
+
+    def __init__(self, latency=DEFAULT_LATENCY, quota_error_rate=0.0, seed=0):
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.worksheets = {}
+        self.call_counts = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def read(self, worksheet=None, ttl=None, **kwargs):
+        self._call("read")
+        with self._lock:
+            if worksheet not in self.worksheets:
+                raise WorksheetNotFound(worksheet)
+            return self.worksheets[worksheet].copy()
+
+    def create(self, worksheet=None, data=None, **kwargs):
+        self._call("create")
+        with self._lock:
+            if worksheet in self.worksheets:
+                raise ValueError(f"Worksheet {worksheet} already exists")
+            self.worksheets[worksheet] = data.copy()
+        return data
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        self._call("update")
+        with self._lock:
+            if worksheet not in self.worksheets:
+                raise WorksheetNotFound(worksheet)
+            self.worksheets[worksheet] = data.copy()
+        return data
+
+    def _call(self, method):
+        time.sleep(self.latency)
+        with self._lock:
+            self.call_counts[method] = self.call_counts.get(method, 0) + 1
+            if self._rng.random() < self.quota_error_rate:
+                raise MockQuotaError()
+
+
+def load_fixture(path):
+    """
+    Load a recorded API fixture
+
+    Args:
+        path (str): JSON file written by benchmarks/fixtures.py
+
+    Returns:
+        dict: Fixture with findall_spec, results, thesis_deltas and thesis_json_deltas (any may be missing)
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def start_mock_server(host="127.0.0.1", port=0, **settings):
+    """
+    Start the mock server on a background thread
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind; 0 picks a free port
+        **settings: MockServer latency settings (run_duration, enrichment_tail, latency, token_delay)
+            and an optional recorded fixture
+
+    Returns:
+        MockServer: Running server; call shutdown() to stop it
+    """
+    server = MockServer((host, port), **settings)
+    thread = threading.Thread(target=server.serve_forever, name="mock-server", daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock FindAll and OpenRouter endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--run-duration", type=float, default=DEFAULT_RUN_DURATION)
+    parser.add_argument("--enrichment-tail", type=float, default=DEFAULT_ENRICHMENT_TAIL)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY)
+    parser.add_argument("--token-delay", type=float, default=DEFAULT_TOKEN_DELAY)
+    parser.add_argument("--fixture", help="recorded API fixture to replay instead of synthetic payloads")
+    args = parser.parse_args()
+
+    server = MockServer(
+        (args.host, args.port),
+        run_duration=args.run_duration,
+        enrichment_tail=args.enrichment_tail,
+        latency=args.latency,
+        token_delay=args.token_delay,
+        fixture=load_fixture(args.fixture) if args.fixture else None,
+    )
+    print(f"Mock Parallel API: {server.base_url}")
+    print(f"Mock OpenRouter API: {server.openrouter_base_url}")
+    server.serve_forever()
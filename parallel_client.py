@@ -0,0 +1,192 @@
+"""
+Shared HTTP client for the Parallel.ai API
+
+Every FindAll call goes through one pooled requests.Session, so polls reuse
+keep-alive connections instead of paying a TCP+TLS handshake each time.
+Requests get timeouts, idempotent calls are retried with jittered
+exponential backoff, and 429 responses pause the whole client for the
+server's Retry-After before anyone tries again.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Configuration
+PARALLEL_BASE_URL = os.environ.get("PARALLEL_BASE_URL", "https://api.parallel.ai")
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+POOL_SIZE = 32
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date
+
+    Args:
+        value (str): Header value
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _never_sent(error):
+    """Check whether a request failed before a connection was established"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class ParallelClient:
+    """
+    Pooled, retrying HTTP client used for every Parallel.ai API call
+
+    GET requests are retried on connection errors, timeouts and 5xx/429
+    responses. Non-idempotent requests (like starting a run) are only retried
+    when the server could not have acted on them: on connection failures and
+    on 429 responses.
+    """
+
+    def __init__(self, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_cap=BACKOFF_CAP, pool_size=POOL_SIZE):
+        self._timeout = timeout
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._rate_limited_until = 0.0
+        self._lock = threading.Lock()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def get(self, url, api_key, **kwargs):
+        """
+        Send a GET request, retrying transient failures
+
+        Args:
+            url (str): Full request URL
+            api_key (str): Parallel.ai API key
+
+        Returns:
+            requests.Response: Successful response
+        """
+        return self.request("GET", url, api_key, idempotent=True, **kwargs)
+
+    def post(self, url, api_key, idempotent=False, **kwargs):
+        """
+        Send a POST request
+
+        Args:
+            url (str): Full request URL
+            api_key (str): Parallel.ai API key
+            idempotent (bool): Whether it is safe to retry after a server error
+
+        Returns:
+            requests.Response: Successful response
+        """
+        return self.request("POST", url, api_key, idempotent=idempotent, **kwargs)
+
+    def request(self, method, url, api_key, idempotent=False, **kwargs):
+        """
+        Send a request with timeouts, retries and rate-limit handling
+
+        Args:
+            method (str): HTTP method
+            url (str): Full request URL
+            api_key (str): Parallel.ai API key
+            idempotent (bool): Whether it is safe to retry after a server error
+
+        Returns:
+            requests.Response: Successful response
+
+        Raises:
+            requests.exceptions.RequestException: Once retries are exhausted
+        """
+        headers = {"x-api-key": api_key, **kwargs.pop("headers", {})}
+        kwargs.setdefault("timeout", self._timeout)
+
+        attempt = 0
+        while True:
+            self._wait_for_rate_limit()
+            try:
+                response = self._session.request(method, url, headers=headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # Only resend non-idempotent requests if they never reached the server
+                if (not idempotent and not _never_sent(e)) or attempt >= self._max_retries:
+                    raise
+            else:
+                retryable = response.status_code == 429 or (
+                    idempotent and response.status_code in RETRY_STATUS_CODES
+                )
+                if not retryable or attempt >= self._max_retries:
+                    response.raise_for_status()
+                    return response
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    self._pause(retry_after if retry_after is not None else self._backoff(attempt))
+                    attempt += 1
+                    continue
+                if retry_after is not None:
+                    time.sleep(min(retry_after, self._backoff_cap))
+                    attempt += 1
+                    continue
+
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def _backoff(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self._backoff_cap, self._backoff_base * (2 ** attempt)))
+
+    def _pause(self, seconds):
+        """Hold every request on this client until the rate limit window passes"""
+        with self._lock:
+            self._rate_limited_until = max(self._rate_limited_until, time.monotonic() + seconds)
+
+    def _wait_for_rate_limit(self):
+        with self._lock:
+            delay = self._rate_limited_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_parallel_client():
+    """
+    Get the process-wide Parallel.ai client, shared by the UI and background workers
+
+    Returns:
+        ParallelClient: Shared client
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ParallelClient()
+        return _client
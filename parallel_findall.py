@@ -2,144 +2,216 @@
 Parallel FindAll functionality using Parallel.ai FindAll API
 """
 import streamlit as st
+import functools
+import hashlib
+import json
+import math
+import queue
 import requests
-import time
-import pandas as pd
 from datetime import datetime
-from streamlit_gsheets import GSheetsConnection
+from entity_index import companies_for_query, merge_run
+from findall_jobs import FindAllOrchestrator
+from gsheets_history import load_search_history
+from history_store import LocalHistoryStore, backfill_indexes, get_history_store, save_search
+from results_frame import create_results_dataframe
+from poll_scheduler import PollScheduler, is_run_finished
+from results_stream import ResultsAccumulator
+from query_dedup import QUERY_FRESHNESS_DAYS, find_prior_run
+from results_export import EXPORT_FORMATS, export_file_name, export_to_file
+from spec_cache import (get_cached_spec, get_spec_entry, is_spec_pinned, list_pinned_specs, pin_spec, spec_key,
+                        store_spec, update_spec)
+from search_index import SEARCH_MODES, index_run, search, semantic_search_available, sync_transcripts
+from parallel_client import PARALLEL_BASE_URL, get_parallel_client
+from metrics import span
+
+
+def get_parallel_api_key():
+    """
+    Get the Parallel.ai API key from secrets
+
+    Returns:
+        str: API key or None if it is not configured
+    """
+    try:
+        return st.secrets["parallel_api_key"]
+    except (KeyError, AttributeError, FileNotFoundError):
+        return None
 
-# Configuration
-PARALLEL_BASE_URL = "https://api.parallel.ai"
 
+def ingest_findall_query(query, parallel_api_key):
+    """
+    Turn a natural language query into a FindAll spec
+
+    Args:
+        query (str): Search query
+        parallel_api_key (str): Parallel.ai API key
 
-# Note: Parallel.ai API does not provide an endpoint to list previous runs
-# We use Google Sheets to store search history for future reference
+    Returns:
+        dict: FindAll spec with the generated columns
+    """
+    # Ingest only turns the query into a spec, so it is safe to retry
+    with span("findall.ingest"):
+        response = get_parallel_client().post(
+            f"{PARALLEL_BASE_URL}/v1beta/findall/ingest",
+            parallel_api_key,
+            idempotent=True,
+            json={"query": query}
+        )
+        return response.json()
 
 
-def save_search_to_gsheets(query, run_id, results, columns, timestamp):
+def get_findall_spec(query, parallel_api_key):
     """
-    Save search results to Google Sheets using run_id as worksheet name
+    Get the FindAll spec for a query, ingesting it only if it isn't cached
 
     Args:
         query (str): Search query
-        run_id (str): FindAll run ID (will be used as worksheet name)
-        results (list): FindAll results
-        columns (list): Column definitions
-        timestamp (str): Search timestamp
+        parallel_api_key (str): Parallel.ai API key
+
+    Returns:
+        dict: FindAll spec with the generated columns
     """
-    try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
+    findall_spec = get_cached_spec(query)
+    if findall_spec is None:
+        findall_spec = ingest_findall_query(query, parallel_api_key)
+        store_spec(query, findall_spec)
+    return findall_spec
+
+
+def describe_spec_source(query, findall_spec):
+    """
+    Describe a search's spec for the search log if it is one the user pinned or edited
 
-        # Use readable date/time as worksheet name
-        worksheet_name = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    Args:
+        query (str): Search query
+        findall_spec (dict): Spec the search ran with
 
-        # Create results dataframe
-        df = create_results_dataframe(results, columns)
+    Returns:
+        str: Message to show, or None for a freshly ingested or ordinary cached spec
+    """
+    entry = get_spec_entry(query)
+    if entry is None or not entry["pinned"] or entry["spec"] != findall_spec:
+        return None
+    if entry["edited"]:
+        return "✏️ Using your edited spec for this query"
+    return "📌 Using your pinned spec for this query"
 
-        # Create a metadata row as the first row
-        metadata_row = pd.DataFrame([{
-            'Name': f'SEARCH QUERY: {query}',
-            'Score': '',
-            'URL': f'Run ID: {run_id}',
-            'Description': f'Search executed on {timestamp}',
-            **{col: '' for col in df.columns if col not in ['Name', 'Score', 'URL', 'Description']}
-        }])
 
-        # Combine metadata row with results
-        df = pd.concat([metadata_row, df], ignore_index=True)
+FINDALL_PROCESSORS = ["base", "pro"]
 
-        # Save to new worksheet
-        conn.create(worksheet=worksheet_name, data=df)
 
-        # Also update the main index sheet
-        update_search_index(query, run_id, len(results), timestamp, worksheet_name)
+def start_findall_run(findall_spec, result_limit, parallel_api_key, processor="base"):
+    """
+    Start a FindAll run for an ingested spec
 
-        return True
+    Args:
+        findall_spec (dict): Spec returned by the ingest endpoint
+        result_limit (int): Maximum number of results to return
+        parallel_api_key (str): Parallel.ai API key
+        processor (str): FindAll processor to use
 
-    except Exception as e:
-        st.error(f"Could not save to Google Sheets: {e}")
-        return False
+    Returns:
+        str: FindAll run ID
+    """
+    with span("findall.start_run", processor=processor):
+        response = get_parallel_client().post(
+            f"{PARALLEL_BASE_URL}/v1beta/findall/runs",
+            parallel_api_key,
+            json={
+                "findall_spec": findall_spec,
+                "processor": processor,
+                "result_limit": result_limit
+            }
+        )
+        return response.json()["findall_id"]
 
 
-def update_search_index(query, run_id, result_count, timestamp, worksheet_name):
+def fetch_findall_run(findall_id, parallel_api_key):
     """
-    Update the main search index worksheet
+    Fetch the current state of a FindAll run
 
     Args:
-        query (str): Search query
-        run_id (str): FindAll run ID
-        result_count (int): Number of results found
-        timestamp (str): Search timestamp
-        worksheet_name (str): Name of the worksheet containing the results
-    """
-    try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-
-        # Read existing index data
-        try:
-            df = conn.read(worksheet="Searches")
-        except Exception:
-            # Create new index structure if it doesn't exist
-            df = pd.DataFrame(columns=['Timestamp', 'Query', 'Run_ID', 'Result_Count', 'Worksheet'])
-
-        # Use the worksheet name passed from the main function
-        new_row = {
-            'Timestamp': timestamp,
-            'Query': query,
-            'Run_ID': run_id,
-            'Result_Count': result_count,
-            'Worksheet': worksheet_name
-        }
-
-        df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-
-        # Write back to index sheet
-        try:
-            # Try to update existing worksheet first
-            conn.update(worksheet="Searches", data=df)
-        except Exception:
-            # If update fails, create new worksheet
-            conn.create(worksheet="Searches", data=df)
-        return True
+        findall_id (str): FindAll run ID
+        parallel_api_key (str): Parallel.ai API key
 
-    except Exception as e:
-        st.warning(f"Could not update search index: {e}")
-        return False
+    Returns:
+        dict: Run data including is_active, are_enrichments_active and results
+    """
+    with span("findall.poll"):
+        response = get_parallel_client().get(
+            f"{PARALLEL_BASE_URL}/v1beta/findall/runs/{findall_id}",
+            parallel_api_key
+        )
+        return response.json()
 
 
-def load_search_history():
+@st.cache_resource
+def get_poll_scheduler():
     """
-    Load search history from Google Sheets Searches worksheet
+    Get the process-wide scheduler that polls every active FindAll run
 
     Returns:
-        pd.DataFrame: Search history or empty DataFrame if error
+        PollScheduler: Shared poll scheduler
     """
-    try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        df = conn.read(worksheet="Searches", ttl="1m")
-        return df.sort_values('Timestamp', ascending=False) if not df.empty else pd.DataFrame()
-    except Exception as e:
-        st.warning(f"Could not load search history: {e}")
-        return pd.DataFrame()
+    return PollScheduler()
 
 
-def load_search_results_from_worksheet(worksheet_name):
+def stream_findall_run(findall_id, parallel_api_key):
     """
-    Load specific search results from a worksheet
+    Follow a FindAll run poll by poll, through the shared scheduler
 
     Args:
-        worksheet_name (str): Name of the worksheet to load
+        findall_id (str): FindAll run ID
+        parallel_api_key (str): Parallel.ai API key
+
+    Yields:
+        tuple: (run, delta) after every poll, where delta holds the "new" and
+            "updated" entities since the previous poll; the last run is final
+
+    Raises:
+        Exception: The last polling error if the run could not be polled
+    """
+    updates = queue.Queue()
+    watching = get_poll_scheduler().watch(
+        findall_id,
+        fetch=lambda: fetch_findall_run(findall_id, parallel_api_key),
+        on_done=lambda run: updates.put(("done", run)),
+        on_error=lambda error: updates.put(("error", error)),
+        on_progress=lambda run: updates.put(("progress", run)),
+    )
+    if not watching:
+        # Its callbacks belong to whoever is already polling it, so no update would ever arrive here
+        raise RuntimeError(f"FindAll run {findall_id} is already being polled")
+
+    accumulator = ResultsAccumulator()
+    while True:
+        kind, payload = updates.get()
+        if kind == "error":
+            raise payload
+        yield payload, accumulator.update(payload.get("results", []))
+        if kind == "done":
+            return
+
+
+@st.cache_resource
+def get_findall_orchestrator():
+    """
+    Get the process-wide background orchestrator for FindAll runs
+
+    Shared by every session, so searches keep running across script reruns
+    and browser reloads, and any unfinished jobs are resumed on startup.
 
     Returns:
-        pd.DataFrame: Search results or empty DataFrame if error
+        FindAllOrchestrator: Orchestrator wired to the FindAll API and the history store
     """
-    try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        df = conn.read(worksheet=worksheet_name, ttl="1m")
-        return df
-    except Exception as e:
-        st.error(f"Could not load results from worksheet {worksheet_name}: {e}")
-        return pd.DataFrame()
+    return FindAllOrchestrator(
+        ingest=get_findall_spec,
+        start_run=start_findall_run,
+        fetch_run=fetch_findall_run,
+        save=save_search,
+        get_api_key=get_parallel_api_key,
+        poller=get_poll_scheduler(),
+    )
 
 
 def get_findall_run_by_id(run_id):
@@ -152,19 +224,20 @@ def get_findall_run_by_id(run_id):
     Returns:
         dict: Run data with results or None if error
     """
-    try:
-        parallel_api_key = st.secrets["parallel_api_key"]
-    except (KeyError, AttributeError):
+    parallel_api_key = get_parallel_api_key()
+    if not parallel_api_key:
         return None
     
     try:
-        response = requests.get(
-            f"{PARALLEL_BASE_URL}/v1beta/findall/runs/{run_id}",
-            headers={"x-api-key": parallel_api_key}
-        )
-        response.raise_for_status()
-        
-        return response.json()
+        run = fetch_findall_run(run_id, parallel_api_key)
+        if is_run_finished(run) and run.get("results"):
+            # Fold runs looked up by ID into the cross-run entity index too
+            saved_run = get_history_store().get_run(run_id)
+            query = saved_run["query"] if saved_run else run.get("query", "")
+            timestamp = saved_run["timestamp"] if saved_run else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            merge_run(run_id, query, run["results"], timestamp)
+            index_run(run_id, query, run["results"])
+        return run
         
     except requests.exceptions.RequestException as e:
         st.error(f"API Error fetching run {run_id}: {e}")
@@ -174,21 +247,101 @@ def get_findall_run_by_id(run_id):
         return None
 
 
-def search_findall(query, result_limit=10):
+def get_query_freshness_days():
+    """
+    Get how long a prior run of the same query is reused instead of searching again
+
+    Returns:
+        float: Freshness window in days (query_freshness_days in secrets)
+    """
+    try:
+        return float(st.secrets.get("query_freshness_days", QUERY_FRESHNESS_DAYS))
+    except (AttributeError, FileNotFoundError):
+        return QUERY_FRESHNESS_DAYS
+
+
+def find_prior_search(query, history_df=None):
     """
-    Search using Parallel.ai FindAll API
+    Find a prior run of the same or a near-duplicate query in search history
+
+    Args:
+        query (str): Query about to be searched
+        history_df (pd.DataFrame): History index to check; defaults to the whole history
+
+    Returns:
+        dict: Prior run details from find_prior_run, or None
+    """
+    if history_df is None:
+        history_df = get_history_store().list_runs()
+    return find_prior_run(query, history_df, get_query_freshness_days())
+
+
+def describe_prior_run(prior):
+    """
+    Describe a prior run for display
+
+    Args:
+        prior (dict): Prior run details from find_prior_search
+
+    Returns:
+        str: e.g. "an identical search from 3 days ago (10 results)"
+    """
+    match = "an identical search" if prior["exact"] else f"a {prior['similarity']:.0%} similar search"
+    age_days = prior["age_days"]
+    if age_days is None:
+        when = f"on {prior['timestamp']}"
+    elif age_days < 1:
+        when = "from today"
+    else:
+        when = f"from {age_days:.0f} days ago"
+    return f"{match} {when} ({prior['result_count']} results)"
+
+
+def load_prior_run_results(prior):
+    """
+    Load a prior run's results for display, from the history store or else the FindAll API
+
+    Args:
+        prior (dict): Prior run details from find_prior_search
+
+    Returns:
+        pd.DataFrame: Results or empty DataFrame if they couldn't be loaded
+    """
+    run_id = prior["run_id"]
+    display_df = load_history_results(run_id, prior["worksheet"] or run_id[:31])
+    if display_df.empty:
+        run = get_findall_run_by_id(run_id)
+        if run and run.get("results"):
+            display_df = create_results_dataframe(run["results"], [])
+    return display_df
+
+
+def search_findall(query, result_limit=10, reuse_prior=True):
+    """
+    Search using Parallel.ai FindAll API, blocking until the run finishes
+
+    The app submits searches to the background orchestrator instead (see
+    get_findall_orchestrator); this remains for direct, synchronous use.
 
     Args:
         query (str): Search query
         result_limit (int): Maximum number of results to return
+        reuse_prior (bool): Return a fresh prior run of the same or a near-duplicate query instead of searching
 
     Returns:
         tuple: (results, columns, run_id) or (None, None, None) if error
     """
+    if reuse_prior:
+        prior = find_prior_search(query)
+        if prior and prior["fresh"]:
+            run = get_history_store().get_run(prior["run_id"]) or get_findall_run_by_id(prior["run_id"])
+            if run and run.get("results"):
+                st.info(f"♻️ Reusing {describe_prior_run(prior)}")
+                return run["results"], run.get("columns", []), prior["run_id"]
+
     # Get API key from secrets
-    try:
-        parallel_api_key = st.secrets["parallel_api_key"]
-    except (KeyError, AttributeError):
+    parallel_api_key = get_parallel_api_key()
+    if not parallel_api_key:
         st.error("Parallel API key not found in secrets. Please configure parallel_api_key in .streamlit/secrets.toml")
         return None, None, None
 
@@ -202,55 +355,31 @@ def search_findall(query, result_limit=10):
             st.write("🔄 **Step 1:** Ingesting query...")
         progress_bar.progress(25)
 
-        ingest_response = requests.post(
-            f"{PARALLEL_BASE_URL}/v1beta/findall/ingest",
-            headers={"x-api-key": parallel_api_key},
-            json={"query": query}
-        )
-        ingest_response.raise_for_status()
-
-        findall_spec = ingest_response.json()
+        findall_spec = get_findall_spec(query, parallel_api_key)
 
         # Show detailed column information
         column_names = [col.get('name', 'Unknown') for col in findall_spec.get('columns', [])]
+        spec_source = describe_spec_source(query, findall_spec)
         with log_container:
+            if spec_source:
+                st.info(spec_source)
             st.write(f"🚀 **Step 2:** Starting FindAll run with {len(findall_spec['columns'])} columns: {', '.join(column_names)}")
         progress_bar.progress(50)
 
-        run_response = requests.post(
-            f"{PARALLEL_BASE_URL}/v1beta/findall/runs",
-            headers={"x-api-key": parallel_api_key},
-            json={
-                "findall_spec": findall_spec,
-                "processor": "base",
-                "result_limit": result_limit
-            }
-        )
-        run_response.raise_for_status()
-
-        findall_id = run_response.json()["findall_id"]
+        findall_id = start_findall_run(findall_spec, result_limit, parallel_api_key)
 
         with log_container:
             st.write(f"⏳ **Step 3:** Compiling company results for run id: `{findall_id}`")
-            st.info("🕒 This process typically takes 3-5 minutes as Parallel.ai gathers comprehensive company data. This tool was cobbled together, so unfortunately you will have to leave this page open to make sure search results get saved.")
         progress_bar.progress(75)
 
-        # Poll for results without additional spinner
-        polling_count = 0
-        while True:
-            poll_response = requests.get(
-                f"{PARALLEL_BASE_URL}/v1beta/findall/runs/{findall_id}",
-                headers={"x-api-key": parallel_api_key}
-            )
-            poll_response.raise_for_status()
-
-            result = poll_response.json()
-            polling_count += 1
-
-            if not result["is_active"] and not result["are_enrichments_active"]:
-                break
-
-            time.sleep(5)
+        # Show companies as they are found instead of waiting for the whole run
+        results_table = st.empty()
+        for result, delta in stream_findall_run(findall_id, parallel_api_key):
+            if delta["new"] or delta["updated"]:
+                found = len(result.get('results', []))
+                progress_bar.progress(min(99, 75 + 24 * found // max(result_limit, 1)), text=f"{found} companies found so far")
+                results_table.dataframe(create_results_dataframe(result['results'], findall_spec['columns']))
+        results_table.empty()
 
         progress_bar.progress(100)
         with log_container:
@@ -277,65 +406,359 @@ def search_findall(query, result_limit=10):
         return None, None, None
 
 
-def create_results_dataframe(results, columns):
+JOB_STATUS_LABELS = {
+    "queued": "🕒 Queued",
+    "ingesting": "🔄 Ingesting query",
+    "running": "⏳ Compiling company results",
+    "saving": "💾 Saving results",
+    "completed": "✅ Completed",
+    "failed": "❌ Failed",
+}
+
+
+def render_findall_job(job, expanded=False):
     """
-    Create a pandas DataFrame from search results
-    
+    Render the state of a single background FindAll job
+
     Args:
-        results (list): Search results from FindAll API
-        columns (list): Column definitions from FindAll API
-        
+        job (dict): Job state from the orchestrator
+        expanded (bool): Whether to expand the job details
+    """
+    label = JOB_STATUS_LABELS.get(job["status"], job["status"])
+    with st.expander(f"{label} · {job['query']}", expanded=expanded):
+        st.caption(f"Submitted {job['created_at']} · last update {job['updated_at']}")
+        if job["findall_spec"]:
+            spec_source = describe_spec_source(job["query"], job["findall_spec"])
+            if spec_source:
+                st.caption(spec_source)
+        if job["findall_id"]:
+            st.info(f"🔗 **Run ID for future reference**: `{job['findall_id']}`")
+
+        if job["status"] == "failed":
+            st.error(f"Search failed: {job['error']}")
+            if job["partial_results"]:
+                st.warning(f"Showing the {len(job['partial_results'])} companies found before the search failed")
+                st.dataframe(create_results_dataframe(job["partial_results"], job["columns"]), use_container_width=True)
+        elif job["status"] == "completed":
+            results = job["results"] or []
+            if not results:
+                st.info("Search completed but no results were returned.")
+                return
+
+            st.success(f"Found {len(results)} results")
+            if job["saved"]:
+                st.success("✅ Results saved to search history")
+            if job["findall_spec"] and not is_spec_pinned(job["query"]):
+                if st.button("📌 Pin this spec", key=f"pin_spec_{job['job_id']}",
+                             help="Keep this query's columns and conditions to edit or rerun later under New Search"):
+                    pin_spec(job["query"], job["findall_spec"])
+                    st.toast("📌 Spec pinned")
+
+            df = create_results_dataframe(results, job["columns"])
+            if not df.empty:
+                st.dataframe(df, use_container_width=True)
+            else:
+                st.warning("Results were found but DataFrame is empty. Check data structure.")
+                # Debug: Show raw results structure
+                with st.expander("🔍 Debug: Raw Results Structure"):
+                    st.json(results[:2] if len(results) > 2 else results)
+        else:
+            st.info("🕒 This process typically takes 3-5 minutes as Parallel.ai gathers comprehensive company data.")
+            if job["partial_results"]:
+                st.write(f"**{len(job['partial_results'])} companies found so far** (enrichments may still be filling in)")
+                st.dataframe(create_results_dataframe(job["partial_results"], job["columns"]), use_container_width=True)
+
+
+@st.fragment(run_every=5)
+def render_findall_jobs(job_ids=None, title="Recent Searches"):
+    """
+    Render background FindAll jobs, refreshing while the page is open
+
+    Only reads job state, so reruns never block on the FindAll API.
+
+    Args:
+        job_ids (list): Only show these jobs; defaults to the most recent jobs
+        title (str): Subheader shown above the jobs
+    """
+    orchestrator = get_findall_orchestrator()
+    focused_job_id = st.query_params.get("job")
+    if job_ids is not None:
+        jobs = orchestrator.list_jobs(limit=len(job_ids), job_ids=job_ids)
+    else:
+        jobs = orchestrator.list_jobs(limit=20)
+        if focused_job_id and all(job["job_id"] != focused_job_id for job in jobs):
+            focused_job = orchestrator.get_job(focused_job_id)
+            if focused_job:
+                jobs.insert(0, focused_job)
+
+    if not jobs:
+        return
+
+    st.subheader(title)
+    if job_ids is not None:
+        finished = sum(job["status"] in ("completed", "failed") for job in jobs)
+        st.progress(finished / len(jobs), text=f"{finished} of {len(jobs)} searches finished")
+    for job in jobs:
+        render_findall_job(job, expanded=job["job_id"] == focused_job_id)
+
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_RESULTS_CACHE_SIZE = 32
+
+
+@st.cache_data(max_entries=HISTORY_RESULTS_CACHE_SIZE, ttl="10m", show_spinner=False)
+def load_history_results(run_id, worksheet_name):
+    """
+    Load a saved search's results, keeping recently opened searches in memory
+
+    Args:
+        run_id (str): FindAll run ID
+        worksheet_name (str): Worksheet holding the results when using Google Sheets
+
     Returns:
-        pd.DataFrame: Formatted results dataframe
+        pd.DataFrame: Search results or empty DataFrame if error
+    """
+    return get_history_store().load_run_results(run_id, worksheet_name)
+
+
+def render_history_results(display_df):
+    """
+    Render a saved search's results as a table followed by company details
+
+    The details for every company are rendered as a single markdown block
+    rather than one element per line.
+
+    Args:
+        display_df (pd.DataFrame): Search results
+    """
+    st.markdown(f"**Found {len(display_df)} companies:**")
+
+    # Display results as a Streamlit table first
+    st.dataframe(display_df, use_container_width=True)
+
+    st.markdown("---")
+    st.markdown("### Company Details")
+
+    # Create compact company list
+    blocks = []
+    for _, company_row in display_df.iterrows():
+        company_name = company_row.get('Name', 'Unknown Company')
+        company_url = company_row.get('URL', '')
+
+        # Add company name with hyperlink - make it bigger
+        if company_url and str(company_url).strip():
+            company_url = str(company_url)
+            # Ensure URL has proper protocol
+            if not company_url.startswith(('http://', 'https://')):
+                if '.' in company_url:  # Looks like a domain
+                    company_url = f"https://{company_url}"
+                else:
+                    # If it's not a URL, just show company name
+                    blocks.append(f"### {company_name}")
+                    continue
+            blocks.append(f"### [{company_name}]({company_url})")
+        else:
+            blocks.append(f"### {company_name}")
+
+        # Collect all relevant data points
+        for col in display_df.columns:
+            if col not in ['Name', 'URL']:
+                value = company_row.get(col, '')
+                if value and str(value).strip() and str(value).lower() not in ['skipped', 'nan']:
+                    clean_col = col.replace('_', ' ').title()
+                    # Keep full values, no truncation
+                    blocks.append(f"• **{clean_col}:** {value}")
+
+    # Blank lines keep each heading and detail on its own paragraph
+    st.markdown("\n\n".join(blocks))
+
+
+def render_export_buttons(run_id=None, key_prefix="export"):
     """
+    Render download buttons for a saved run, or every saved run merged, in each export format
+
+    Exports are generated when a button is clicked, not on every rerun.
+
+    Args:
+        run_id (str): Run to export; every saved run if None
+        key_prefix (str): Prefix that keeps the button keys unique
+    """
+    for column, export_format in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS):
+        column.download_button(
+            f"⬇️ {EXPORT_FORMATS[export_format]['label']}",
+            data=functools.partial(export_to_file, export_format, run_id),
+            file_name=export_file_name(export_format, run_id),
+            mime=EXPORT_FORMATS[export_format]["mime"],
+            key=f"{key_prefix}_{export_format}_{run_id or 'history'}",
+            on_click="ignore",
+        )
+
+
+def ensure_indexes_current():
+    """
+    Bring the entity and search indexes up to date with saved runs and transcripts
+
+    Saved runs are indexed as they are saved, so the backfill only runs once
+    per session for runs saved before the indexes existed. Transcripts are
+    checked by modification time on every call, which is a stat() per file.
+    """
+    if not st.session_state.get("indexes_backfilled"):
+        with st.spinner("Indexing saved searches..."):
+            backfill_indexes()
+        st.session_state.indexes_backfilled = True
+    sync_transcripts()
+
+
+def render_saved_search():
+    """
+    Render keyword/semantic search over saved companies and transcripts
+    """
+    st.subheader("🔎 Search Saved Companies & Transcripts")
+
+    modes = SEARCH_MODES if semantic_search_available() else ("keyword",)
+    search_cols = st.columns([3, 1, 1])
+    text = search_cols[0].text_input("Search:", key="saved_search_text", placeholder="e.g. parametric flood insurance")
+    mode = search_cols[1].selectbox("Mode:", modes, key="saved_search_mode", format_func=str.title)
+    scope = search_cols[2].selectbox(
+        "In:", ["All", "Companies", "Transcripts"], key="saved_search_scope"
+    )
+    if not text.strip():
+        return
+
+    kind = {"Companies": "entity", "Transcripts": "transcript"}.get(scope)
+    results = search(text, limit=20, kind=kind, mode=mode)
     if not results:
-        return pd.DataFrame()
-    
-    df_data = []
-    for entity in results:
-        row = {}
-        
-        # Always include basic fields
-        row['Name'] = entity.get('name', '')
-        row['Score'] = entity.get('score', 0)
-        row['URL'] = entity.get('url', '')
-        row['Description'] = entity.get('description', '')
-        
-        # Add enrichment results if available
-        if 'enrichment_results' in entity:
-            for enrichment in entity['enrichment_results']:
-                key = enrichment.get('key', '')
-                value = enrichment.get('value', '')
-                
-                if key and value:
-                    # Create readable column name
-                    display_name = key.replace('_', ' ').replace('evidence', '').title().strip()
-                    row[display_name] = value
-        
-        # Add filter results if available  
-        if 'filter_results' in entity:
-            for filter_result in entity['filter_results']:
-                key = filter_result.get('key', '')
-                value = filter_result.get('value', '')
-                reasoning = filter_result.get('reasoning', '')
-                
-                if key:
-                    # Create readable column name
-                    display_name = key.replace('_', ' ').replace('check', '').title().strip()
-                    
-                    # Combine value and reasoning for richer display (keep full text)
-                    if value and reasoning:
-                        combined_value = f"{value.upper()}: {reasoning}"
-                        row[display_name] = combined_value
-                    elif value:
-                        row[display_name] = value.upper()
+        st.info("No matches")
+        return
+
+    blocks = []
+    for result in results:
+        if result["kind"] == "entity":
+            heading = f"🏢 **[{result['title']}]({result['url']})**" if result["url"] else f"🏢 **{result['title']}**"
+            blocks.append(f"{heading} · from *{result['query']}*")
+        else:
+            blocks.append(f"📝 **{result['title']}** · {result['context']}")
+        blocks.append(result["snippet"].replace("\n", " "))
+    st.markdown("\n\n".join(blocks))
 
-        df_data.append(row)
 
-    return pd.DataFrame(df_data)
+def render_companies_across_searches():
+    """
+    Render the cross-run company index, filterable by query or thesis keyword
+    """
+    st.subheader("🏢 Companies Across Searches")
+
+    keyword = st.text_input(
+        "Filter by query or thesis keyword:",
+        key="entity_index_filter",
+        help="Shows companies surfaced by any saved search whose query contains this text"
+    )
+    companies_df = companies_for_query(keyword)
+    if companies_df.empty:
+        st.info("No companies match this filter yet")
+        return
+
+    repeat_count = int((companies_df['Runs'] > 1).sum())
+    st.write(f"**{len(companies_df)} companies**, {repeat_count} surfaced by more than one search")
+    st.dataframe(
+        companies_df.drop(columns=['Entity Key']),
+        hide_index=True,
+        column_config={"URL": st.column_config.LinkColumn("URL")}
+    )
+
+
+def render_pinned_specs():
+    """
+    Render pinned FindAll specs with an editor and a button to run from each one
+    """
+    pinned_specs = list_pinned_specs()
+    if not pinned_specs:
+        return
+
+    st.subheader("📌 Pinned Specs")
+    for pinned in pinned_specs:
+        query = pinned["query"]
+        # Widget keys follow the query, so they stay stable as the list reorders
+        key = hashlib.sha1(spec_key(query).encode("utf-8")).hexdigest()[:12]
+        label = f"{'✏️ ' if pinned['edited'] else ''}{query}"
+        with st.expander(label):
+            with st.form(f"spec_form_{key}"):
+                spec_text = st.text_area(
+                    "Spec (JSON):", value=json.dumps(pinned["spec"], indent=2), height=300,
+                    help="Edit the entity type, match conditions or enrichment columns"
+                )
+                limit_col, processor_col = st.columns(2)
+                result_limit = limit_col.number_input("Result limit:", min_value=5, max_value=30, value=10)
+                processor = processor_col.selectbox("Processor:", FINDALL_PROCESSORS)
+                run_col, save_col = st.columns(2)
+                run_button = run_col.form_submit_button("Run with this spec", type="primary")
+                save_button = save_col.form_submit_button("Save changes")
+
+            if run_button or save_button:
+                try:
+                    findall_spec = json.loads(spec_text)
+                except json.JSONDecodeError as e:
+                    st.error(f"Spec is not valid JSON: {e}")
+                    continue
+                if findall_spec != pinned["spec"]:
+                    update_spec(query, findall_spec)
+                if run_button:
+                    job_id = get_findall_orchestrator().submit(
+                        query, result_limit, findall_spec=findall_spec, processor=processor
+                    )
+                    st.query_params["job"] = job_id
+                    st.success("🚀 Search submitted from the pinned spec.")
+                else:
+                    st.success("💾 Spec saved")
 
+            if st.button("Unpin", key=f"unpin_spec_{key}"):
+                pin_spec(query, pinned=False)
+                st.rerun()
 
 
+def submit_search(query, result_limit):
+    """
+    Submit a search to the background orchestrator and focus it in the jobs list
+
+    Args:
+        query (str): Search query
+        result_limit (int): Maximum number of results to return
+    """
+    orchestrator = get_findall_orchestrator()
+    active_job = orchestrator.find_active_job(query, result_limit)
+    job_id = orchestrator.submit(query, result_limit)
+    st.query_params["job"] = job_id
+    if active_job is not None and active_job["job_id"] == job_id:
+        st.success("🤝 The same search is already running, so you've joined it instead of starting a new run. Its results will show up here too.")
+    else:
+        st.success("🚀 Search submitted. It runs in the background, so you can reload or close this page and come back for the results.")
+
+
+def render_prior_run_offer(pending):
+    """
+    Offer a prior run of the same query instead of starting a new FindAll run
+
+    Args:
+        pending (dict): query, result_limit and the prior run from find_prior_search
+    """
+    prior = pending["prior"]
+    st.info(f"♻️ Found {describe_prior_run(prior)}:\n\n*{prior['query']}*")
+    reuse_col, rerun_col = st.columns(2)
+    if reuse_col.button("Show saved results", type="primary", key="reuse_prior_run"):
+        pending["show_results"] = True
+    if rerun_col.button("Run new search anyway", key="rerun_prior_query"):
+        st.session_state.pop("pending_search", None)
+        submit_search(pending["query"], pending["result_limit"])
+        return
+
+    if pending.get("show_results"):
+        with st.spinner(f"Loading results for {prior['run_id']}..."):
+            display_df = load_prior_run_results(prior)
+        if not display_df.empty:
+            render_history_results(display_df)
+        else:
+            st.error("❌ Could not load results from this search")
+
 
 def render_parallel_findall_tab(tab_type="new_search"):
     """
@@ -358,109 +781,77 @@ def render_parallel_findall_tab(tab_type="new_search"):
             submit_button = st.form_submit_button("Search")
 
         if submit_button and query:
-            with st.spinner("Searching..."):
-                results, columns, run_id = search_findall(query, result_limit)
-
-            if results is not None:
-                if len(results) > 0:
-                    st.success(f"Found {len(results)} results")
-
-                    # Save to Google Sheets
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    if save_search_to_gsheets(query, run_id, results, columns, timestamp):
-                        st.success("✅ Results saved to Google Sheets")
-
-                    df = create_results_dataframe(results, columns)
-                    if not df.empty:
-                        # Show column info for debugging
-                        st.info(f"📊 Displaying results with columns: {list(df.columns)}")
-                        st.dataframe(df, use_container_width=True)
-
-                        # Show run ID for future reference
-                        if run_id:
-                            st.info(f"🔗 **Run ID for future reference**: `{run_id}`")
-                    else:
-                        st.warning("Results were found but DataFrame is empty. Check data structure.")
-                        # Debug: Show raw results structure
-                        with st.expander("🔍 Debug: Raw Results Structure"):
-                            st.json(results[:2] if len(results) > 2 else results)
-                else:
-                    st.info("Search completed but no results were returned.")
-            elif query:
-                st.error("Search failed. Please try again.")
+            prior = find_prior_search(query)
+            if prior and prior["fresh"]:
+                # Offer the prior run first; a new run is only started on request
+                st.session_state.pending_search = {"query": query, "result_limit": result_limit, "prior": prior}
+            else:
+                st.session_state.pop("pending_search", None)
+                submit_search(query, result_limit)
+
+        if st.session_state.get("pending_search"):
+            render_prior_run_offer(st.session_state.pending_search)
+
+        render_pinned_specs()
+        render_findall_jobs()
 
     elif tab_type == "search_history":
         st.header("Search History")
-        st.info("📋 Browse company search history (all results saved to this Google Sheet: https://docs.google.com/spreadsheets/d/1bYVZHEKaQu5mkLqbsH0tvFnylIteai-YvuuJzSftFTE/edit?gid=944934347#gid=944934347)")
+        st.info("📋 Browse company search history (results are also exported to this Google Sheet: https://docs.google.com/spreadsheets/d/1bYVZHEKaQu5mkLqbsH0tvFnylIteai-YvuuJzSftFTE/edit?gid=944934347#gid=944934347)")
 
-        # Load search history
-        history_df = load_search_history()
+        # Load only the index page; results are fetched when a search is opened
+        history_store = get_history_store()
+        total_runs = history_store.count_runs()
 
-        if not history_df.empty:
-            st.write(f"**{len(history_df)} previous searches found**")
+        ensure_indexes_current()
+        render_saved_search()
+
+        if total_runs:
+            st.write(f"**{total_runs} previous searches found**")
+
+            page_count = math.ceil(total_runs / HISTORY_PAGE_SIZE)
+            page = 1
+            if page_count > 1:
+                page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+            history_df = history_store.list_runs(limit=HISTORY_PAGE_SIZE, offset=(page - 1) * HISTORY_PAGE_SIZE)
 
             # Display each search as an expandable section
             for idx, row in history_df.iterrows():
                 query_text = row.get('Query', 'Unknown Query')
-                timestamp = row.get('Timestamp', 'Unknown Time')
                 run_id = row.get('Run_ID', 'Unknown ID')
                 result_count = row.get('Result_Count', 0)
-                worksheet_name = row.get('Worksheet', run_id[:31] if len(run_id) > 31 else run_id)
+                worksheet_name = row.get('Worksheet') or (run_id[:31] if len(run_id) > 31 else run_id)
 
                 # Create expandable section for each search
-                with st.expander(f"{query_text} ({result_count} results)"):
-                    # Auto-load and display results
-                    with st.spinner(f"Loading results from {worksheet_name}..."):
-                        results_df = load_search_results_from_worksheet(worksheet_name)
-
-                        if not results_df.empty:
-                            # Skip the metadata row (first row) when displaying
-                            display_df = results_df.iloc[1:] if len(results_df) > 1 else results_df
-
-                            st.markdown(f"**Found {len(display_df)} companies:**")
-
-                            # Display results as a Streamlit table first
-                            st.dataframe(display_df, use_container_width=True)
-
-                            st.markdown("---")
-                            st.markdown("### Company Details")
-
-                            # Create compact company list
-                            for _, company_row in display_df.iterrows():
-                                company_name = company_row.get('Name', 'Unknown Company')
-                                company_url = company_row.get('URL', '')
-
-                                # Add company name with hyperlink - make it bigger
-                                if company_url and company_url.strip() and company_url != '':
-                                    # Ensure URL has proper protocol
-                                    if not company_url.startswith(('http://', 'https://')):
-                                        if '.' in company_url:  # Looks like a domain
-                                            company_url = f"https://{company_url}"
-                                        else:
-                                            # If it's not a URL, just show company name
-                                            st.markdown(f"### {company_name}")
-                                            continue
-                                    st.markdown(f"### [{company_name}]({company_url})")
-                                else:
-                                    st.markdown(f"### {company_name}")
-
-                                # Collect all relevant data points
-                                details = []
-                                for col in display_df.columns:
-                                    if col not in ['Name', 'URL']:
-                                        value = company_row.get(col, '')
-                                        if value and str(value).strip() and str(value).lower() not in ['skipped', 'nan']:
-                                            clean_col = col.replace('_', ' ').title()
-                                            # Keep full values, no truncation
-                                            details.append(f"**{clean_col}:** {value}")
-
-                                # Display details with line breaks
-                                if details:
-                                    for detail in details:
-                                        st.markdown(f"• {detail}")
-
-                                st.markdown("")  # Add spacing between companies
-                        else:
-                            st.error("❌ Could not load results from this search")
+                expander = st.expander(
+                    f"{query_text} ({result_count} results)",
+                    key=f"history_run_{run_id}",
+                    on_change="rerun"
+                )
+                with expander:
+                    if not expander.open:
+                        continue
+
+                    with st.spinner(f"Loading results for {run_id}..."):
+                        display_df = load_history_results(run_id, worksheet_name)
+
+                    if not display_df.empty:
+                        if isinstance(history_store, LocalHistoryStore):
+                            render_export_buttons(run_id, key_prefix="export_run")
+                        render_history_results(display_df)
+                    else:
+                        st.error("❌ Could not load results from this search")
+
+            if isinstance(history_store, LocalHistoryStore):
+                st.subheader("📦 Export All Searches")
+                st.caption("Every saved search merged into one table, with the run ID, query and timestamp of each row")
+                render_export_buttons(key_prefix="export_history")
+
+            render_companies_across_searches()
         else:
             st.info("📭 No previous searches found. Run a search to build your history!")
+            if isinstance(history_store, LocalHistoryStore) and st.button("Import history from Google Sheets"):
+                with st.spinner("Importing search index from Google Sheets..."):
+                    imported = history_store.import_index(load_search_history())
+                st.success(f"Imported {imported} searches")
+                st.rerun()
@@ -0,0 +1,248 @@
+"""
+Shared poll scheduler for active FindAll runs
+
+A single scheduler thread tracks every active run in one heap ordered by the
+time its next poll is due. Instead of polling each run every 5 seconds, the
+interval is fitted to how long runs usually take: polls are sparse early in a
+run, tighten as the run approaches its expected completion time, and back off
+exponentially (with a cap) once it is overdue.
+"""
+import heapq
+import itertools
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import observe
+
+# Configuration
+MIN_POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 60
+DEFAULT_EXPECTED_DURATION = 240  # FindAll runs typically take 3-5 minutes
+POLL_JITTER = 0.1
+MAX_CONSECUTIVE_FAILURES = 5
+PROGRESS_POLL_INTERVAL = 15  # Longest delay between polls when partial results are streamed
+DURATION_HISTORY_SIZE = 50
+POLL_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+def is_run_finished(run):
+    """
+    Check whether a FindAll run and all of its enrichments are done
+
+    Args:
+        run (dict): Run data from the FindAll runs endpoint
+
+    Returns:
+        bool: True once neither the run nor its enrichments are active
+    """
+    return not run["is_active"] and not run["are_enrichments_active"]
+
+
+def next_poll_delay(elapsed, expected_duration, overdue_polls=0,
+                    min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL):
+    """
+    Compute how long to wait before polling a run again
+
+    Before the expected completion time the delay is half of the remaining
+    expected time, so polls converge on the moment the run should finish.
+    After that, the delay doubles with every poll that finds the run still
+    active. Both are clamped to [min_interval, max_interval].
+
+    Args:
+        elapsed (float): Seconds since the run was started
+        expected_duration (float): Typical run duration in seconds
+        overdue_polls (int): Polls made since the run passed its expected duration
+        min_interval (float): Shortest allowed delay in seconds
+        max_interval (float): Longest allowed delay in seconds
+
+    Returns:
+        float: Delay in seconds
+    """
+    remaining = expected_duration - elapsed
+    if remaining > 0:
+        delay = remaining / 2
+    else:
+        delay = min_interval * (2 ** overdue_polls)
+    return max(min_interval, min(delay, max_interval))
+
+
+class _Watch:
+    """An active run tracked by the scheduler"""
+
+    def __init__(self, key, fetch, on_done, on_error, started_at, on_progress=None):
+        self.key = key
+        self.fetch = fetch
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.started_at = started_at
+        # When a poll first found the search done and only enrichments still running
+        self.search_finished_at = None
+        self.polls = 0
+        self.overdue_polls = 0
+        self.failures = 0
+
+
+class PollScheduler:
+    """
+    Polls all active FindAll runs from one place
+
+    Runs are registered with watch(); the scheduler calls fetch() whenever a
+    poll is due and hands the final run payload to on_done() once the run is
+    finished, so callers never loop or sleep themselves.
+    """
+
+    def __init__(self, min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL,
+                 default_expected_duration=DEFAULT_EXPECTED_DURATION, max_workers=4):
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._default_expected_duration = default_expected_duration
+        self._durations = deque(maxlen=DURATION_HISTORY_SIZE)
+        self._heap = []
+        self._watches = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._fetch_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="findall-poll")
+
+        thread = threading.Thread(target=self._loop, name="findall-poll-scheduler", daemon=True)
+        thread.start()
+
+    def watch(self, key, fetch, on_done, on_error=None, started_at=None, on_progress=None):
+        """
+        Start polling a run
+
+        Args:
+            key (str): Unique key for the run (the FindAll run ID)
+            fetch (callable): Returns the current run payload
+            on_done (callable): Called with the final run payload once it is finished
+            on_error (callable): Called with the exception if polling keeps failing
+            started_at (float): Epoch seconds when the run started; defaults to now
+            on_progress (callable): Called with each unfinished run payload, for streaming
+                partial results; such runs are polled at least every PROGRESS_POLL_INTERVAL seconds
+
+        Returns:
+            bool: False if the run is already being watched
+        """
+        with self._condition:
+            if key in self._watches:
+                return False
+
+            watch = _Watch(key, fetch, on_done, on_error, started_at or time.time(), on_progress)
+            self._watches[key] = watch
+            self._schedule(watch, self._delay_for(watch))
+            return True
+
+    def record_duration(self, seconds):
+        """
+        Record how long a finished run took, to fit future poll intervals
+
+        Args:
+            seconds (float): Run duration in seconds
+        """
+        if seconds > 0:
+            self._durations.append(seconds)
+
+    def expected_duration(self):
+        """
+        Get the typical run duration used to plan polls
+
+        Returns:
+            float: Median of recent run durations, or the default if none are known
+        """
+        if not self._durations:
+            return self._default_expected_duration
+        return statistics.median(self._durations)
+
+    def active_count(self):
+        """
+        Returns:
+            int: Number of runs currently being polled
+        """
+        with self._condition:
+            return len(self._watches)
+
+    def _delay_for(self, watch):
+        max_interval = self._max_interval
+        if watch.on_progress:
+            max_interval = max(self._min_interval, min(max_interval, PROGRESS_POLL_INTERVAL))
+        delay = next_poll_delay(
+            time.time() - watch.started_at,
+            self.expected_duration(),
+            watch.overdue_polls,
+            self._min_interval,
+            max_interval
+        )
+        # Spread polls out so runs started together don't poll in lockstep
+        return delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+    def _schedule(self, watch, delay):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), watch))
+        self._condition.notify()
+
+    def _reschedule(self, watch, delay):
+        with self._condition:
+            self._schedule(watch, delay)
+
+    def _finish(self, watch):
+        with self._condition:
+            self._watches.pop(watch.key, None)
+
+    def _loop(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                _, _, watch = heapq.heappop(self._heap)
+            self._fetch_pool.submit(self._poll, watch)
+
+    def _poll(self, watch):
+        try:
+            run = watch.fetch()
+        except Exception as e:
+            watch.failures += 1
+            if watch.failures >= MAX_CONSECUTIVE_FAILURES:
+                self._finish(watch)
+                if watch.on_error:
+                    watch.on_error(e)
+                return
+            self._reschedule(watch, min(self._min_interval * (2 ** watch.failures), self._max_interval))
+            return
+
+        watch.failures = 0
+        watch.polls += 1
+        try:
+            finished = is_run_finished(run)
+        except Exception as e:
+            self._finish(watch)
+            if watch.on_error:
+                watch.on_error(e)
+            return
+
+        if not finished and not run["is_active"] and watch.search_finished_at is None:
+            watch.search_finished_at = time.time()
+
+        if finished:
+            now = time.time()
+            self.record_duration(now - watch.started_at)
+            observe("findall.run", now - watch.started_at)
+            observe("findall.enrichment_tail", now - (watch.search_finished_at or now))
+            observe("findall.polls_per_run", watch.polls, POLL_COUNT_BUCKETS)
+            self._finish(watch)
+            watch.on_done(run)
+            return
+
+        if watch.on_progress:
+            try:
+                watch.on_progress(run)
+            except Exception:
+                # A failing progress handler must not stop the run from being polled
+                pass
+
+        if time.time() - watch.started_at >= self.expected_duration():
+            watch.overdue_polls += 1
+        self._reschedule(watch, self._delay_for(watch))
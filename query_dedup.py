@@ -0,0 +1,115 @@
+"""
+Query deduplication against prior FindAll runs
+
+FindAll runs take minutes, so before starting one the app looks for a prior
+run of the same or an almost identical query. Queries are compared after
+normalization, and near duplicates are found with an IDF-weighted Jaccard
+similarity over the history index: the boilerplate every thesis query shares
+("Find all seed or pre-seed startups that have raised less than $10M...")
+appears in most queries and carries little weight, so two queries only
+match when their distinctive words do.
+"""
+import math
+import re
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+# Configuration
+QUERY_FRESHNESS_DAYS = 30
+NEAR_DUPLICATE_THRESHOLD = 0.9
+
+TOKEN_PATTERN = re.compile(r"\$?\d+(?:\.\d+)?[kmb]?|[a-z]+")
+
+
+def normalize_query(query):
+    """
+    Normalize a query for exact-match comparison
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        str: Lowercase query with punctuation dropped and whitespace collapsed
+    """
+    return " ".join(TOKEN_PATTERN.findall((query or "").lower()))
+
+
+def _idf_weights(token_sets):
+    """Smoothed inverse document frequency of each token across the queries"""
+    document_frequency = Counter(token for tokens in token_sets for token in tokens)
+    count = len(token_sets)
+    return {token: math.log(1 + (count + 1) / (df + 1)) for token, df in document_frequency.items()}
+
+
+def _weighted_jaccard(a, b, idf):
+    union = sum(idf[token] for token in a | b)
+    if not union:
+        return 0.0
+    return sum(idf[token] for token in a & b) / union
+
+
+def find_prior_run(query, history_df, freshness_days=QUERY_FRESHNESS_DAYS,
+                   threshold=NEAR_DUPLICATE_THRESHOLD, now=None):
+    """
+    Find the best prior run of the same or a near-duplicate query
+
+    Runs that returned no results are ignored, since rerunning them is the
+    only way to get an answer. Among matches, the most similar run wins and
+    ties go to the newest.
+
+    Args:
+        query (str): Query about to be searched
+        history_df (pd.DataFrame): History index with Timestamp, Query, Run_ID, Result_Count and Worksheet
+        freshness_days (float): Age in days after which a prior run is considered stale
+        threshold (float): Minimum similarity for a near duplicate, between 0 and 1
+        now (datetime): Current time, for testing
+
+    Returns:
+        dict: run_id, query, timestamp, result_count, worksheet, similarity, exact,
+            age_days and fresh, or None if the query hasn't been searched before
+    """
+    if history_df is None or history_df.empty:
+        return None
+
+    result_counts = pd.to_numeric(history_df['Result_Count'], errors='coerce').fillna(0)
+    history_df = history_df.assign(Result_Count=result_counts.astype(int))[result_counts > 0]
+    if history_df.empty:
+        return None
+
+    normalized = normalize_query(query)
+    tokens = set(normalized.split())
+    history_tokens = [set(normalize_query(q).split()) for q in history_df['Query'].astype(str)]
+    idf = _idf_weights(history_tokens + [tokens])
+
+    timestamps = pd.to_datetime(history_df['Timestamp'], errors='coerce')
+    best = None
+    for position, (row, row_tokens) in enumerate(zip(history_df.itertuples(index=False), history_tokens)):
+        exact = normalize_query(row.Query) == normalized
+        similarity = 1.0 if exact else _weighted_jaccard(tokens, row_tokens, idf)
+        if similarity < threshold:
+            continue
+
+        timestamp = timestamps.iloc[position]
+        key = (similarity, timestamp if pd.notna(timestamp) else pd.Timestamp.min)
+        if best is None or key > best[0]:
+            best = (key, row, exact, timestamp)
+
+    if best is None:
+        return None
+
+    (similarity, _), row, exact, timestamp = best
+    age_days = ((now or datetime.now()) - timestamp.to_pydatetime()).total_seconds() / 86400 \
+        if pd.notna(timestamp) else None
+    return {
+        "run_id": str(row.Run_ID),
+        "query": row.Query,
+        "timestamp": str(row.Timestamp),
+        "result_count": int(row.Result_Count),
+        "worksheet": row.Worksheet if pd.notna(row.Worksheet) else None,
+        "similarity": similarity,
+        "exact": exact,
+        "age_days": age_days,
+        "fresh": age_days is not None and age_days <= freshness_days,
+    }
@@ -0,0 +1,158 @@
+"""
+Persistent content-addressed cache for LLM responses
+
+Responses are keyed by a hash of (prompt, model, content), expire after a
+TTL, and the least recently used entries are evicted once the cache grows
+past its size budget.
+"""
+import hashlib
+import time
+
+from local_db import connect
+
+# Configuration
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+REPLAY_CHUNK_SIZE = 64
+
+_schema_ready = False
+
+
+def _init_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with connect() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_accessed REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_response_cache_accessed ON llm_response_cache (last_accessed)")
+    _schema_ready = True
+
+
+def cache_key(prompt, model, content):
+    """
+    Build the content-addressed key for an LLM request
+
+    Args:
+        prompt (str): System prompt
+        model (str): Model name
+        content (str): User content
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    for part in (prompt, model, content):
+        encoded = part.encode("utf-8")
+        # Length-prefix each part so different splits can't collide
+        digest.update(len(encoded).to_bytes(8, "big"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def get_cached_response(key, ttl=CACHE_TTL_SECONDS):
+    """
+    Look up a cached response and mark it as recently used
+
+    Args:
+        key (str): Key from cache_key()
+        ttl (float): Maximum age in seconds
+
+    Returns:
+        str: Cached response or None on a miss or expired entry
+    """
+    _init_schema()
+    now = time.time()
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT response, created_at FROM llm_response_cache WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if now - row["created_at"] > ttl:
+            conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (key,))
+            return None
+        conn.execute("UPDATE llm_response_cache SET last_accessed = ? WHERE cache_key = ?", (now, key))
+    return row["response"]
+
+
+def store_response(key, model, response, max_bytes=CACHE_MAX_BYTES):
+    """
+    Store a response and evict least recently used entries beyond the size budget
+
+    Args:
+        key (str): Key from cache_key()
+        model (str): Model name
+        response (str): Full response text
+        max_bytes (int): Size budget for the whole cache
+    """
+    _init_schema()
+    now = time.time()
+    size = len(response.encode("utf-8"))
+    with connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_response_cache "
+            "(cache_key, model, response, size, created_at, last_accessed) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, response, size, now, now)
+        )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_response_cache").fetchone()[0]
+        if total <= max_bytes:
+            return
+
+        for row in conn.execute("SELECT cache_key, size FROM llm_response_cache ORDER BY last_accessed").fetchall():
+            if total <= max_bytes:
+                break
+            conn.execute("DELETE FROM llm_response_cache WHERE cache_key = ?", (row["cache_key"],))
+            total -= row["size"]
+
+
+def replay_response(response, chunk_size=REPLAY_CHUNK_SIZE):
+    """
+    Replay a cached response as a stream of text deltas
+
+    Args:
+        response (str): Cached response text
+        chunk_size (int): Characters per delta
+
+    Yields:
+        str: Text deltas, like a live LLM stream
+    """
+    for i in range(0, len(response), chunk_size):
+        yield response[i:i + chunk_size]
+
+
+def caching_stream(key, model, deltas, validate=None):
+    """
+    Pass a live stream of text deltas through and cache it once it completes
+
+    Nothing is stored if the stream fails, is abandoned part way, or the
+    complete response doesn't validate.
+
+    Args:
+        key (str): Key from cache_key()
+        model (str): Model name
+        deltas (iterator): Live text deltas
+        validate (callable): Called with the complete response before it is stored; raises ValueError to skip storing
+
+    Yields:
+        str: The same text deltas
+    """
+    parts = []
+    for delta in deltas:
+        parts.append(delta)
+        yield delta
+    response = "".join(parts)
+    if validate is not None:
+        try:
+            validate(response)
+        except ValueError:
+            return
+    store_response(key, model, response)
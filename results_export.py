@@ -0,0 +1,368 @@
+"""
+Columnar exports of saved search results
+
+A saved run, or every saved run merged into one table, can be exported as
+Parquet, Arrow IPC or CSV for analysis notebooks. Exports are built from the
+raw entities in the local history store with the same flattening as
+create_results_dataframe, one batch of entities at a time. A first pass over
+the entities collects every enrichment and filter field they carry, which
+fixes the schema up front; the second pass encodes each batch, hands it on
+and drops it before the next one is read, so memory stays bounded by the
+batch size however large the export is.
+
+The Search History tab offers exports as download buttons. Set EXPORT_PORT
+to also serve them over HTTP, streamed as they are generated. The server
+has no authentication and binds to loopback unless EXPORT_HOST says otherwise:
+    EXPORT_PORT=9465 streamlit run streamlit_app.py
+    pd.read_parquet("http://127.0.0.1:9465/export/history.parquet")
+    pd.read_csv("http://127.0.0.1:9465/export/runs/<run_id>.csv")
+"""
+import io
+import math
+import os
+import re
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from history_store import LocalHistoryStore, get_history_store
+from metrics import span
+from results_frame import BASE_COLUMNS, enrichment_display_name, filter_display_name, normalize_results
+
+# Configuration
+EXPORT_BATCH_SIZE = 2000
+DEFAULT_EXPORT_HOST = "127.0.0.1"
+RUN_COLUMNS = ['Run_ID', 'Query', 'Timestamp']
+EXPORT_FORMATS = {
+    "parquet": {"label": "Parquet", "extension": "parquet", "mime": "application/vnd.apache.parquet"},
+    "arrow": {"label": "Arrow IPC", "extension": "arrow", "mime": "application/vnd.apache.arrow.file"},
+    "csv": {"label": "CSV", "extension": "csv", "mime": "text/csv"},
+}
+EXPORT_PATH_PATTERN = re.compile(r"^/export/(?:history|runs/(?P<run_id>[^/]+))\.(?P<format>[a-z]+)$")
+
+
+def spec_display_names(columns):
+    """
+    Display names of the enrichment and filter columns a FindAll spec declares
+
+    Only used to order export columns: entities can carry fields the spec
+    doesn't list, or under a different type than the spec gives them.
+
+    Args:
+        columns (list): Column definitions from the FindAll spec
+
+    Returns:
+        list: Display names, enrichments before filters as in each flattened entity
+    """
+    columns = [column for column in columns or () if column.get('name')]
+    # Enrichments come before filters, as they do in each flattened entity
+    names = [enrichment_display_name(column['name']) for column in columns if column.get('type') != 'constraint']
+    names += [filter_display_name(column['name']) for column in columns if column.get('type') == 'constraint']
+    unique = []
+    for name in names:
+        if name not in unique and name not in BASE_COLUMNS:
+            unique.append(name)
+    return unique
+
+
+def results_display_names(results, names=None):
+    """
+    Collect the display names of the enrichment and filter fields entities carry
+
+    Uses the same naming and the same "has a value" rule as
+    normalize_results, so the names match create_results_dataframe's columns.
+
+    Args:
+        results (list): Raw FindAll result entities
+        names (dict): Names collected so far, extended in place
+
+    Returns:
+        dict: Display names in first-seen order (as keys)
+    """
+    names = {} if names is None else names
+    for entity in results:
+        for enrichment in entity.get('enrichment_results') or ():
+            if enrichment.get('key') and enrichment.get('value'):
+                names.setdefault(enrichment_display_name(enrichment['key']))
+        for filter_result in entity.get('filter_results') or ():
+            if filter_result.get('key') and filter_result.get('value'):
+                names.setdefault(filter_display_name(filter_result['key']))
+    return names
+
+
+def export_schema(runs, names, merged=False):
+    """
+    Build the Arrow schema shared by every batch of an export
+
+    Args:
+        runs (list): Run details from LocalHistoryStore.list_run_details(), whose specs order the columns
+        names (iterable): Display names of the fields the entities carry, from results_display_names()
+        merged (bool): Prefix each row with the run ID, query and timestamp
+
+    Returns:
+        pa.Schema: Run columns (if merged), the base columns, the spec columns the entities carry in spec
+            order, then any other fields the entities carry in first-seen order
+    """
+    found = [name for name in names if name not in BASE_COLUMNS]
+    ordered = {}
+    for run in runs:
+        for name in spec_display_names(run["columns"]):
+            if name in names:
+                ordered.setdefault(name)
+    for name in found:
+        ordered.setdefault(name)
+    names = list(ordered)
+    fields = [pa.field(name, pa.string()) for name in RUN_COLUMNS] if merged else []
+    fields += [pa.field(name, pa.float64() if name == 'Score' else pa.string()) for name in BASE_COLUMNS]
+    fields += [pa.field(name, pa.string()) for name in names]
+    return pa.schema(fields)
+
+
+def _to_arrow(values, arrow_type):
+    """Convert a normalized column, where missing values are NaN, to an Arrow array"""
+    if arrow_type == pa.float64():
+        return pa.array([None if value is None else float(value) for value in values], type=arrow_type)
+    return pa.array(
+        [None if value is None or (isinstance(value, float) and math.isnan(value)) else str(value)
+         for value in values],
+        type=arrow_type
+    )
+
+
+def results_record_batch(schema, results, run=None):
+    """
+    Flatten a batch of raw entities into a record batch with a fixed schema
+
+    Columns the schema doesn't know are dropped, and schema columns the
+    batch has no values for are null.
+
+    Args:
+        schema (pa.Schema): Schema from export_schema()
+        results (list): Raw FindAll result entities
+        run (dict): Run details, used to fill the run columns of a merged export
+
+    Returns:
+        pa.RecordBatch: Batch with one row per entity
+    """
+    data = normalize_results(results)
+    run_values = {'Run_ID': run["run_id"], 'Query': run["query"], 'Timestamp': run["timestamp"]} if run else {}
+    arrays = []
+    for field in schema:
+        if field.name in run_values:
+            values = [run_values[field.name]] * len(results)
+        else:
+            values = data.get(field.name) or [None] * len(results)
+        arrays.append(_to_arrow(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_record_batches(run_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream a saved run, or every saved run merged, as record batches
+
+    Args:
+        run_id (str): Run to export; every saved run if None
+        batch_size (int): Maximum number of entities per batch
+
+    Returns:
+        tuple: (pa.Schema, iterator of pa.RecordBatch)
+
+    Raises:
+        ValueError: If the history backend has no raw results to export
+        KeyError: If the run is unknown
+    """
+    store = get_history_store()
+    if not isinstance(store, LocalHistoryStore):
+        raise ValueError("Exports need the local history store; Google Sheets only keeps the display tables")
+    runs = store.list_run_details(run_id)
+    if run_id is not None and not runs:
+        raise KeyError(run_id)
+
+    merged = run_id is None
+    # The specs don't reliably list every field, so the schema comes from the entities themselves
+    names = {}
+    for run in runs:
+        for results in store.iter_run_results(run["run_id"], batch_size):
+            results_display_names(results, names)
+    schema = export_schema(runs, names, merged=merged)
+
+    def batches():
+        for run in runs:
+            for results in store.iter_run_results(run["run_id"], batch_size):
+                yield results_record_batch(schema, results, run if merged else None)
+
+    return schema, batches()
+
+
+def _open_writer(export_format, sink, schema):
+    if export_format == "parquet":
+        return pq.ParquetWriter(sink, schema)
+    if export_format == "arrow":
+        return pa.ipc.new_file(sink, schema)
+    if export_format == "csv":
+        return pa_csv.CSVWriter(sink, schema)
+    raise ValueError(f"Unknown export format: {export_format}")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that holds what was written until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_export_chunks(export_format, run_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Encode an export batch by batch, yielding the bytes as they are produced
+
+    Args:
+        export_format (str): "parquet", "arrow" or "csv"
+        run_id (str): Run to export; every saved run if None
+        batch_size (int): Maximum number of entities per batch
+
+    Yields:
+        bytes: Consecutive chunks of the export file
+
+    Raises:
+        ValueError: If the format is unknown or the history backend can't export
+        KeyError: If the run is unknown
+    """
+    schema, batches = iter_record_batches(run_id, batch_size)
+    sink = _ChunkSink()
+    writer = _open_writer(export_format, sink, schema)
+    with span("export.write", format=export_format, merged=run_id is None) as attributes:
+        rows = 0
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        writer.close()
+        attributes["rows"] = rows
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+
+
+def export_to_file(export_format, run_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Write an export to an anonymous temporary file
+
+    Used for download buttons: the export is generated on disk rather than
+    in memory, and the file disappears once it is closed.
+
+    Args:
+        export_format (str): "parquet", "arrow" or "csv"
+        run_id (str): Run to export; every saved run if None
+        batch_size (int): Maximum number of entities per batch
+
+    Returns:
+        file: Binary file positioned at the start of the export
+    """
+    f = tempfile.TemporaryFile()
+    for chunk in iter_export_chunks(export_format, run_id, batch_size):
+        f.write(chunk)
+    f.seek(0)
+    return f
+
+
+def export_file_name(export_format, run_id=None):
+    """
+    Returns:
+        str: Download file name, e.g. "findall_123.parquet" or "search_history.csv"
+    """
+    return f"{run_id or 'search_history'}.{EXPORT_FORMATS[export_format]['extension']}"
+
+
+class _ExportHandler(BaseHTTPRequestHandler):
+    # Chunked transfer encoding needs HTTP/1.1
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        match = EXPORT_PATH_PATTERN.match(self.path.split("?")[0])
+        if not match or match["format"] not in EXPORT_FORMATS:
+            self.send_error(404)
+            return
+        export_format = match["format"]
+        run_id = unquote(match["run_id"]) if match["run_id"] else None
+
+        chunks = iter_export_chunks(export_format, run_id)
+        try:
+            # Pull the first chunk before sending headers, so a bad request still gets an error status
+            first_chunk = next(chunks, b"")
+        except KeyError:
+            self.send_error(404, f"Unknown run {run_id}")
+            return
+        except ValueError as e:
+            self.send_error(501, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", EXPORT_FORMATS[export_format]["mime"])
+        self.send_header("Content-Disposition", f'attachment; filename="{export_file_name(export_format, run_id)}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self._write_chunk(first_chunk)
+        for chunk in chunks:
+            self._write_chunk(chunk)
+        self.wfile.write(b"0\r\n\r\n")
+        self.close_connection = True
+
+    def _write_chunk(self, chunk):
+        if chunk:
+            self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+
+
+_export_server = None
+_export_server_lock = threading.Lock()
+
+
+def start_export_server(port=None, host=None):
+    """
+    Serve exports over HTTP on a background thread, once per process
+
+    Serves /export/history.<format> and /export/runs/<run_id>.<format>
+    for the formats in EXPORT_FORMATS.
+
+    Args:
+        port (int): Port to bind; defaults to the EXPORT_PORT environment variable
+        host (str): Interface to bind; defaults to the EXPORT_HOST environment variable, or loopback.
+            Exports are not authenticated, so only bind other interfaces on a trusted network
+
+    Returns:
+        ThreadingHTTPServer: Running server, or None if no port is configured
+    """
+    global _export_server
+    port = port or os.environ.get("EXPORT_PORT")
+    if not port:
+        return None
+    host = host or os.environ.get("EXPORT_HOST", DEFAULT_EXPORT_HOST)
+    with _export_server_lock:
+        if _export_server is None:
+            _export_server = ThreadingHTTPServer((host, int(port)), _ExportHandler)
+            _export_server.daemon_threads = True
+            thread = threading.Thread(target=_export_server.serve_forever, name="export-server", daemon=True)
+            thread.start()
+        return _export_server
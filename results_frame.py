@@ -0,0 +1,104 @@
+"""
+Conversion of FindAll results into display DataFrames
+"""
+import functools
+
+import pandas as pd
+
+BASE_COLUMNS = ['Name', 'Score', 'URL', 'Description']
+
+
+@functools.lru_cache(maxsize=4096)
+def enrichment_display_name(key):
+    """
+    Create a readable column name for an enrichment key
+
+    Args:
+        key (str): Enrichment key, e.g. "total_funding_evidence"
+
+    Returns:
+        str: Display name, e.g. "Total Funding"
+    """
+    return key.replace('_', ' ').replace('evidence', '').title().strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def filter_display_name(key):
+    """
+    Create a readable column name for a filter key
+
+    Args:
+        key (str): Filter key, e.g. "funding_stage_check"
+
+    Returns:
+        str: Display name, e.g. "Funding Stage"
+    """
+    return key.replace('_', ' ').replace('check', '').title().strip()
+
+
+def normalize_results(results):
+    """
+    Flatten FindAll results into display columns
+
+    Each field is collected straight into its own column list instead of
+    building a dict per row. Columns appear in the order they are first
+    seen, and entities without a value for a column get NaN.
+
+    Args:
+        results (list): Search results from FindAll API
+
+    Returns:
+        dict: Display column name -> list of values, one per entity
+    """
+    count = len(results)
+    data = {
+        'Name': [entity.get('name', '') for entity in results],
+        'Score': [entity.get('score', 0) for entity in results],
+        'URL': [entity.get('url', '') for entity in results],
+        'Description': [entity.get('description', '') for entity in results],
+    }
+
+    def column(display_name):
+        values = data.get(display_name)
+        if values is None:
+            values = data[display_name] = [float('nan')] * count
+        return values
+
+    for i, entity in enumerate(results):
+        # Add enrichment results if available
+        for enrichment in entity.get('enrichment_results') or ():
+            key = enrichment.get('key', '')
+            value = enrichment.get('value', '')
+            if key and value:
+                column(enrichment_display_name(key))[i] = value
+
+        # Add filter results if available, combining value and reasoning (keep full text)
+        for filter_result in entity.get('filter_results') or ():
+            key = filter_result.get('key', '')
+            value = filter_result.get('value', '')
+            if key and value:
+                reasoning = filter_result.get('reasoning', '')
+                column(filter_display_name(key))[i] = f"{value.upper()}: {reasoning}" if reasoning else value.upper()
+
+    return data
+
+
+def create_results_dataframe(results, columns, arrow=False):
+    """
+    Create a pandas DataFrame from search results
+
+    Args:
+        results (list): Search results from FindAll API
+        columns (list): Column definitions from FindAll API
+        arrow (bool): Return Arrow-backed columns (requires pyarrow)
+
+    Returns:
+        pd.DataFrame: Formatted results dataframe
+    """
+    if not results:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(normalize_results(results))
+    if arrow:
+        df = df.convert_dtypes(dtype_backend="pyarrow")
+    return df
@@ -0,0 +1,55 @@
+"""
+Incremental FindAll results
+
+The FindAll runs endpoint returns the full result list on every poll.
+ResultsAccumulator turns successive polls into deltas (entities seen for the
+first time, and entities whose enrichment or filter results have filled in)
+so the UI and the job table only react when something actually changed.
+"""
+from entity_index import entity_key
+
+
+def _entity_id(entity, position):
+    return entity.get("id") or entity_key(entity) or f"position:{position}"
+
+
+def _completed_fields(entity):
+    """Enrichment and filter keys that have a value so far"""
+    return frozenset(
+        [("enrichment", result.get("key")) for result in entity.get("enrichment_results") or ()
+         if result.get("key") and result.get("value")] +
+        [("filter", result.get("key")) for result in entity.get("filter_results") or ()
+         if result.get("key") and result.get("value")]
+    )
+
+
+class ResultsAccumulator:
+    """Tracks a run's results across polls and reports what changed"""
+
+    def __init__(self):
+        self._fields = {}
+        self.results = []
+
+    def update(self, results):
+        """
+        Record the results from a poll
+
+        Args:
+            results (list): Full result list returned by the poll
+
+        Returns:
+            dict: "new" entities found since the last poll and "updated" entities
+                with newly completed enrichments or filters
+        """
+        new, updated = [], []
+        for position, entity in enumerate(results):
+            entity_id = _entity_id(entity, position)
+            fields = _completed_fields(entity)
+            previous = self._fields.get(entity_id)
+            if previous is None:
+                new.append(entity)
+            elif fields - previous:
+                updated.append(entity)
+            self._fields[entity_id] = fields
+        self.results = list(results)
+        return {"new": new, "updated": updated}
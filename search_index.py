@@ -0,0 +1,429 @@
+"""
+Local full-text and semantic search over saved companies and transcripts
+
+Every saved entity (name, description, enrichment and filter text) and every
+passage of the content/ transcripts is stored in a SQLite FTS5 table, so
+keyword queries are ranked with BM25 inside SQLite and come back in
+milliseconds. When fastembed is installed, documents are also embedded on a
+CPU-only ONNX model and searched by cosine similarity; without it, search
+falls back to keywords only. Both indexes are updated incrementally: a run is
+indexed once when it is saved, and a transcript is re-indexed only when its
+modification time or size changes.
+"""
+import functools
+import glob
+import importlib.util
+import os
+import re
+import threading
+
+import numpy as np
+
+from local_db import connect
+from results_frame import enrichment_display_name, filter_display_name
+from text_splitting import split_content
+
+# Configuration
+TRANSCRIPT_DIR = "content"
+TRANSCRIPT_PASSAGE_CHARS = 1500
+EMBEDDING_MODEL = os.environ.get("SEARCH_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+EMBEDDINGS_ENABLED = os.environ.get("SEARCH_EMBEDDINGS", "1") != "0"
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+SNIPPET_TOKENS = 24
+RRF_K = 60
+
+SEARCH_MODES = ("keyword", "semantic", "hybrid")
+
+_schema_ready = False
+_vector_cache = None
+_vector_lock = threading.Lock()
+
+
+def _init_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with connect() as conn:
+        # source, kind, url and context are stored for display only; title and body are searchable
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+                source UNINDEXED, kind UNINDEXED, url UNINDEXED, context UNINDEXED,
+                title, body,
+                tokenize = 'porter unicode61'
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_sources (
+                source TEXT PRIMARY KEY,
+                version TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_vectors (
+                doc_id INTEGER PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL
+            )
+        """)
+    _schema_ready = True
+
+
+@functools.lru_cache(maxsize=1)
+def get_embedder():
+    """
+    Get the local embedding model, if fastembed is installed and the model can be loaded
+
+    Returns:
+        fastembed.TextEmbedding: Embedding model or None if semantic search is unavailable
+    """
+    if not EMBEDDINGS_ENABLED:
+        return None
+    try:
+        from fastembed import TextEmbedding
+    except ImportError:
+        return None
+    try:
+        return TextEmbedding(EMBEDDING_MODEL)
+    except Exception:
+        # The model is downloaded on first use, which fails offline; fall back to keyword search
+        return None
+
+
+def semantic_search_available():
+    """
+    Check whether semantic search can be offered, without loading the embedding model
+
+    The model is only loaded on first use; if that fails, embedding and
+    semantic search quietly fall back as if it were unavailable.
+
+    Returns:
+        bool: True if embeddings are enabled and fastembed is installed
+    """
+    return EMBEDDINGS_ENABLED and importlib.util.find_spec("fastembed") is not None
+
+
+def _embed(texts):
+    vectors = np.asarray(list(get_embedder().embed(texts)), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def entity_document(entity):
+    """
+    Build the searchable text for a FindAll entity
+
+    Args:
+        entity (dict): FindAll result entity
+
+    Returns:
+        tuple: (title, body)
+    """
+    parts = [entity.get('description', '') or '']
+    for enrichment in entity.get('enrichment_results') or ():
+        if enrichment.get('key') and enrichment.get('value'):
+            parts.append(f"{enrichment_display_name(enrichment['key'])}: {enrichment['value']}")
+    for filter_result in entity.get('filter_results') or ():
+        if filter_result.get('key') and filter_result.get('value'):
+            parts.append(
+                f"{filter_display_name(filter_result['key'])}: {filter_result['value']} "
+                f"{filter_result.get('reasoning', '') or ''}".rstrip()
+            )
+    return entity.get('name', '') or '', "\n".join(part for part in parts if part)
+
+
+def _embed_documents(docs):
+    """Embed documents if possible; done before opening the write transaction, so the database isn't locked meanwhile"""
+    if not docs or not semantic_search_available() or get_embedder() is None:
+        return None
+    return _embed([f"{title}\n{body}" for _, _, _, title, body in docs])
+
+
+def _replace_source(conn, source, version, docs, vectors=None):
+    """Swap a source's documents for a new set, with their vectors from _embed_documents() if any"""
+    old_ids = [row[0] for row in conn.execute("SELECT rowid FROM search_fts WHERE source = ?", (source,))]
+    if old_ids:
+        conn.executemany("DELETE FROM search_fts WHERE rowid = ?", [(doc_id,) for doc_id in old_ids])
+        conn.executemany("DELETE FROM search_vectors WHERE doc_id = ?", [(doc_id,) for doc_id in old_ids])
+
+    doc_ids = []
+    for kind, url, context, title, body in docs:
+        doc_ids.append(conn.execute(
+            "INSERT INTO search_fts (source, kind, url, context, title, body) VALUES (?, ?, ?, ?, ?, ?)",
+            (source, kind, url, context, title, body)
+        ).lastrowid)
+
+    if doc_ids and vectors is not None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO search_vectors (doc_id, model, vector) VALUES (?, ?, ?)",
+            [(doc_id, EMBEDDING_MODEL, vector.tobytes()) for doc_id, vector in zip(doc_ids, vectors)]
+        )
+
+    conn.execute(
+        "INSERT OR REPLACE INTO search_sources (source, version) VALUES (?, ?)", (source, version)
+    )
+    return len(doc_ids)
+
+
+def index_run(run_id, query, results):
+    """
+    Add a saved run's entities to the search index; indexing the same run twice is a no-op
+
+    Args:
+        run_id (str): FindAll run ID
+        query (str): Search query that produced the run
+        results (list): FindAll results
+
+    Returns:
+        int: Number of documents added
+    """
+    _init_schema()
+    source = f"run:{run_id}"
+    with connect() as conn:
+        if conn.execute("SELECT 1 FROM search_sources WHERE source = ?", (source,)).fetchone():
+            return 0
+    docs = [
+        ("entity", entity.get('url', '') or '', f"{run_id}\t{query}", *entity_document(entity))
+        for entity in results
+    ]
+    vectors = _embed_documents(docs)
+    with connect() as conn:
+        # Another save of the same run may have indexed it while this one was embedding
+        if conn.execute("SELECT 1 FROM search_sources WHERE source = ?", (source,)).fetchone():
+            return 0
+        return _replace_source(conn, source, run_id, docs, vectors)
+
+
+def sync_transcripts(transcript_dir=TRANSCRIPT_DIR):
+    """
+    Index new or changed transcripts and drop deleted ones
+
+    Only a stat() per file is needed when nothing has changed.
+
+    Args:
+        transcript_dir (str): Directory of markdown transcripts
+
+    Returns:
+        int: Number of transcripts (re)indexed
+    """
+    _init_schema()
+    paths = sorted(glob.glob(os.path.join(transcript_dir, "*.md")))
+    with connect() as conn:
+        versions = {
+            row["source"]: row["version"]
+            for row in conn.execute("SELECT source, version FROM search_sources WHERE source LIKE 'transcript:%'")
+        }
+
+    updated = 0
+    for path in paths:
+        source = f"transcript:{os.path.basename(path)}"
+        stat = os.stat(path)
+        version = f"{stat.st_mtime_ns}:{stat.st_size}"
+        if versions.pop(source, None) == version:
+            continue
+
+        with open(path, 'r', encoding='utf-8') as f:
+            passages = split_content(f.read(), TRANSCRIPT_PASSAGE_CHARS)
+        title = os.path.splitext(os.path.basename(path))[0].replace('-', ' ').title()
+        docs = [
+            ("transcript", path, f"Passage {i + 1} of {len(passages)}", title, passage)
+            for i, passage in enumerate(passages)
+        ]
+        vectors = _embed_documents(docs)
+        with connect() as conn:
+            _replace_source(conn, source, version, docs, vectors)
+        updated += 1
+
+    # Whatever is left was indexed before but no longer exists on disk
+    if versions:
+        with connect() as conn:
+            for source in versions:
+                _replace_source(conn, source, "deleted", [])
+            conn.executemany("DELETE FROM search_sources WHERE source = ?", [(source,) for source in versions])
+    return updated
+
+
+def _fts_query(text):
+    """Turn free text into an FTS5 query that matches any of its terms"""
+    terms = re.findall(r"\w+", text.lower())
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def _result(row, score):
+    context = row["context"] or ""
+    run_id, _, query = context.partition("\t")
+    return {
+        "doc_id": row["doc_id"],
+        "kind": row["kind"],
+        "title": row["title"],
+        "url": row["url"],
+        "run_id": run_id if row["kind"] == "entity" else None,
+        "query": query if row["kind"] == "entity" else None,
+        "context": context if row["kind"] != "entity" else query,
+        "snippet": row["snippet"],
+        "score": score,
+    }
+
+
+def keyword_search(text, limit=20, kind=None):
+    """
+    Rank documents by BM25 over their title and body
+
+    Args:
+        text (str): Free-text query
+        limit (int): Maximum number of results
+        kind (str): Restrict to "entity" or "transcript" documents
+
+    Returns:
+        list: Result dicts, best match first
+    """
+    _init_schema()
+    match = _fts_query(text)
+    if not match:
+        return []
+    # bm25() weights follow column order: source, kind, url, context, title, body
+    sql = f"""
+        SELECT rowid AS doc_id, kind, url, context, title,
+               snippet(search_fts, 5, '**', '**', '…', {SNIPPET_TOKENS}) AS snippet,
+               bm25(search_fts, 0, 0, 0, 0, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank
+        FROM search_fts
+        WHERE search_fts MATCH ? {"AND kind = ?" if kind else ""}
+        ORDER BY rank
+        LIMIT ?
+    """
+    params = (match, kind, limit) if kind else (match, limit)
+    with connect() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    # SQLite's bm25() is negative, lower is better
+    return [_result(row, -row["rank"]) for row in rows]
+
+
+def _load_vectors():
+    """Load every stored vector into one normalized matrix, reloading only when the table changes"""
+    global _vector_cache
+    with connect() as conn:
+        version = tuple(conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(doc_id), 0) FROM search_vectors WHERE model = ?", (EMBEDDING_MODEL,)
+        ).fetchone())
+        with _vector_lock:
+            if _vector_cache is not None and _vector_cache[0] == version:
+                return _vector_cache[1], _vector_cache[2]
+            rows = conn.execute(
+                "SELECT doc_id, vector FROM search_vectors WHERE model = ? ORDER BY doc_id", (EMBEDDING_MODEL,)
+            ).fetchall()
+            doc_ids = np.array([row["doc_id"] for row in rows], dtype=np.int64)
+            matrix = (
+                np.frombuffer(b"".join(row["vector"] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+                if rows else np.empty((0, 0), dtype=np.float32)
+            )
+            _vector_cache = (version, doc_ids, matrix)
+            return doc_ids, matrix
+
+
+def _fetch_docs(doc_ids):
+    """Load display rows for doc IDs, in the given order"""
+    if not doc_ids:
+        return {}
+    placeholders = ",".join("?" * len(doc_ids))
+    with connect() as conn:
+        rows = conn.execute(
+            f"SELECT rowid AS doc_id, kind, url, context, title, substr(body, 1, 240) AS snippet "
+            f"FROM search_fts WHERE rowid IN ({placeholders})",
+            [int(doc_id) for doc_id in doc_ids]
+        ).fetchall()
+    return {row["doc_id"]: row for row in rows}
+
+
+def semantic_search(text, limit=20, kind=None):
+    """
+    Rank documents by cosine similarity to the query embedding
+
+    The whole matrix is scanned with one matrix-vector product, which is exact
+    and stays in the low milliseconds for tens of thousands of documents.
+
+    Args:
+        text (str): Free-text query
+        limit (int): Maximum number of results
+        kind (str): Restrict to "entity" or "transcript" documents
+
+    Returns:
+        list: Result dicts, best match first (empty if semantic search is unavailable)
+    """
+    _init_schema()
+    if not text.strip() or not semantic_search_available() or get_embedder() is None:
+        return []
+    doc_ids, matrix = _load_vectors()
+    if not len(doc_ids):
+        return []
+
+    scores = matrix @ _embed([text])[0]
+    # Over-fetch when filtering by kind, since the filter is applied after ranking
+    top_n = min(len(scores), limit * 4 if kind else limit)
+    top = np.argpartition(-scores, top_n - 1)[:top_n]
+    top = top[np.argsort(-scores[top])]
+
+    rows = _fetch_docs(doc_ids[top].tolist())
+    results = []
+    for index in top:
+        row = rows.get(int(doc_ids[index]))
+        if row is None or (kind and row["kind"] != kind):
+            continue
+        results.append(_result(row, float(scores[index])))
+        if len(results) == limit:
+            break
+    return results
+
+
+def search(text, limit=20, kind=None, mode="hybrid"):
+    """
+    Search saved companies and transcripts
+
+    Hybrid mode merges the keyword and semantic rankings with reciprocal rank
+    fusion, and is the same as keyword mode when embeddings aren't available.
+
+    Args:
+        text (str): Free-text query
+        limit (int): Maximum number of results
+        kind (str): Restrict to "entity" or "transcript" documents
+        mode (str): One of SEARCH_MODES
+
+    Returns:
+        list: Result dicts, best match first
+    """
+    if mode == "keyword" or (mode == "hybrid" and not semantic_search_available()):
+        return keyword_search(text, limit, kind)
+    if mode == "semantic":
+        return semantic_search(text, limit, kind)
+
+    fused = {}
+    for ranking in (keyword_search(text, limit * 2, kind), semantic_search(text, limit * 2, kind)):
+        for rank, result in enumerate(ranking):
+            entry = fused.setdefault(result["doc_id"], dict(result, score=0.0))
+            entry["score"] += 1.0 / (RRF_K + rank + 1)
+            # Prefer the highlighted keyword snippet when both rankings found the document
+            if "**" in result["snippet"]:
+                entry["snippet"] = result["snippet"]
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:limit]
+
+
+def indexed_run_ids():
+    """
+    Returns:
+        set: IDs of the runs in the search index
+    """
+    _init_schema()
+    with connect() as conn:
+        return {
+            row["version"]
+            for row in conn.execute("SELECT version FROM search_sources WHERE source LIKE 'run:%'")
+        }
+
+
+def indexed_document_count():
+    """
+    Returns:
+        int: Number of documents in the search index
+    """
+    _init_schema()
+    with connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM search_fts").fetchone()[0]
@@ -0,0 +1,214 @@
+"""
+Persistent cache of FindAll ingest specs
+
+Ingest turns a query into a findall_spec (the entity type, match conditions
+and enrichment columns). Specs are cached by normalized query, so a repeat
+search skips the ingest round-trip and gets the same column schema, which
+keeps results from different runs mergeable. Users can pin a spec to keep it
+out of eviction, edit it, and launch new runs straight from it.
+"""
+import json
+import time
+
+from local_db import connect
+from query_dedup import normalize_query
+
+# Configuration
+SPEC_CACHE_MAX_BYTES = 5 * 1024 * 1024
+
+_schema_ready = False
+
+
+def _init_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with connect() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS findall_specs (
+                spec_key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                spec TEXT NOT NULL,
+                pinned INTEGER NOT NULL DEFAULT 0,
+                edited INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_findall_specs_used ON findall_specs (pinned, last_used)")
+    _schema_ready = True
+
+
+def spec_key(query):
+    """
+    Build the cache key for a query
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        str: Normalized query
+    """
+    return normalize_query(query)
+
+
+def _row_to_spec(row):
+    return {
+        "query": row["query"],
+        "spec": json.loads(row["spec"]),
+        "pinned": bool(row["pinned"]),
+        "edited": bool(row["edited"]),
+        "last_used": row["last_used"],
+    }
+
+
+def get_spec_entry(query):
+    """
+    Look up a query's cached spec without marking it as used
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        dict: query, spec, pinned, edited and last_used, or None on a miss
+    """
+    _init_schema()
+    with connect() as conn:
+        row = conn.execute("SELECT * FROM findall_specs WHERE spec_key = ?", (spec_key(query),)).fetchone()
+    return _row_to_spec(row) if row else None
+
+
+def get_cached_spec(query):
+    """
+    Look up the spec for a query and mark it as recently used
+
+    Args:
+        query (str): Search query
+
+    Returns:
+        dict: findall_spec or None on a miss
+    """
+    _init_schema()
+    key = spec_key(query)
+    with connect() as conn:
+        row = conn.execute("SELECT spec FROM findall_specs WHERE spec_key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE findall_specs SET last_used = ? WHERE spec_key = ?", (time.time(), key))
+    return json.loads(row["spec"])
+
+
+def store_spec(query, spec, max_bytes=SPEC_CACHE_MAX_BYTES):
+    """
+    Cache an ingested spec and evict least recently used unpinned specs beyond the size budget
+
+    A pinned spec is never replaced by a fresh ingest, so edits stick.
+
+    Args:
+        query (str): Search query
+        spec (dict): findall_spec returned by ingest
+        max_bytes (int): Size budget for the unpinned specs
+    """
+    _init_schema()
+    now = time.time()
+    encoded = json.dumps(spec)
+    with connect() as conn:
+        conn.execute("""
+            INSERT INTO findall_specs (spec_key, query, spec, size, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (spec_key) DO UPDATE SET
+                query = excluded.query, spec = excluded.spec, size = excluded.size, last_used = excluded.last_used
+            WHERE pinned = 0
+        """, (spec_key(query), query, encoded, len(encoded), now, now))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM findall_specs WHERE pinned = 0").fetchone()[0]
+        if total <= max_bytes:
+            return
+
+        for row in conn.execute(
+            "SELECT spec_key, size FROM findall_specs WHERE pinned = 0 ORDER BY last_used"
+        ).fetchall():
+            if total <= max_bytes:
+                break
+            conn.execute("DELETE FROM findall_specs WHERE spec_key = ?", (row["spec_key"],))
+            total -= row["size"]
+
+
+def pin_spec(query, spec=None, pinned=True):
+    """
+    Pin or unpin a query's spec
+
+    Args:
+        query (str): Search query
+        spec (dict): Spec to pin, e.g. the one a job ran with; replaces the query's cached spec
+        pinned (bool): False to unpin, which makes the spec evictable again
+
+    Returns:
+        bool: True if a spec was updated
+    """
+    _init_schema()
+    now = time.time()
+    with connect() as conn:
+        if spec is not None and pinned:
+            encoded = json.dumps(spec)
+            # The edited flag only survives if the pinned spec is the edited one
+            return conn.execute("""
+                INSERT INTO findall_specs (spec_key, query, spec, pinned, size, created_at, last_used)
+                VALUES (?, ?, ?, 1, ?, ?, ?)
+                ON CONFLICT (spec_key) DO UPDATE SET
+                    spec = excluded.spec, pinned = 1, size = excluded.size, last_used = excluded.last_used,
+                    edited = CASE WHEN spec = excluded.spec THEN edited ELSE 0 END
+            """, (spec_key(query), query, encoded, len(encoded), now, now)).rowcount > 0
+        return conn.execute(
+            "UPDATE findall_specs SET pinned = ? WHERE spec_key = ?", (int(pinned), spec_key(query))
+        ).rowcount > 0
+
+
+def update_spec(query, spec):
+    """
+    Replace a query's spec with an edited version and pin it
+
+    Args:
+        query (str): Search query
+        spec (dict): Edited findall_spec
+    """
+    _init_schema()
+    now = time.time()
+    encoded = json.dumps(spec)
+    with connect() as conn:
+        conn.execute("""
+            INSERT INTO findall_specs (spec_key, query, spec, pinned, edited, size, created_at, last_used)
+            VALUES (?, ?, ?, 1, 1, ?, ?, ?)
+            ON CONFLICT (spec_key) DO UPDATE SET
+                spec = excluded.spec, pinned = 1, edited = 1, size = excluded.size, last_used = excluded.last_used
+        """, (spec_key(query), query, encoded, len(encoded), now, now))
+
+
+def list_pinned_specs():
+    """
+    List pinned specs, most recently used first
+
+    Returns:
+        list: Dicts with query, spec, pinned, edited and last_used
+    """
+    _init_schema()
+    with connect() as conn:
+        rows = conn.execute(
+            "SELECT * FROM findall_specs WHERE pinned = 1 ORDER BY last_used DESC"
+        ).fetchall()
+    return [_row_to_spec(row) for row in rows]
+
+
+def is_spec_pinned(query):
+    """
+    Args:
+        query (str): Search query
+
+    Returns:
+        bool: True if the query's spec is pinned
+    """
+    _init_schema()
+    with connect() as conn:
+        row = conn.execute("SELECT pinned FROM findall_specs WHERE spec_key = ?", (spec_key(query),)).fetchone()
+    return bool(row and row["pinned"])
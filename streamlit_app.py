@@ -3,7 +3,10 @@ Thesis Extraction & Company Search
 Main Streamlit application for thesis extraction and company search
 """
 import streamlit as st
+from metrics import start_metrics_server
+from metrics_tab import render_metrics_tab
 from parallel_findall import render_parallel_findall_tab
+from results_export import start_export_server
 from thesis_extraction import render_thesis_extraction_tab
 
 
@@ -22,8 +25,13 @@ def main():
    2. Copy and paste a search query into "New Search" to get a list of companies, powered by parallel.ai's FindAll API (or I recommend using Parallel's interface directly: https://platform.parallel.ai/find-all)
     """)
 
+    # Serve /metrics for Prometheus when METRICS_PORT is set
+    start_metrics_server()
+    # Serve /export/... for notebooks when EXPORT_PORT is set
+    start_export_server()
+
     # Create tabs for different functionalities
-    tab1, tab2, tab3 = st.tabs(["📝 Thesis Extraction", "🔍 New Search", "📚 Search History"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📝 Thesis Extraction", "🔍 New Search", "📚 Search History", "📈 Metrics"])
 
     with tab1:
         render_thesis_extraction_tab()
@@ -33,6 +41,9 @@ def main():
 
     with tab3:
         render_parallel_findall_tab(tab_type="search_history")
+
+    with tab4:
+        render_metrics_tab()
   
 
 
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+import local_db
+from findall_jobs import FindAllOrchestrator
+
+
+class FakePoller:
+    """Records watched runs; tests finish them by calling their callbacks"""
+
+    def __init__(self):
+        self.watches = {}
+        self.watched = threading.Condition()
+
+    def watch(self, key, fetch, on_done, on_error=None, started_at=None, on_progress=None):
+        with self.watched:
+            self.watches[key] = on_done
+            self.watched.notify_all()
+        return True
+
+    def record_duration(self, seconds):
+        pass
+
+    def wait_for(self, count, timeout=5):
+        with self.watched:
+            assert self.watched.wait_for(lambda: len(self.watches) >= count, timeout), self.watches
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_db, "DATA_DIR", str(tmp_path))
+    poller = FakePoller()
+    saved = []
+    runs = iter(f"findall_{i}" for i in range(100))
+    orchestrator = FindAllOrchestrator(
+        ingest=lambda query, api_key: {"columns": []},
+        start_run=lambda spec, result_limit, api_key, processor="base": next(runs),
+        fetch_run=lambda findall_id, api_key: {},
+        save=lambda query, run_id, results, columns, timestamp: saved.append(run_id) or True,
+        get_api_key=lambda: "key",
+        poller=poller,
+        max_workers=1,
+        max_concurrent_runs=1,
+    )
+    return orchestrator, poller, saved
+
+
+def test_jobs_waiting_for_a_run_slot_do_not_block_saves(orchestrator):
+    orchestrator, poller, saved = orchestrator
+    job_ids = [orchestrator.submit(f"Find all startups, batch query {i}") for i in range(3)]
+
+    poller.wait_for(1)
+    wait_until(lambda: orchestrator.get_job(job_ids[1])["status"] == "queued")
+    assert list(poller.watches) == ["findall_0"]
+
+    # With a single worker, the save only runs if the queued jobs aren't holding it
+    poller.watches["findall_0"]({"results": [{"name": "Acme"}]})
+    wait_until(lambda: orchestrator.get_job(job_ids[0])["status"] == "completed")
+    assert saved == ["findall_0"]
+
+    poller.wait_for(2)
+    poller.watches["findall_1"]({"results": []})
+    poller.wait_for(3)
+    poller.watches["findall_2"]({"results": []})
+    wait_until(lambda: all(orchestrator.get_job(job_id)["status"] == "completed" for job_id in job_ids))
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from gsheets_history import INDEX_WORKSHEET, GSheetsWriter
+from mock_server import MockGSheetsConnection
+
+
+@pytest.fixture
+def conn():
+    return MockGSheetsConnection(latency=0)
+
+
+def make_writer(conn):
+    return GSheetsWriter(get_connection=lambda: conn, coalesce_seconds=0, max_retries=0,
+                         index_retry_seconds=60, sleep=lambda seconds: None)
+
+
+def save(writer, run_id):
+    return writer.write(f"Find all startups for {run_id}", run_id, [], [], "2025-06-01 09:00:00")
+
+
+def test_first_save_creates_the_index(conn):
+    writer = make_writer(conn)
+    save(writer, "findall_1")
+
+    assert writer.flush() is True
+    assert conn.worksheets[INDEX_WORKSHEET]["Run_ID"].tolist() == ["findall_1"]
+
+
+def test_index_read_failure_keeps_history_and_retries_the_rows(conn, monkeypatch):
+    conn.worksheets[INDEX_WORKSHEET] = pd.DataFrame([{
+        "Timestamp": "2025-05-01 09:00:00", "Query": "Find all older startups", "Run_ID": "findall_0",
+        "Result_Count": 3, "Worksheet": "2025-05-01_09-00-00",
+    }])
+    writer = make_writer(conn)
+    read = conn.read
+
+    def failing_read(**kwargs):
+        raise ConnectionError("Sheets API unreachable")
+
+    monkeypatch.setattr(conn, "read", failing_read)
+    save(writer, "findall_1")
+
+    assert writer.flush() is False
+    assert conn.worksheets[INDEX_WORKSHEET]["Run_ID"].tolist() == ["findall_0"]
+    assert writer.pending() == 1
+
+    monkeypatch.setattr(conn, "read", read)
+
+    assert writer.flush() is True
+    assert conn.worksheets[INDEX_WORKSHEET]["Run_ID"].tolist() == ["findall_0", "findall_1"]
+
+
+def test_worksheet_names_made_in_the_same_second_are_unique(conn):
+    writer = make_writer(conn)
+
+    names = [save(writer, f"findall_{i}") for i in range(5)]
+
+    assert len(set(names)) == 5
+    assert writer.flush() is True
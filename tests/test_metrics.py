@@ -0,0 +1,44 @@
+import json
+import threading
+
+from metrics import MetricsRegistry
+
+
+def test_spans_from_many_threads_are_written_as_whole_lines(tmp_path):
+    trace_file = tmp_path / "traces.jsonl"
+    registry = MetricsRegistry(trace_file=str(trace_file))
+
+    def record_spans(worker):
+        for i in range(200):
+            with registry.span("test.stage", worker=worker) as attributes:
+                attributes["i"] = i
+
+    threads = [threading.Thread(target=record_spans, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.flush()
+
+    records = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert len(records) == 800
+    assert {(record["worker"], record["i"]) for record in records} == {(w, i) for w in range(4) for i in range(200)}
+
+
+def test_trace_file_is_rotated_once_it_gets_too_big(tmp_path):
+    trace_file = tmp_path / "traces.jsonl"
+    registry = MetricsRegistry(trace_file=str(trace_file), trace_max_bytes=100)
+
+    registry.trace({"message": "x" * 200})
+    registry.flush()
+    registry.trace({"message": "after rotation"})
+    registry.flush()
+
+    assert json.loads((tmp_path / "traces.jsonl.1").read_text())["message"] == "x" * 200
+    assert json.loads(trace_file.read_text())["message"] == "after rotation"
+
+
+def test_no_trace_file_writes_nothing():
+    registry = MetricsRegistry(trace_file=None)
+    registry.trace({"message": "dropped"})
+    registry.flush()
@@ -0,0 +1,26 @@
+import pytest
+
+from poll_scheduler import next_poll_delay
+
+
+def test_delay_is_half_the_remaining_expected_time():
+    assert next_poll_delay(elapsed=100, expected_duration=200, min_interval=5, max_interval=60) == 50
+
+
+def test_delay_is_clamped_to_max_interval_early_in_a_run():
+    assert next_poll_delay(elapsed=0, expected_duration=240, min_interval=5, max_interval=60) == 60
+
+
+def test_delay_is_clamped_to_min_interval_near_expected_completion():
+    assert next_poll_delay(elapsed=238, expected_duration=240, min_interval=5, max_interval=60) == 5
+
+
+@pytest.mark.parametrize("overdue_polls, expected", [(0, 5), (1, 10), (2, 20), (3, 40), (4, 60), (10, 60)])
+def test_overdue_runs_back_off_exponentially_up_to_max_interval(overdue_polls, expected):
+    delay = next_poll_delay(elapsed=300, expected_duration=240, overdue_polls=overdue_polls,
+                            min_interval=5, max_interval=60)
+    assert delay == expected
+
+
+def test_run_at_exactly_its_expected_duration_counts_as_overdue():
+    assert next_poll_delay(elapsed=240, expected_duration=240, min_interval=5, max_interval=60) == 5
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pandas as pd
+
+from query_dedup import find_prior_run, normalize_query
+
+NOW = datetime(2025, 6, 30, 12, 0, 0)
+BOILERPLATE = "Find all seed or pre-seed startups that have raised less than $10M"
+
+
+def history(*rows):
+    return pd.DataFrame(
+        [{"Timestamp": timestamp, "Query": query, "Run_ID": run_id, "Result_Count": count, "Worksheet": None}
+         for timestamp, query, run_id, count in rows]
+    )
+
+
+def test_normalize_query_ignores_case_punctuation_and_whitespace():
+    assert normalize_query("  Find ALL startups, building   climate-insurance!") == \
+        "find all startups building climate insurance"
+
+
+def test_empty_history_has_no_prior_run():
+    assert find_prior_run("Find all startups", pd.DataFrame(), now=NOW) is None
+    assert find_prior_run("Find all startups", None, now=NOW) is None
+
+
+def test_exact_match_after_normalization():
+    df = history(("2025-06-28 09:00:00", "Find all startups building climate insurance.", "findall_1", 12))
+
+    prior = find_prior_run("find all startups building  Climate Insurance", df, now=NOW)
+
+    assert prior["run_id"] == "findall_1"
+    assert prior["exact"] is True
+    assert prior["similarity"] == 1.0
+    assert prior["result_count"] == 12
+    assert prior["fresh"] is True
+    assert round(prior["age_days"], 3) == 2.125
+
+
+def test_runs_without_results_are_ignored():
+    df = history(("2025-06-28 09:00:00", "Find all startups building climate insurance", "findall_1", 0))
+
+    assert find_prior_run("Find all startups building climate insurance", df, now=NOW) is None
+
+
+def test_shared_boilerplate_alone_is_not_a_near_duplicate():
+    df = history(
+        ("2025-06-20 09:00:00", f"{BOILERPLATE} building carbon removal marketplaces", "findall_1", 10),
+        ("2025-06-21 09:00:00", f"{BOILERPLATE} building wildfire detection networks", "findall_2", 10),
+        ("2025-06-22 09:00:00", f"{BOILERPLATE} building grid battery storage", "findall_3", 10),
+    )
+
+    assert find_prior_run(f"{BOILERPLATE} building climate insurance platforms", df, now=NOW) is None
+
+
+def test_near_duplicate_above_threshold_is_found():
+    df = history(
+        ("2025-06-20 09:00:00", f"{BOILERPLATE} building parametric climate insurance platforms", "findall_1", 10),
+        ("2025-06-21 09:00:00", f"{BOILERPLATE} building wildfire detection networks", "findall_2", 10),
+    )
+
+    prior = find_prior_run(f"{BOILERPLATE} that are building parametric climate insurance platforms", df,
+                           threshold=0.8, now=NOW)
+
+    assert prior["run_id"] == "findall_1"
+    assert prior["exact"] is False
+    assert 0.8 <= prior["similarity"] < 1.0
+
+
+def test_newest_run_wins_a_tie():
+    df = history(
+        ("2025-06-01 09:00:00", "Find all climate insurance startups", "findall_old", 10),
+        ("2025-06-25 09:00:00", "Find all climate insurance startups", "findall_new", 8),
+    )
+
+    assert find_prior_run("Find all climate insurance startups", df, now=NOW)["run_id"] == "findall_new"
+
+
+def test_old_runs_are_found_but_not_fresh():
+    df = history(("2025-01-01 09:00:00", "Find all climate insurance startups", "findall_1", 10))
+
+    prior = find_prior_run("Find all climate insurance startups", df, freshness_days=30, now=NOW)
+
+    assert prior["run_id"] == "findall_1"
+    assert prior["fresh"] is False
+
+
+def test_unparseable_timestamp_is_never_fresh():
+    df = history(("not a date", "Find all climate insurance startups", "findall_1", 10))
+
+    prior = find_prior_run("Find all climate insurance startups", df, now=NOW)
+
+    assert prior["age_days"] is None
+    assert prior["fresh"] is False
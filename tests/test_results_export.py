@@ -0,0 +1,89 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import local_db
+import results_export
+from history_store import LocalHistoryStore
+from results_frame import create_results_dataframe
+
+RESULTS = [
+    {
+        "name": "Acme", "score": 0.9, "url": "https://acme.com", "description": "Parametric cover",
+        "enrichment_results": [{"key": "ceo_name", "value": "Ada"}],
+        "filter_results": [{"key": "funding_stage_check", "value": "yes", "reasoning": "Seed round in 2024"}],
+    },
+    {
+        "name": "Globex", "score": 0.7, "url": "https://globex.com", "description": "Wildfire sensors",
+        "enrichment_results": [{"key": "ceo_name", "value": "Hank"}, {"key": "total_funding_evidence", "value": "$4M"}],
+        "filter_results": [{"key": "funding_stage_check", "value": "no", "reasoning": ""}],
+    },
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_db, "DATA_DIR", str(tmp_path))
+    store = LocalHistoryStore()
+    monkeypatch.setattr(results_export, "get_history_store", lambda: store)
+    return store
+
+
+def read_export(export_format, run_id=None):
+    data = b"".join(results_export.iter_export_chunks(export_format, run_id, batch_size=1))
+    if export_format == "csv":
+        return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    if export_format == "arrow":
+        return pa.ipc.open_file(io.BytesIO(data)).read_all().to_pandas()
+    return pq.read_table(io.BytesIO(data)).to_pandas()
+
+
+def test_run_saved_without_columns_keeps_every_field(store):
+    store.save_run("Find all climate startups", "findall_1", RESULTS, [], "2025-06-01 09:00:00")
+
+    exported = read_export("parquet", "findall_1")
+
+    pd.testing.assert_frame_equal(exported, create_results_dataframe(RESULTS, []), check_dtype=False)
+
+
+def test_spec_that_does_not_match_the_entities_exports_what_the_entities_carry(store):
+    # The spec calls the filter an enrichment, and doesn't list total_funding_evidence at all
+    columns = [{"name": "funding_stage_check", "type": "enrichment"}, {"name": "ceo_name", "type": "enrichment"}]
+    store.save_run("Find all climate startups", "findall_1", RESULTS, columns, "2025-06-01 09:00:00")
+
+    exported = read_export("parquet", "findall_1")
+
+    assert "Funding Stage Check" not in exported.columns
+    assert exported["Funding Stage"].tolist() == ["YES: Seed round in 2024", "NO"]
+    assert exported["Total Funding"].isna().tolist() == [True, False]
+    assert exported["Total Funding"].iloc[1] == "$4M"
+    assert set(exported.columns) == set(create_results_dataframe(RESULTS, columns).columns)
+
+
+def test_spec_orders_the_columns(store):
+    columns = [{"name": "total_funding_evidence", "type": "enrichment"}, {"name": "ceo_name", "type": "enrichment"}]
+    store.save_run("Find all climate startups", "findall_1", RESULTS, columns, "2025-06-01 09:00:00")
+
+    exported = read_export("csv", "findall_1")
+
+    assert exported.columns.tolist() == ["Name", "Score", "URL", "Description", "Total Funding", "Ceo Name",
+                                         "Funding Stage"]
+
+
+def test_merged_export_covers_the_fields_of_every_run(store):
+    store.save_run("Find all climate startups", "findall_1", RESULTS[:1], [], "2025-06-01 09:00:00")
+    store.save_run("Find all wildfire startups", "findall_2", RESULTS[1:], [], "2025-06-02 09:00:00")
+
+    exported = read_export("arrow")
+
+    assert exported["Run_ID"].tolist() == ["findall_1", "findall_2"]
+    assert exported["Total Funding"].isna().tolist() == [True, False]
+    assert exported["Total Funding"].iloc[1] == "$4M"
+
+
+def test_unknown_run_raises_key_error(store):
+    with pytest.raises(KeyError):
+        read_export("parquet", "findall_missing")
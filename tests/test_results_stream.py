@@ -0,0 +1,79 @@
+from results_stream import ResultsAccumulator
+
+
+def entity(name, url, enrichments=None, filters=None):
+    return {
+        "name": name,
+        "url": url,
+        "enrichment_results": [{"key": key, "value": value} for key, value in (enrichments or {}).items()],
+        "filter_results": [{"key": key, "value": value} for key, value in (filters or {}).items()],
+    }
+
+
+def test_first_poll_reports_every_entity_as_new():
+    accumulator = ResultsAccumulator()
+    results = [entity("Acme", "https://acme.com"), entity("Globex", "https://globex.com")]
+
+    delta = accumulator.update(results)
+
+    assert delta == {"new": results, "updated": []}
+    assert accumulator.results == results
+
+
+def test_unchanged_poll_reports_nothing():
+    accumulator = ResultsAccumulator()
+    accumulator.update([entity("Acme", "https://acme.com", {"ceo": "Ada"})])
+
+    delta = accumulator.update([entity("Acme", "https://acme.com", {"ceo": "Ada"})])
+
+    assert delta == {"new": [], "updated": []}
+
+
+def test_only_entities_found_since_the_last_poll_are_new():
+    accumulator = ResultsAccumulator()
+    accumulator.update([entity("Acme", "https://acme.com")])
+    globex = entity("Globex", "https://globex.com")
+
+    delta = accumulator.update([entity("Acme", "https://acme.com"), globex])
+
+    assert delta == {"new": [globex], "updated": []}
+
+
+def test_newly_filled_enrichment_or_filter_is_an_update():
+    accumulator = ResultsAccumulator()
+    accumulator.update([
+        entity("Acme", "https://acme.com", {"ceo": ""}),
+        entity("Globex", "https://globex.com"),
+    ])
+    acme = entity("Acme", "https://acme.com", {"ceo": "Ada"})
+    globex = entity("Globex", "https://globex.com", filters={"is_seed_stage": "yes"})
+
+    delta = accumulator.update([acme, globex])
+
+    assert delta == {"new": [], "updated": [acme, globex]}
+
+
+def test_changed_value_of_an_already_filled_field_is_not_an_update():
+    accumulator = ResultsAccumulator()
+    accumulator.update([entity("Acme", "https://acme.com", {"ceo": "Ada"})])
+
+    delta = accumulator.update([entity("Acme", "https://acme.com", {"ceo": "Ada Lovelace"})])
+
+    assert delta["updated"] == []
+
+
+def test_entities_are_matched_by_id_then_domain_then_name():
+    accumulator = ResultsAccumulator()
+    accumulator.update([
+        {"id": "entity_1", "name": "Acme", "url": "https://acme.com"},
+        entity("Globex", "https://www.globex.com/about"),
+        entity("Initech", ""),
+    ])
+
+    delta = accumulator.update([
+        {"id": "entity_1", "name": "Acme Corp", "url": "https://acme.io"},
+        entity("Globex Inc", "http://globex.com"),
+        entity("initech", ""),
+    ])
+
+    assert delta == {"new": [], "updated": []}
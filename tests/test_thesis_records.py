@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from thesis_records import Thesis, ThesisStreamParser, parse_theses, queries_from_theses
+
+RESPONSE = json.dumps({"theses": [
+    {
+        "thesis": "Climate risk is being priced into insurance",
+        "insights": ["Parametric cover pays out on measured events", "Parametric cover pays out on measured events"],
+        "queries": ["Find all parametric insurance startups", " "],
+    },
+    {
+        "thesis": "Brackets {like these} and \"quotes\" inside strings don't confuse the parser",
+        "insights": [],
+        "queries": ["Find all startups using [brackets] in names", "Find all parametric insurance startups"],
+    },
+]})
+
+
+def feed_in_chunks(parser, text, size):
+    completed = []
+    for i in range(0, len(text), size):
+        completed.append(parser.feed(text[i:i + size]))
+    return completed
+
+
+@pytest.mark.parametrize("size", [1, 3, 16, len(RESPONSE)])
+def test_theses_are_parsed_whatever_the_chunk_boundaries(size):
+    parser = ThesisStreamParser()
+
+    feed_in_chunks(parser, RESPONSE, size)
+
+    assert parser.close() == [
+        Thesis("Climate risk is being priced into insurance",
+               ("Parametric cover pays out on measured events",),
+               ("Find all parametric insurance startups",)),
+        Thesis("Brackets {like these} and \"quotes\" inside strings don't confuse the parser",
+               (),
+               ("Find all startups using [brackets] in names", "Find all parametric insurance startups")),
+    ]
+
+
+def test_each_thesis_is_yielded_as_soon_as_its_object_closes():
+    parser = ThesisStreamParser()
+    first_end = RESPONSE.index("}, {") + 1
+
+    assert parser.feed(RESPONSE[:first_end - 1]) == []
+    assert [thesis.statement for thesis in parser.feed(RESPONSE[first_end - 1:first_end])] == \
+        ["Climate risk is being priced into insurance"]
+    assert len(parser.feed(RESPONSE[first_end:])) == 1
+
+
+def test_code_fence_around_the_json_is_ignored():
+    assert len(parse_theses(f"```json\n{RESPONSE}\n```")) == 2
+
+
+def test_objects_without_a_thesis_statement_are_skipped():
+    text = json.dumps({"theses": [{"thesis": " ", "insights": [], "queries": []},
+                                  {"thesis": "Kept", "insights": [], "queries": []}]})
+
+    assert [thesis.statement for thesis in parse_theses(text)] == ["Kept"]
+
+
+def test_empty_theses_array_is_a_valid_response():
+    assert parse_theses('```json\n{"theses": []}\n```') == []
+
+
+@pytest.mark.parametrize("text", ['{"theses": [{"thesis": "cut off', '{"answer": []}', "not json"])
+def test_response_without_parseable_theses_raises(text):
+    with pytest.raises(ValueError):
+        parse_theses(text)
+
+
+def test_queries_from_theses_keeps_first_occurrence_order():
+    assert queries_from_theses(parse_theses(RESPONSE)) == [
+        "Find all parametric insurance startups",
+        "Find all startups using [brackets] in names",
+    ]
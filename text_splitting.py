@@ -0,0 +1,71 @@
+"""
+Splitting long text into chunks at natural boundaries
+
+Kept free of any dependencies, so both the chunked thesis extraction and
+the local search index can use it without importing each other's stack.
+"""
+import re
+
+# A markdown heading, or a speaker turn like "Me:" / "Them:" / "Jane Doe:" at the start of a line
+BOUNDARY_PATTERN = re.compile(r"^(?:#{1,6}\s|[A-Z][\w.'-]*(?: [A-Z][\w.'-]*){0,3}:\s)", re.MULTILINE)
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def _pack(pieces, max_chars, separator):
+    """Greedily pack pieces into chunks of at most max_chars"""
+    chunks = []
+    current = []
+    size = 0
+    for piece in pieces:
+        added = len(piece) + (len(separator) if current else 0)
+        if current and size + added > max_chars:
+            chunks.append(separator.join(current))
+            current, size = [], 0
+            added = len(piece)
+        current.append(piece)
+        size += added
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def _split_oversized(segment, max_chars):
+    """Split a segment that is too long on its own at paragraph, then sentence, then hard boundaries"""
+    if len(segment) <= max_chars:
+        return [segment]
+
+    paragraphs = [p for p in re.split(r"\n\s*\n", segment) if p.strip()]
+    if len(paragraphs) > 1:
+        return [chunk for p in paragraphs for chunk in _split_oversized(p, max_chars)]
+
+    sentences = SENTENCE_END_PATTERN.split(segment)
+    if len(sentences) > 1:
+        pieces = [piece for s in sentences for piece in _split_oversized(s, max_chars)]
+        return _pack(pieces, max_chars, " ")
+
+    return [segment[i:i + max_chars] for i in range(0, len(segment), max_chars)]
+
+
+def split_content(content, max_chars):
+    """
+    Split content into chunks on markdown headings or speaker turns
+
+    Segments are packed together up to max_chars. A single segment that is
+    longer than that (transcripts often have one speaker turn per very long
+    line) is split further at paragraph and then sentence boundaries.
+
+    Args:
+        content (str): Content to split
+        max_chars (int): Maximum characters per chunk
+
+    Returns:
+        list: Chunks in document order
+    """
+    starts = [match.start() for match in BOUNDARY_PATTERN.finditer(content)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(content)]
+    segments = [content[bounds[i]:bounds[i + 1]].strip() for i in range(len(starts))]
+
+    pieces = [piece for segment in segments if segment for piece in _split_oversized(segment, max_chars)]
+    return _pack(pieces, max_chars, "\n\n")
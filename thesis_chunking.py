@@ -0,0 +1,99 @@
+"""
+Chunked map-reduce thesis extraction for long transcripts
+
+Long content is split on markdown headings or speaker turns, each chunk is
+analyzed in parallel (map), and a final streamed call merges and dedupes
+the partial theses into the usual "#### Thesis N / Search Queries" format
+(reduce). Latency then grows with chunk count / parallelism instead of with
+transcript length.
+"""
+import asyncio
+
+from async_engine import complete_chat, stream_chat_completion
+from metrics import span
+from text_splitting import split_content
+from thesis_records import STRUCTURED_OUTPUT_FORMAT
+
+# Configuration
+CHUNK_THRESHOLD_CHARS = 40_000
+CHUNK_MAX_CHARS = 20_000
+MAP_CONCURRENCY = 6
+
+
+REDUCE_INSTRUCTIONS = """
+        You are a thesis-driven investor at Union Square Ventures. You are given theses and search queries
+        that were extracted separately from consecutive excerpts of one longer piece of content
+        (notes, blog post, meeting transcript).
+
+        Merge them into a single list:
+        - Combine theses that describe the same idea and drop exact or near duplicates
+        - Keep the most specific and insightful theses, ordered by how strongly the content supports them
+        - Keep the key insights that best support each merged thesis
+        - Return maximum 2 search queries per thesis, in the format "Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, that... [thesis]"
+
+        """
+
+REDUCE_MARKDOWN_FORMAT = """Structure your response as:
+
+        #### Thesis 1: [Thesis in 1 concise sentence]
+        1. Key insight 1 explained in 1-2 concise sentences
+        2. Key insight 2 explained in 1-2 concise sentences
+        ...
+
+       **Search Queries:**
+        1. Find all [search query based on the thesis]
+        ...
+        """
+
+REDUCE_PROMPT = REDUCE_INSTRUCTIONS + REDUCE_MARKDOWN_FORMAT
+STRUCTURED_REDUCE_PROMPT = REDUCE_INSTRUCTIONS + STRUCTURED_OUTPUT_FORMAT
+
+
+async def stream_chunked_extraction(content, api_key, system_prompt, model,
+                                    max_chars=CHUNK_MAX_CHARS, concurrency=MAP_CONCURRENCY,
+                                    reduce_prompt=REDUCE_PROMPT, **completion_kwargs):
+    """
+    Extract theses from long content with parallel per-chunk calls and a streamed merge
+
+    Args:
+        content (str): Content to analyze
+        api_key (str): OpenRouter API key
+        system_prompt (str): Extraction prompt used for every chunk
+        model (str): OpenRouter model name
+        max_chars (int): Maximum characters per chunk
+        concurrency (int): Maximum chunk extractions in flight at once
+        reduce_prompt (str): Prompt for the merge step, in the same output format as system_prompt
+        **completion_kwargs: Extra chat completion arguments for every call, e.g. response_format
+
+    Yields:
+        str: Text deltas of the merged theses
+    """
+    chunks = split_content(content, max_chars)
+    if len(chunks) == 1:
+        async for delta in stream_chat_completion([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": chunks[0]}
+        ], model, api_key, **completion_kwargs):
+            yield delta
+        return
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def extract_chunk(index, chunk):
+        async with semaphore:
+            with span("openrouter.map_chunk", model=model):
+                return await complete_chat([
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"Excerpt {index + 1} of {len(chunks)}:\n\n{chunk}"}
+                ], model, api_key, **completion_kwargs)
+
+    partials = await asyncio.gather(*(extract_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+
+    merged_input = "\n\n".join(
+        f"--- Theses from excerpt {i + 1} ---\n{partial.strip()}" for i, partial in enumerate(partials)
+    )
+    async for delta in stream_chat_completion([
+        {"role": "system", "content": reduce_prompt},
+        {"role": "user", "content": merged_input}
+    ], model, api_key, **completion_kwargs):
+        yield delta
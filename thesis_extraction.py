@@ -2,68 +2,31 @@
 Thesis extraction functionality using OpenRouter API
 """
 import streamlit as st
-import os
-from openai import OpenAI
+import re
+from async_engine import get_background_loop, stream_chat_completion
+from history_store import get_history_store
+from parallel_findall import describe_prior_run, find_prior_search, get_findall_orchestrator, render_findall_jobs
+from markdown_stream import MarkdownStreamRenderer
+from metrics import increment, timed_stream
+from transcript_corpus import discover_documents, load_document_content
+from thesis_chunking import CHUNK_THRESHOLD_CHARS, REDUCE_PROMPT, STRUCTURED_REDUCE_PROMPT, stream_chunked_extraction
+from thesis_records import (
+    STRUCTURED_OUTPUT_FORMAT,
+    THESIS_RESPONSE_FORMAT,
+    ThesisStreamParser,
+    parse_theses,
+    queries_from_theses,
+    render_thesis_markdown,
+    render_theses_markdown,
+)
+from response_cache import cache_key, caching_stream, get_cached_response, replay_response
 
+# Matches numbered or bulleted list items, e.g. '1. Find all ...' or '- "Find all ..."'
+LIST_ITEM_PATTERN = re.compile(r'^\s*(?:\d+[.)]|[-*])\s+(.*\S)\s*$')
 
-def load_meeting_transcripts():
-    """
-    Load available meeting transcripts for sample inputs
-
-    Returns:
-        dict: Dictionary mapping display names to file contents
-    """
-    transcripts = {}
-    transcript_dir = "content"
-
-    # Define the content files and their display names
-    transcript_files = {
-        "USV Climate Weekly - July 18, 2025": "usv-climate-weekly-7-18-25.md",
-        "USV Climate Weekly - August 1, 2025": "usv-climate-weekly-8-1-25.md",
-        "USV Climate Weekly - August 15, 2025": "usv-climate-weekly-8-15-25.md",
-        "USV Climate Weekly - August 22, 2025": "usv-climate-weekly-8-22-25.md",
-        "Healthcare at the Edge": "healthcare-at-the-edge.md",
-        "The Fragmentation of Search": "the-fragmentation-of-search.md",
-        "Tools vs Truth": "tools-vs-truth.md",
-        "You Don't Own Your Memory": "you-dont-own-your-memory.md"
-    }
-
-    for display_name, filename in transcript_files.items():
-        file_path = os.path.join(transcript_dir, filename)
-        try:
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    transcripts[display_name] = f.read()
-        except Exception as e:
-            st.warning(f"Could not load {filename}: {e}")
-
-    return transcripts
-
-
-def extract_thesis_and_queries(content):
-    """
-    Extract investment theses and generate search queries using OpenRouter.
-    
-    Args:
-        content (str): Content to analyze (meeting notes, blog posts, etc.)
-        
-    Returns:
-        OpenAI stream response or None if error
-    """
-    # Get API key from secrets
-    try:
-        openrouter_api_key = st.secrets["openrouter_api_key"]
-    except (KeyError, AttributeError):
-        st.error("OpenRouter API key not found in secrets. Please configure openrouter_api_key in .streamlit/secrets.toml")
-        return None
+THESIS_MODEL = "google/gemini-2.5-flash"
 
-    try:
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=openrouter_api_key,
-        )
-        
-        prompt = """
+THESIS_INSTRUCTIONS = """
         You are a thesis-driven investor at Union Square Ventures who is searching for companies that are
         aligned with a specific thesis. The high level thesis of the fund is 'Investing at the Edge of
         Large Markets Under Transformative Pressure'. 
@@ -88,7 +51,9 @@ def extract_thesis_and_queries(content):
         Return maximum 2 search queries, they should capture the essence of the thesis.
         For example: "Find all seed or pre-seed startups that have raised less than $10M, founded after 2020, climate/energy startups that match this thesis: [thesis]"
 
-        Structure your response as:
+        """
+
+THESIS_MARKDOWN_FORMAT = """Structure your response as:
         
         #### Thesis 1: [Thesis in 1 concise sentence]
         1. Key insight 1 explained in 1-2 concise sentences
@@ -99,23 +64,269 @@ def extract_thesis_and_queries(content):
         1. Find all [search query based on the thesis]
         ...
         """
-        
-        response = client.chat.completions.create(
-            model="google/gemini-2.5-flash",  #
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": content}
-            ],
-            stream=True
-        )
-        
-        return response
-        
-    except Exception as e:
-        st.error(f"Error calling OpenRouter API: {e}")
-        return None
 
+THESIS_PROMPT = THESIS_INSTRUCTIONS + THESIS_MARKDOWN_FORMAT
+STRUCTURED_THESIS_PROMPT = THESIS_INSTRUCTIONS + STRUCTURED_OUTPUT_FORMAT
+
+
+def format_document_label(document):
+    """
+    Build the selector label for a content document
+
+    Args:
+        document (dict): Document from discover_documents()
+
+    Returns:
+        str: Title, plus the author and date when the front-matter has an author
+    """
+    if not document["author"]:
+        return document["title"]
+    details = [detail for detail in (document["author"], document["date"]) if detail]
+    return f"{document['title']} ({', '.join(details)})"
+
+
+class SearchQueryDetector:
+    """
+    Picks the generated search queries out of a streamed markdown thesis response
+
+    A query is reported as soon as the line holding it is complete, so it can
+    be submitted to FindAll while the rest of the response is still streaming.
+    """
+
+    def __init__(self):
+        self._partial_line = ""
+        self._in_queries_section = False
+        self.queries = []
+
+    def feed(self, delta):
+        """
+        Add a streamed delta
+
+        Args:
+            delta (str): Text delta from the stream
+
+        Returns:
+            list: Queries completed by this delta
+        """
+        *lines, self._partial_line = (self._partial_line + delta).split("\n")
+        return self._parse_lines(lines)
+
+    def close(self):
+        """
+        Finish the stream, parsing a final line without a trailing newline
+
+        Returns:
+            list: Queries found on that last line
+        """
+        line, self._partial_line = self._partial_line, ""
+        return self._parse_lines([line])
+
+    def _parse_lines(self, lines):
+        found = []
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith("#"):
+                self._in_queries_section = False
+                continue
+            if "search queries" in stripped.lower():
+                self._in_queries_section = True
+                continue
+
+            match = LIST_ITEM_PATTERN.match(line)
+            if not match:
+                continue
+
+            # Drop surrounding markdown emphasis and quotes
+            query = match.group(1).strip().strip('*_"“”').strip()
+            if (self._in_queries_section or query.lower().startswith("find all")) and query not in self.queries:
+                self.queries.append(query)
+                found.append(query)
+        return found
+
+
+def parse_search_queries(thesis_response):
+    """
+    Parse the generated "Find all ..." search queries out of a thesis extraction response
+
+    Args:
+        thesis_response (str): Markdown returned by the thesis extraction prompt
+
+    Returns:
+        list: Unique search queries in the order they appear
+    """
+    detector = SearchQueryDetector()
+    detector.feed(thesis_response)
+    detector.close()
+    return detector.queries
+
+
+def submit_streamed_queries(queries, result_limit, history_df):
+    """
+    Submit queries to the background orchestrator as soon as they stream in
+
+    Queries this extraction already submitted, or with a fresh prior run,
+    are skipped. The orchestrator's worker pool bounds how many runs start
+    at once, so submitting never blocks the extraction stream.
+
+    Args:
+        queries (list): Newly completed search queries
+        result_limit (int): Maximum number of results per query
+        history_df (pd.DataFrame): History index to check for prior runs
+
+    Returns:
+        list: (query, job_id) for each query submitted
+    """
+    submitted = st.session_state.setdefault("pipeline_jobs", {})
+    new_jobs = []
+    for query in queries:
+        if query in submitted:
+            continue
+        prior = find_prior_search(query, history_df)
+        if prior and prior["fresh"]:
+            continue
+        submitted[query] = get_findall_orchestrator().submit(query, result_limit)
+        new_jobs.append((query, submitted[query]))
+    return new_jobs
+
+
+def render_batch_search_section(queries):
+    """
+    Render the batch mode that submits every generated query to FindAll at once
+
+    Args:
+        queries (list): Search queries generated by thesis extraction
+    """
+    if not queries:
+        return
+
+    st.markdown("---")
+    st.subheader("🔍 Search All Queries")
+    # Queries with a fresh prior run start unchecked, so they aren't searched again by default
+    history_df = get_history_store().list_runs()
+    priors = [find_prior_search(query, history_df) for query in queries]
+    pipeline_jobs = st.session_state.get("pipeline_jobs", {})
+    with st.form("batch_search_form"):
+        selected_queries = []
+        for i, (query, prior) in enumerate(zip(queries, priors)):
+            fresh = bool(prior and prior["fresh"])
+            pipelined = query in pipeline_jobs
+            if st.checkbox(query, value=not (fresh or pipelined), key=f"batch_query_{i}"):
+                selected_queries.append(query)
+            if pipelined:
+                st.caption("🚀 Already submitted while the analysis was streaming")
+            elif fresh:
+                st.caption(f"♻️ Matches {describe_prior_run(prior)}, see **Search History**")
+        result_limit = st.number_input("Result limit per query:", min_value=5, max_value=30, value=10)
+        submit_button = st.form_submit_button("Run FindAll for selected queries", type="primary")
+
+    if submit_button and selected_queries:
+        st.session_state.batch_job_ids = get_findall_orchestrator().submit_batch(selected_queries, result_limit)
+        st.success(f"🚀 Submitted {len(selected_queries)} searches. They run in the background and are also listed under **New Search**.")
+
+    if pipeline_jobs:
+        render_findall_jobs(job_ids=list(pipeline_jobs.values()), title="Pipelined Search Status")
+    if st.session_state.get("batch_job_ids"):
+        render_findall_jobs(job_ids=st.session_state.batch_job_ids, title="Batch Search Status")
+
+
+def extract_thesis_and_queries(content):
+    """
+    Extract investment theses and generate search queries using OpenRouter.
 
+    Kept for existing callers; equivalent to stream_thesis_text(content) in
+    markdown mode, so it goes through the async engine and response cache.
+
+    Args:
+        content (str): Content to analyze (meeting notes, blog posts, etc.)
+
+    Returns:
+        iterator: Markdown text deltas as they arrive, or None if the API key is missing
+    """
+    return stream_thesis_text(content)
+
+
+def stream_thesis_text(content, use_cache=True, openrouter_api_key=None, structured=False):
+    """
+    Stream thesis extraction for the content as text deltas
+
+    A thin sync adapter over the async engine, which runs the OpenRouter
+    stream on the shared background event loop. Content longer than
+    CHUNK_THRESHOLD_CHARS goes through the chunked map-reduce pipeline.
+    Completed responses are cached by (prompt, model, content), and a cache
+    hit is replayed as a stream so the UI renders it the same way.
+
+    Args:
+        content (str): Content to analyze (meeting notes, blog posts, etc.)
+        use_cache (bool): Whether to replay or store cached responses
+        openrouter_api_key (str): OpenRouter API key; defaults to openrouter_api_key in secrets
+        structured (bool): Ask for JSON following THESIS_SCHEMA instead of markdown
+
+    Returns:
+        iterator: Text deltas as they arrive, or None if the API key is missing
+    """
+    prompt = STRUCTURED_THESIS_PROMPT if structured else THESIS_PROMPT
+    key = cache_key(prompt, THESIS_MODEL, content)
+    if use_cache:
+        cached = get_cached_response(key)
+        if cached is not None:
+            increment("thesis_cache.hits")
+            return replay_response(cached)
+        increment("thesis_cache.misses")
+
+    if openrouter_api_key is None:
+        try:
+            openrouter_api_key = st.secrets["openrouter_api_key"]
+        except (KeyError, AttributeError):
+            st.error("OpenRouter API key not found in secrets. Please configure openrouter_api_key in .streamlit/secrets.toml")
+            return None
+
+    completion_kwargs = {"response_format": THESIS_RESPONSE_FORMAT} if structured else {}
+    chunked = len(content) > CHUNK_THRESHOLD_CHARS
+    if chunked:
+        # Long transcripts are analyzed chunk by chunk in parallel, then merged
+        reduce_prompt = STRUCTURED_REDUCE_PROMPT if structured else REDUCE_PROMPT
+        agen = stream_chunked_extraction(content, openrouter_api_key, prompt, THESIS_MODEL,
+                                         reduce_prompt=reduce_prompt, **completion_kwargs)
+    else:
+        messages = [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": content}
+        ]
+        agen = stream_chat_completion(messages, THESIS_MODEL, openrouter_api_key, **completion_kwargs)
+    deltas = timed_stream(
+        get_background_loop().iterate(agen), "openrouter.stream",
+        mode="chunked" if chunked else "single", output="json" if structured else "markdown"
+    )
+    # A structured response is only worth replaying if it parses
+    return caching_stream(key, THESIS_MODEL, deltas, validate=parse_theses if structured else None)
+
+
+def _parse_thesis_stream(text_stream):
+    parser = ThesisStreamParser()
+    for delta in text_stream:
+        yield from parser.feed(delta)
+    parser.close()
+
+
+def stream_structured_theses(content, use_cache=True, openrouter_api_key=None):
+    """
+    Stream structured thesis extraction for the content as Thesis records
+
+    Each record is yielded as soon as its JSON object is complete, so its
+    queries can be rendered or submitted before the response finishes.
+
+    Args:
+        content (str): Content to analyze (meeting notes, blog posts, etc.)
+        use_cache (bool): Whether to replay or store cached responses
+        openrouter_api_key (str): OpenRouter API key; defaults to openrouter_api_key in secrets
+
+    Returns:
+        iterator: Thesis records as they complete, or None if the API key is missing
+    """
+    text_stream = stream_thesis_text(content, use_cache, openrouter_api_key, structured=True)
+    if text_stream is None:
+        return None
+    return _parse_thesis_stream(text_stream)
 
 
 def render_thesis_extraction_tab():
@@ -133,8 +344,8 @@ def render_thesis_extraction_tab():
         api_key_available = False
         st.warning("⚠️ OpenRouter API key not found. Please configure openrouter_api_key in .streamlit/secrets.toml to use this feature.")
 
-    # Load available meeting transcripts
-    transcripts = load_meeting_transcripts()
+    # Discover available meeting transcripts; content is only read for the selected one
+    documents = discover_documents()
 
     # Initialize content input
     content_input_value = ""
@@ -143,21 +354,26 @@ def render_thesis_extraction_tab():
 
 
     # Sample transcript selector
-    if transcripts:
-        # Set default to August 22 meeting if it exists
+    if documents:
+        # Set default to the August 22 meeting if it exists
+        titles = [doc["title"] for doc in documents]
         default_index = 0
-        if "USV Climate Weekly - August 22, 2025" in transcripts:
-            default_index = list(transcripts.keys()).index("USV Climate Weekly - August 22, 2025") + 1  # +1 for "Paste your own content..."
+        if "USV Climate Weekly - August 22, 2025" in titles:
+            default_index = titles.index("USV Climate Weekly - August 22, 2025") + 1  # +1 for "Paste your own content..."
 
-        selected_transcript = st.selectbox(
+        selected_index = st.selectbox(
             "Select a sample meeting transcript, blog post, or paste any content below:",
-            options=["Paste your own content..."] + list(transcripts.keys()),
-            index=default_index
+            options=range(len(documents) + 1),
+            index=default_index,
+            format_func=lambda i: "Paste your own content..." if i == 0 else format_document_label(documents[i - 1])
         )
 
         # Handle sample loading
-        if selected_transcript != "Paste your own content...":
-            content_input_value = transcripts[selected_transcript]
+        if selected_index:
+            try:
+                content_input_value = load_document_content(documents[selected_index - 1])
+            except (OSError, UnicodeDecodeError) as e:
+                st.warning(f"Could not load {documents[selected_index - 1]['filename']}: {e}")
 
     content_input = st.text_area(
         "Content to analyze:",
@@ -167,6 +383,15 @@ def render_thesis_extraction_tab():
     )
     
     extract_button = st.button("Extract Theses and Search Queries", type="primary")
+    refresh_analysis = st.checkbox("Re-run analysis (ignore cached results)", value=False)
+    structured_output = st.checkbox("Structured output (parse theses and queries from JSON)", value=False)
+    pipeline_searches = st.checkbox(
+        "Start FindAll searches as queries stream in",
+        value=False,
+        help="Each query is submitted the moment it is generated, so searches run while the analysis is still streaming"
+    )
+    if pipeline_searches:
+        pipeline_result_limit = st.number_input("Result limit per streamed query:", min_value=5, max_value=30, value=10)
     
     if extract_button and content_input and api_key_available:
         st.subheader("📋 Generated Theses & Search Queries")
@@ -177,34 +402,79 @@ def render_thesis_extraction_tab():
         
         # Initialize the streaming
         status_container.info("🤖 Analyzing...")
-        response = extract_thesis_and_queries(content_input)
+        if structured_output:
+            stream = stream_structured_theses(content_input, use_cache=not refresh_analysis)
+        else:
+            stream = stream_thesis_text(content_input, use_cache=not refresh_analysis)
         
-        if response:
-            # Stream the response with enhanced markdown support
-            full_response = ""
+        if stream:
+            output = thesis_container.container()
+            # Buffer tokens and only re-render the thesis section that is still streaming
+            renderer = None if structured_output else MarkdownStreamRenderer(output)
+            detector = SearchQueryDetector()
+            theses = []
             status_container.info("✨ Streaming response...")
+
+            # Searches pipelined from an earlier analysis don't carry over to this one
+            st.session_state.pipeline_jobs = {}
+            if pipeline_searches:
+                history_df = get_history_store().list_runs()
+                pipeline_container = st.container()
             
-            for chunk in response:
-                if chunk.choices[0].delta.content is not None:
-                    full_response += chunk.choices[0].delta.content
-                    
-                    # Render markdown with enhanced formatting
-                    with thesis_container.container():
-                        st.markdown(full_response, unsafe_allow_html=True)
-            
-            # Clear status and show completion
-            status_container.success("✅ Analysis complete!")
-            
-            # Store the full response
-            st.session_state.thesis_response = full_response
-            
-            # Add helpful note about using the queries
-            st.markdown("---")
-            st.info("💡 You can copy any search queries from above and use them in the **Parallel FindAll** tab to find companies.")
+            try:
+                for item in stream:
+                    if renderer:
+                        renderer.write(item)
+                        completed_queries = detector.feed(item)
+                    else:
+                        # Each thesis is rendered once, as soon as its record is complete
+                        theses.append(item)
+                        output.markdown(render_thesis_markdown(len(theses), item), unsafe_allow_html=True)
+                        completed_queries = list(item.queries)
+                    if pipeline_searches and completed_queries:
+                        for query, _ in submit_streamed_queries(completed_queries, pipeline_result_limit, history_df):
+                            pipeline_container.caption(f"🚀 Started FindAll: {query}")
+            except Exception as e:
+                if renderer:
+                    renderer.flush()
+                st.error(f"Error calling OpenRouter API: {e}")
+                status_container.error("❌ Failed to get response from AI. Please try again.")
+            else:
+                if renderer:
+                    full_response = renderer.close()
+                    last_queries = detector.close()
+                    if pipeline_searches and last_queries:
+                        for query, _ in submit_streamed_queries(last_queries, pipeline_result_limit, history_df):
+                            pipeline_container.caption(f"🚀 Started FindAll: {query}")
+                    queries = detector.queries
+                else:
+                    full_response = render_theses_markdown(theses)
+                    queries = queries_from_theses(theses)
+
+                # Clear status and show completion
+                status_container.success("✅ Analysis complete!")
+                
+                # Store the full response
+                st.session_state.thesis_response = full_response
+                st.session_state.thesis_queries = queries
+                
+                # Add helpful note about using the queries
+                st.markdown("---")
+                st.info("💡 Run every query below at once, or copy any search query from above into the **New Search** tab.")
         else:
             status_container.error("❌ Failed to get response from AI. Please try again.")
-                
-    elif extract_button and not content_input:
+
+    elif not extract_button and st.session_state.get("thesis_response"):
+        st.subheader("📋 Generated Theses & Search Queries")
+        st.markdown(st.session_state.thesis_response, unsafe_allow_html=True)
+
+    if st.session_state.get("thesis_response"):
+        queries = st.session_state.get("thesis_queries")
+        if queries is None:
+            queries = parse_search_queries(st.session_state.thesis_response)
+        render_batch_search_section(queries)
+
+    if extract_button and not content_input:
         st.warning("Please enter some content to analyze.")
     elif extract_button and not api_key_available:
         st.error("OpenRouter API key is required. Please configure openrouter_api_key in .streamlit/secrets.toml")
@@ -0,0 +1,239 @@
+"""
+Structured thesis extraction output
+
+In structured mode the model answers with JSON that follows THESIS_SCHEMA
+instead of free-form markdown. ThesisStreamParser picks complete thesis
+objects out of the streamed JSON as soon as each one closes, so a thesis
+and its queries can be rendered or submitted to FindAll before the rest of
+the response has arrived. The markdown view is rendered from the parsed
+records in the same "#### Thesis N / Search Queries" layout as the markdown
+prompt.
+"""
+import json
+from collections import namedtuple
+
+Thesis = namedtuple("Thesis", ["statement", "insights", "queries"])
+
+THESIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "theses": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "thesis": {"type": "string", "description": "The thesis in 1 concise sentence"},
+                    "insights": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Key insights supporting the thesis, each in 1-2 concise sentences",
+                    },
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Maximum 2 search queries, each starting with 'Find all'",
+                    },
+                },
+                "required": ["thesis", "insights", "queries"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["theses"],
+    "additionalProperties": False,
+}
+
+# Passed as response_format to the chat completions API
+THESIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "theses", "strict": True, "schema": THESIS_SCHEMA},
+}
+
+STRUCTURED_OUTPUT_FORMAT = """Respond with JSON only, in this shape:
+
+        {"theses": [{"thesis": "[Thesis in 1 concise sentence]",
+                     "insights": ["Key insight 1 explained in 1-2 concise sentences", ...],
+                     "queries": ["Find all [search query based on the thesis]", ...]}]}
+        """
+
+
+def thesis_from_dict(data):
+    """
+    Build a Thesis from one parsed JSON object, dropping blank and repeated entries
+
+    Args:
+        data (dict): Object with thesis, insights and queries
+
+    Returns:
+        Thesis: Parsed record, or None if the object has no thesis statement
+    """
+    if not isinstance(data, dict):
+        return None
+    statement = str(data.get("thesis") or "").strip()
+    if not statement:
+        return None
+
+    def clean(items):
+        cleaned = []
+        for item in items if isinstance(items, list) else []:
+            item = str(item).strip()
+            if item and item not in cleaned:
+                cleaned.append(item)
+        return tuple(cleaned)
+
+    return Thesis(statement, clean(data.get("insights")), clean(data.get("queries")))
+
+
+class ThesisStreamParser:
+    """
+    Incrementally parses streamed structured output into Thesis records
+
+    Tracks JSON nesting (ignoring brackets inside strings) and parses each
+    object in the top-level "theses" array the moment its closing brace
+    arrives. Anything around the JSON, such as a markdown code fence, is
+    ignored.
+    """
+
+    # Depth of the objects in {"theses": [ {...}, ... ]}
+    ITEM_DEPTH = 3
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+        self._position = 0
+        self.theses = []
+
+    @property
+    def text(self):
+        """Everything fed so far"""
+        return "".join(self._buffer)
+
+    def feed(self, delta):
+        """
+        Add a streamed delta
+
+        Args:
+            delta (str): Text delta from the stream
+
+        Returns:
+            list: Thesis records completed by this delta
+        """
+        self._buffer.append(delta)
+        completed = []
+        for char in delta:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if char == "{" and self._depth == self.ITEM_DEPTH:
+                    self._item_start = self._position
+            elif char in "}]":
+                if char == "}" and self._depth == self.ITEM_DEPTH and self._item_start is not None:
+                    thesis = self._parse_item(self._position + 1)
+                    if thesis is not None:
+                        completed.append(thesis)
+                self._depth = max(0, self._depth - 1)
+            self._position += 1
+        self.theses.extend(completed)
+        return completed
+
+    def close(self):
+        """
+        Finish the stream
+
+        Returns:
+            list: Every Thesis record parsed from the stream
+
+        Raises:
+            ValueError: If the stream held no parseable theses and isn't a valid empty response
+        """
+        if not self.theses:
+            text = self.text.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+            data = json.loads(text)
+            if not isinstance(data, dict) or not isinstance(data.get("theses"), list):
+                raise ValueError("Structured response has no theses array")
+        return self.theses
+
+    def _parse_item(self, end):
+        text = self.text
+        item = text[self._item_start:end]
+        self._item_start = None
+        try:
+            return thesis_from_dict(json.loads(item))
+        except json.JSONDecodeError:
+            return None
+
+
+def parse_theses(text):
+    """
+    Parse a complete structured response
+
+    Args:
+        text (str): JSON returned in structured mode
+
+    Returns:
+        list: Thesis records
+    """
+    parser = ThesisStreamParser()
+    parser.feed(text)
+    return parser.close()
+
+
+def queries_from_theses(theses):
+    """
+    Collect the search queries of several theses
+
+    Args:
+        theses (list): Thesis records
+
+    Returns:
+        list: Unique search queries in the order they appear
+    """
+    queries = []
+    for thesis in theses:
+        for query in thesis.queries:
+            if query not in queries:
+                queries.append(query)
+    return queries
+
+
+def render_thesis_markdown(number, thesis):
+    """
+    Render one thesis the way the markdown extraction prompt formats it
+
+    Args:
+        number (int): 1-based thesis number
+        thesis (Thesis): Thesis record
+
+    Returns:
+        str: Markdown section
+    """
+    lines = [f"#### Thesis {number}: {thesis.statement}"]
+    lines += [f"{i}. {insight}" for i, insight in enumerate(thesis.insights, start=1)]
+    if thesis.queries:
+        lines += ["", "**Search Queries:**"]
+        lines += [f"{i}. {query}" for i, query in enumerate(thesis.queries, start=1)]
+    return "\n".join(lines) + "\n"
+
+
+def render_theses_markdown(theses):
+    """
+    Render Thesis records as a single markdown document
+
+    Args:
+        theses (list): Thesis records
+
+    Returns:
+        str: Markdown in the "#### Thesis N / Search Queries" layout
+    """
+    return "\n".join(render_thesis_markdown(i, thesis) for i, thesis in enumerate(theses, start=1))
@@ -0,0 +1,151 @@
+"""
+Transcript corpus: discovery, metadata and lazy loading of content/ documents
+
+Every .md file in the content directory is discovered automatically. Only
+the first few kilobytes of each file are read to parse its front-matter
+(title, date, author), and the parsed metadata is cached by modification
+time and size, so listing the corpus on a rerun costs a stat() per file.
+A document's full content is only read when it is selected, through a small
+LRU cache keyed by modification time and size.
+"""
+import functools
+import os
+import re
+import threading
+from datetime import date
+
+# Configuration
+CONTENT_DIR = "content"
+HEADER_BYTES = 4096
+CONTENT_CACHE_SIZE = 16
+
+FRONT_MATTER_PATTERN = re.compile(r"\A---\s*\n(.*?)\n---\s*(?:\n|\Z)", re.DOTALL)
+FRONT_MATTER_LINE_PATTERN = re.compile(r"^([A-Za-z_][\w-]*)\s*:\s*(.*?)\s*$")
+# Dated meeting notes are named like usv-climate-weekly-8-22-25.md
+FILENAME_DATE_PATTERN = re.compile(r"^(.*?)-(\d{1,2})-(\d{1,2})-(\d{2}|\d{4})$")
+TITLE_ACRONYMS = {"usv", "ai", "yc", "llm", "vc"}
+
+_metadata_cache = {}
+_metadata_lock = threading.Lock()
+
+
+def parse_front_matter(text):
+    """
+    Parse a simple YAML front-matter block (key: value lines between --- fences)
+
+    Args:
+        text (str): Start of a markdown document
+
+    Returns:
+        dict: Front-matter fields with surrounding quotes removed, or {} if there is none
+    """
+    match = FRONT_MATTER_PATTERN.match(text)
+    if not match:
+        return {}
+    fields = {}
+    for line in match.group(1).splitlines():
+        line_match = FRONT_MATTER_LINE_PATTERN.match(line)
+        if line_match:
+            key, value = line_match.groups()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            fields[key.lower()] = value
+    return fields
+
+
+def _title_from_filename(stem):
+    """Build a display title and date from a filename like usv-climate-weekly-8-22-25"""
+    doc_date = None
+    match = FILENAME_DATE_PATTERN.match(stem)
+    if match:
+        stem, month, day, year = match.groups()
+        year = int(year) + 2000 if len(year) == 2 else int(year)
+        try:
+            doc_date = date(year, int(month), int(day))
+        except ValueError:
+            doc_date = None
+
+    words = [word.upper() if word in TITLE_ACRONYMS else word.capitalize() for word in stem.split("-")]
+    title = " ".join(words)
+    if doc_date:
+        title = f"{title} - {doc_date.strftime('%B')} {doc_date.day}, {doc_date.year}"
+    return title, doc_date.isoformat() if doc_date else ""
+
+
+def _read_metadata(path, stat):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_BYTES).decode("utf-8", errors="ignore")
+    fields = parse_front_matter(header)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    fallback_title, fallback_date = _title_from_filename(stem)
+    return {
+        "path": path,
+        "filename": os.path.basename(path),
+        "title": fields.get("title") or fallback_title,
+        "date": fields.get("date") or fallback_date,
+        "author": fields.get("author", ""),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def discover_documents(content_dir=CONTENT_DIR):
+    """
+    List the documents in the content directory, newest first
+
+    Metadata is only re-parsed for files whose modification time or size
+    changed since the last call.
+
+    Args:
+        content_dir (str): Directory to scan for .md files
+
+    Returns:
+        list: Document dicts with path, filename, title, date, author, size and mtime_ns
+    """
+    content_dir = os.path.normpath(content_dir)
+    if not os.path.isdir(content_dir):
+        return []
+
+    documents = []
+    seen = set()
+    with os.scandir(content_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith(".md"):
+                continue
+            stat = entry.stat()
+            seen.add(entry.path)
+            with _metadata_lock:
+                cached = _metadata_cache.get(entry.path)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                documents.append(cached)
+                continue
+            metadata = _read_metadata(entry.path, stat)
+            with _metadata_lock:
+                _metadata_cache[entry.path] = metadata
+            documents.append(metadata)
+
+    with _metadata_lock:
+        for path in [path for path in _metadata_cache if os.path.dirname(path) == content_dir and path not in seen]:
+            del _metadata_cache[path]
+
+    return sorted(documents, key=lambda doc: (doc["date"], doc["title"]), reverse=True)
+
+
+@functools.lru_cache(maxsize=CONTENT_CACHE_SIZE)
+def _load_content(path, mtime_ns, size):
+    # mtime_ns and size only key the cache, so an edited file is read again
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_document_content(document):
+    """
+    Read a document's full content, reusing the cached copy while the file is unchanged
+
+    Args:
+        document (dict): Document from discover_documents()
+
+    Returns:
+        str: File content, including any front-matter
+    """
+    return _load_content(document["path"], document["mtime_ns"], document["size"])